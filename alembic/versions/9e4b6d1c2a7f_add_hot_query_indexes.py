@@ -0,0 +1,55 @@
+"""add_hot_query_indexes
+
+Revision ID: 9e4b6d1c2a7f
+Revises: 5c1e7f2a9b3d
+Create Date: 2026-10-17 11:04:27.562913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e4b6d1c2a7f'
+down_revision: Union[str, Sequence[str], None] = '5c1e7f2a9b3d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Unique constraint öncesi: aynı (vehicle_vin, user_id) için en yeni kayıt kalsın
+    op.execute(
+        "DELETE FROM vehicle_access WHERE id NOT IN ("
+        "SELECT MAX(id) FROM vehicle_access GROUP BY vehicle_vin, user_id)"
+    )
+    op.create_unique_constraint('uq_vehicle_access_vehicle_user', 'vehicle_access', ['vehicle_vin', 'user_id'])
+
+    # Büyük tablolarda yazmaları kilitlememek için PostgreSQL'de CONCURRENTLY (transaction dışında)
+    concurrently = op.get_bind().dialect.name == "postgresql"
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_vehicles_owner_active_year', 'vehicles', ['owner_id', 'year', 'vin'],
+            unique=False,
+            postgresql_where=sa.text('is_deleted = false'),
+            sqlite_where=sa.text('is_deleted = 0'),
+            postgresql_concurrently=concurrently,
+        )
+        op.create_index(
+            'ix_vehicle_access_user_id', 'vehicle_access', ['user_id'],
+            unique=False, postgresql_concurrently=concurrently,
+        )
+        op.create_index(
+            'ix_service_records_vin_date', 'service_records', ['vehicle_vin', 'date', 'id'],
+            unique=False, postgresql_concurrently=concurrently,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_service_records_vin_date', table_name='service_records')
+    op.drop_index('ix_vehicle_access_user_id', table_name='vehicle_access')
+    op.drop_index('ix_vehicles_owner_active_year', table_name='vehicles')
+    op.drop_constraint('uq_vehicle_access_vehicle_user', 'vehicle_access', type_='unique')
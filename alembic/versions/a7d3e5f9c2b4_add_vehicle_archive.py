@@ -0,0 +1,76 @@
+"""add_vehicle_archive
+
+Revision ID: a7d3e5f9c2b4
+Revises: f2c8a4e6b1d9
+Create Date: 2026-10-17 19:05:12.483910
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d3e5f9c2b4'
+down_revision: Union[str, Sequence[str], None] = 'f2c8a4e6b1d9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('vehicles') as batch_op:
+        batch_op.add_column(sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True))
+    # Daha önce silinmiş araçların bekleme süresi migration anından başlar
+    op.execute("UPDATE vehicles SET deleted_at = CURRENT_TIMESTAMP WHERE is_deleted = true")
+    op.create_index(
+        'ix_vehicles_deleted_at', 'vehicles', ['deleted_at'],
+        postgresql_where=sa.text('is_deleted = true'),
+        sqlite_where=sa.text('is_deleted = 1'),
+    )
+    op.create_table('vehicles_archive',
+        sa.Column('vin', sa.String(), nullable=False),
+        sa.Column('archived_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('model', sa.String(), nullable=False),
+        sa.Column('brand', sa.String(), nullable=False),
+        sa.Column('year', sa.Integer(), nullable=False),
+        sa.Column('mileage', sa.Integer(), nullable=False),
+        sa.Column('color', sa.String(), nullable=True),
+        sa.Column('owner_id', sa.UUID(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('vin', 'archived_at')
+    )
+    op.create_index(op.f('ix_vehicles_archive_owner_id'), 'vehicles_archive', ['owner_id'])
+    op.create_table('service_records_archive',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('vehicle_vin', sa.String(), nullable=False),
+        sa.Column('archived_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('description', sa.String(), nullable=False),
+        sa.Column('mileage', sa.Integer(), nullable=False),
+        sa.Column('cost', sa.Integer(), nullable=True),
+        sa.Column('service_name', sa.String(), nullable=True),
+        sa.Column('date', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_service_records_archive_vehicle', 'service_records_archive', ['vehicle_vin', 'archived_at'])
+    op.create_table('vehicle_access_archive',
+        sa.Column('vehicle_vin', sa.String(), nullable=False),
+        sa.Column('archived_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('user_id', sa.UUID(), nullable=False),
+        sa.Column('permission', sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint('vehicle_vin', 'archived_at', 'user_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('vehicle_access_archive')
+    op.drop_index('ix_service_records_archive_vehicle', table_name='service_records_archive')
+    op.drop_table('service_records_archive')
+    op.drop_index(op.f('ix_vehicles_archive_owner_id'), table_name='vehicles_archive')
+    op.drop_table('vehicles_archive')
+    op.drop_index('ix_vehicles_deleted_at', table_name='vehicles')
+    with op.batch_alter_table('vehicles') as batch_op:
+        batch_op.drop_column('deleted_at')
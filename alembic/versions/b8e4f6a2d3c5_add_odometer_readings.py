@@ -0,0 +1,34 @@
+"""add_odometer_readings
+
+Revision ID: b8e4f6a2d3c5
+Revises: a7d3e5f9c2b4
+Create Date: 2026-10-17 20:12:37.215604
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8e4f6a2d3c5'
+down_revision: Union[str, Sequence[str], None] = 'a7d3e5f9c2b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('odometer_readings',
+        sa.Column('vehicle_vin', sa.String(), nullable=False),
+        sa.Column('recorded_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('odometer', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('vehicle_vin', 'recorded_at'),
+        sqlite_with_rowid=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('odometer_readings')
@@ -0,0 +1,57 @@
+"""add_vehicle_stats_table
+
+Revision ID: c7d2e8f4a1b6
+Revises: 9e4b6d1c2a7f
+Create Date: 2026-10-17 12:31:09.874120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7d2e8f4a1b6'
+down_revision: Union[str, Sequence[str], None] = '9e4b6d1c2a7f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('vehicle_stats',
+        sa.Column('vehicle_vin', sa.String(), nullable=False),
+        sa.Column('service_count', sa.Integer(), nullable=False),
+        sa.Column('total_cost', sa.Integer(), nullable=False),
+        sa.Column('cost_count', sa.Integer(), nullable=False),
+        sa.Column('min_mileage', sa.Integer(), nullable=True),
+        sa.Column('max_mileage', sa.Integer(), nullable=True),
+        sa.Column('first_mileage', sa.Integer(), nullable=True),
+        sa.Column('last_mileage', sa.Integer(), nullable=True),
+        sa.Column('first_date', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_date', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['vehicle_vin'], ['vehicles.vin'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('vehicle_vin')
+    )
+    # Mevcut servis kayıtlarından özetleri doldur (STATS_SUMMARY açılmadan önce hazır olsun)
+    op.execute("""
+        INSERT INTO vehicle_stats (
+            vehicle_vin, service_count, total_cost, cost_count, min_mileage, max_mileage,
+            first_date, last_date, first_mileage, last_mileage
+        )
+        SELECT vehicle_vin, COUNT(*), COALESCE(SUM(cost), 0), COUNT(cost), MIN(mileage), MAX(mileage),
+               MIN(date), MAX(date), MAX(first_mileage), MAX(last_mileage)
+        FROM (
+            SELECT vehicle_vin, mileage, cost, date,
+                   FIRST_VALUE(mileage) OVER (PARTITION BY vehicle_vin ORDER BY date, id) AS first_mileage,
+                   FIRST_VALUE(mileage) OVER (PARTITION BY vehicle_vin ORDER BY date DESC, id DESC) AS last_mileage
+            FROM service_records
+        ) AS ordered
+        GROUP BY vehicle_vin
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('vehicle_stats')
@@ -0,0 +1,35 @@
+"""add_change_events
+
+Revision ID: c9f5a7b3e1d6
+Revises: b8e4f6a2d3c5
+Create Date: 2026-10-18 09:41:05.318207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9f5a7b3e1d6'
+down_revision: Union[str, Sequence[str], None] = 'b8e4f6a2d3c5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('change_events',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('message', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_change_events_created_at'), 'change_events', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_change_events_created_at'), table_name='change_events')
+    op.drop_table('change_events')
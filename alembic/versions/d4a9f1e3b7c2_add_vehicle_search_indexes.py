@@ -0,0 +1,54 @@
+"""add_vehicle_search_indexes
+
+Revision ID: d4a9f1e3b7c2
+Revises: c7d2e8f4a1b6
+Create Date: 2026-10-17 14:12:40.318552
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a9f1e3b7c2'
+down_revision: Union[str, Sequence[str], None] = 'c7d2e8f4a1b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRGM_COLUMNS = ("brand", "model", "color")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Arama indeksleri sadece PostgreSQL'de; SQLite'ta app.search süreç içi indeks kullanır
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    with op.get_context().autocommit_block():
+        for name in TRGM_COLUMNS:
+            op.create_index(
+                f'ix_vehicles_{name}_trgm', 'vehicles', [name],
+                postgresql_using='gin', postgresql_ops={name: 'gin_trgm_ops'},
+                postgresql_concurrently=True,
+            )
+        op.create_index(
+            'ix_vehicles_vin_pattern', 'vehicles', ['vin'],
+            postgresql_ops={'vin': 'varchar_pattern_ops'}, postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_service_records_description_fts', 'service_records',
+            [sa.text("to_tsvector('simple'::regconfig, description)")],
+            postgresql_using='gin', postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.drop_index('ix_service_records_description_fts', table_name='service_records')
+    op.drop_index('ix_vehicles_vin_pattern', table_name='vehicles')
+    for name in TRGM_COLUMNS:
+        op.drop_index(f'ix_vehicles_{name}_trgm', table_name='vehicles')
@@ -0,0 +1,74 @@
+"""add_organizations_and_fleets
+
+Revision ID: f2c8a4e6b1d9
+Revises: e6b3c9d1f4a8
+Create Date: 2026-10-17 17:20:48.102377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2c8a4e6b1d9'
+down_revision: Union[str, Sequence[str], None] = 'e6b3c9d1f4a8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('organizations',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('organization_members',
+        sa.Column('organization_id', sa.UUID(), nullable=False),
+        sa.Column('user_id', sa.UUID(), nullable=False),
+        sa.Column('role', sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('organization_id', 'user_id')
+    )
+    op.create_index('ix_organization_members_user', 'organization_members', ['user_id', 'organization_id'])
+    op.create_table('fleets',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('owner_id', sa.UUID(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_fleets_owner_id'), 'fleets', ['owner_id'])
+    op.create_table('fleet_grants',
+        sa.Column('fleet_id', sa.Integer(), nullable=False),
+        sa.Column('organization_id', sa.UUID(), nullable=False),
+        sa.Column('permission', sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(['fleet_id'], ['fleets.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('fleet_id', 'organization_id')
+    )
+    op.create_index('ix_fleet_grants_organization', 'fleet_grants', ['organization_id', 'fleet_id'])
+    with op.batch_alter_table('vehicles') as batch_op:
+        batch_op.add_column(sa.Column('fleet_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_vehicles_fleet_id', 'fleets', ['fleet_id'], ['id'], ondelete='SET NULL')
+        batch_op.create_index('ix_vehicles_fleet_id', ['fleet_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('vehicles') as batch_op:
+        batch_op.drop_index('ix_vehicles_fleet_id')
+        batch_op.drop_constraint('fk_vehicles_fleet_id', type_='foreignkey')
+        batch_op.drop_column('fleet_id')
+    op.drop_index('ix_fleet_grants_organization', table_name='fleet_grants')
+    op.drop_table('fleet_grants')
+    op.drop_index(op.f('ix_fleets_owner_id'), table_name='fleets')
+    op.drop_table('fleets')
+    op.drop_index('ix_organization_members_user', table_name='organization_members')
+    op.drop_table('organization_members')
+    op.drop_table('organizations')
@@ -0,0 +1,37 @@
+"""Kullanıcı yönetimi CLI'ı: ban / rol değişimi (ilk yöneticiyi atamak için de).
+
+    python -m app.admin ban user@example.com
+    python -m app.admin unban user@example.com
+    python -m app.admin role user@example.com admin
+
+crud.set_user_banned / set_user_role üzerinden: token_version artar, eski token'lar reddedilir.
+Çalışan worker'ların auth cache'i bu süreçte değildir; değişiklik en geç AUTH_CACHE_TTL içinde
+görülür.
+"""
+import argparse
+import sys
+from app import crud, schemas
+from app.database import SessionLocal
+
+def main():
+    parser = argparse.ArgumentParser(description="Kullanıcı ban / rol yönetimi")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name in ("ban", "unban"):
+        commands.add_parser(name).add_argument("email")
+    role = commands.add_parser("role")
+    role.add_argument("email")
+    role.add_argument("role", choices=schemas.USER_ROLES)
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        user = crud.get_user_by_email(db, args.email)
+        if user is None:
+            sys.exit(f"{args.email}: kullanıcı bulunamadı")
+        if args.command == "role":
+            crud.set_user_role(db, user, args.role)
+        else:
+            crud.set_user_banned(db, user, args.command == "ban")
+        print(f"{user.email}: role={user.role} is_banned={user.is_banned} token_version={user.token_version}")
+
+if __name__ == "__main__":
+    main()
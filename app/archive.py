@@ -0,0 +1,194 @@
+"""Silinmiş araçların arşivlenmesi ve geri yüklenmesi.
+
+delete_vehicle aracı sadece işaretler (is_deleted, deleted_at): satır, servis kayıtları ve
+paylaşımları sıcak tablolarda kalır, her liste / yetki sorgusu onları filtreler ve indeksler
+büyümeye devam eder. `archive_deleted`, ARCHIVE_RETENTION_DAYS günden önce silinmiş araçları
+servis kayıtları ve paylaşımlarıyla birlikte *_archive tablolarına taşır. Her batch
+(ARCHIVE_BATCH_SIZE araç) tek transaction'dır: INSERT ... SELECT ve DELETE, satırlar Python'dan
+geçmez. Özet satırı (vehicle_stats) arşivlenmez, geri yüklemede yeniden hesaplanır; telemetri
+okumaları (odometer_readings) silinir.
+
+Bekleme süresi içinde silme doğrudan geri alınır; arşivlenmiş araç da `restore_vehicle` ile aynı
+satırlara (aynı servis kaydı id'leri, aynı paylaşımlar) döner. Filo üyeliği geri yüklenmez.
+Arşivdeki bir VIN bu arada başka biri tarafından kaydedildiyse geri yükleme VinInUse verir.
+
+Periyodik çalıştırma (cron vb.):
+
+    python -m app.archive              # süresi dolmuş tüm silinmiş araçlar
+    python -m app.archive --dry-run    # sadece sayı
+"""
+import argparse
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+from sqlalchemy import delete, false, func, insert, literal, select, true
+from sqlalchemy.orm import Session
+from app import crud, events, models, stats
+from app.cache import response_cache
+from app.database import SessionLocal
+
+ARCHIVE_RETENTION_DAYS = float(os.getenv("ARCHIVE_RETENTION_DAYS", "30"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "500"))
+
+VEHICLE_COLUMNS = ("vin", "model", "brand", "year", "mileage", "color", "owner_id", "created_at", "deleted_at")
+RECORD_COLUMNS = ("id", "vehicle_vin", "description", "mileage", "cost", "service_name", "date")
+ACCESS_COLUMNS = ("vehicle_vin", "user_id", "permission")
+
+logger = logging.getLogger(__name__)
+
+class VinInUse(Exception):
+    """Arşivdeki aracın VIN'i şu an başka bir araçta kayıtlı."""
+
+def _now() -> datetime:
+    # Timestamp SQLite'ta saniye hassasiyetinde saklanır; arşiv anahtarı aynı değerle eşleşmeli
+    return datetime.now(timezone.utc).replace(microsecond=0)
+
+def _columns(model, names) -> list:
+    return [getattr(model, name) for name in names]
+
+def archive_candidates_query(cutoff: datetime, limit: int):
+    v = models.Vehicle
+    return (
+        select(v.vin)
+        .where(v.is_deleted == True, v.deleted_at < cutoff)
+        .order_by(v.deleted_at)
+        .limit(limit)
+        # PostgreSQL: eşzamanlı geri yükleme / başka bir arşiv süreci bu satırları kilitlediyse atla
+        .with_for_update(skip_locked=True)
+    )
+
+def archive_batch(db: Session, cutoff: datetime, limit: int = ARCHIVE_BATCH_SIZE) -> int:
+    """`cutoff`tan önce silinmiş en fazla `limit` aracı arşive taşır; taşınan araç sayısını döner.
+    Commit çağırana aittir."""
+    vins = list(db.scalars(archive_candidates_query(cutoff, limit)))
+    if not vins:
+        return 0
+    archived_at = literal(_now(), models.Timestamp)
+    v, r, a = models.Vehicle, models.ServiceRecord, models.VehicleAccess
+
+    db.execute(insert(models.VehicleArchive).from_select(
+        [*VEHICLE_COLUMNS, "archived_at"],
+        select(*_columns(v, VEHICLE_COLUMNS), archived_at).where(v.vin.in_(vins)),
+    ))
+    db.execute(insert(models.ServiceRecordArchive).from_select(
+        [*RECORD_COLUMNS, "archived_at"],
+        select(*_columns(r, RECORD_COLUMNS), archived_at).where(r.vehicle_vin.in_(vins)),
+    ))
+    db.execute(insert(models.VehicleAccessArchive).from_select(
+        [*ACCESS_COLUMNS, "archived_at"],
+        select(*_columns(a, ACCESS_COLUMNS), archived_at).where(a.vehicle_vin.in_(vins)),
+    ))
+    # SQLite FK cascade'i uygulamaz; bağımlı satırlar açıkça silinir. Telemetri okumaları
+    # arşivlenmez (yüksek hacimli, silinmiş aracın kilometre geçmişi saklanmaz)
+    dependents = (
+        (r, r.vehicle_vin), (a, a.vehicle_vin), (models.VehicleStats, models.VehicleStats.vehicle_vin),
+        (models.OdometerReading, models.OdometerReading.vehicle_vin),
+    )
+    for model, column in dependents:
+        db.execute(delete(model).where(column.in_(vins)), execution_options={"synchronize_session": False})
+    db.execute(delete(v).where(v.vin.in_(vins)), execution_options={"synchronize_session": False})
+    return len(vins)
+
+def archive_deleted(session_factory=None, retention_days: float = ARCHIVE_RETENTION_DAYS,
+                    batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+    """Bekleme süresi dolmuş tüm silinmiş araçları batch batch arşivler; toplam sayıyı döner.
+
+    Silinmiş araçlar hiçbir listede görünmediğinden yanıt cache'i ya da arama indeksi etkilenmez."""
+    cutoff = _now() - timedelta(days=retention_days)
+    total = 0
+    with (session_factory or SessionLocal)() as db:
+        while True:
+            moved = archive_batch(db, cutoff, batch_size)
+            db.commit()
+            total += moved
+            if moved < batch_size:
+                break
+    if total:
+        logger.info("%d silinmiş araç arşivlendi", total)
+    return total
+
+def count_pending(db: Session, retention_days: float = ARCHIVE_RETENTION_DAYS) -> int:
+    v = models.Vehicle
+    cutoff = _now() - timedelta(days=retention_days)
+    return db.scalar(select(func.count()).where(v.is_deleted == True, v.deleted_at < cutoff))
+
+# --- GERİ YÜKLEME ---
+
+def get_deleted_vehicles(db: Session, user_id: UUID) -> list:
+    """Kullanıcının geri yüklenebilir araçları: silinmiş (bekleme süresinde) ve arşivlenmiş."""
+    v, va = models.Vehicle, models.VehicleArchive
+    fields = ("vin", "brand", "model", "year", "deleted_at")
+    rows = crud.row_dicts(db.execute(
+        select(*_columns(v, fields), false().label("archived")).where(v.owner_id == user_id, v.is_deleted == True)
+    )) + crud.row_dicts(db.execute(
+        select(*_columns(va, fields), true().label("archived")).where(va.owner_id == user_id)
+    ))
+    # Az satır: UNION + ORDER BY'ın geçici sıralaması yerine Python'da
+    epoch = datetime.min.replace(tzinfo=timezone.utc)
+    return sorted(rows, key=lambda row: row["deleted_at"] or epoch, reverse=True)
+
+def _restore_archived(db: Session, vehicle_vin: str, user_id: UUID) -> bool:
+    va = models.VehicleArchive
+    archived_at = db.scalar(
+        select(va.archived_at)
+        .where(va.vin == vehicle_vin, va.owner_id == user_id)
+        .order_by(va.archived_at.desc())
+        .limit(1)
+    )
+    if archived_at is None:
+        return False
+    if db.get(models.Vehicle, vehicle_vin) is not None:
+        raise VinInUse(vehicle_vin)
+
+    live_columns = [name for name in VEHICLE_COLUMNS if name != "deleted_at"]
+    db.execute(insert(models.Vehicle).from_select(
+        [*live_columns, "is_deleted"],
+        select(*_columns(va, live_columns), false()).where(va.vin == vehicle_vin, va.archived_at == archived_at),
+    ))
+    for archive, live, columns in (
+        (models.ServiceRecordArchive, models.ServiceRecord, RECORD_COLUMNS),
+        (models.VehicleAccessArchive, models.VehicleAccess, ACCESS_COLUMNS),
+    ):
+        key = (archive.vehicle_vin == vehicle_vin, archive.archived_at == archived_at)
+        db.execute(insert(live).from_select(list(columns), select(*_columns(archive, columns)).where(*key)))
+        db.execute(delete(archive).where(*key), execution_options={"synchronize_session": False})
+    db.execute(delete(va).where(va.vin == vehicle_vin, va.archived_at == archived_at),
+               execution_options={"synchronize_session": False})
+    stats.schedule_refresh(db, [vehicle_vin])
+    return True
+
+def restore_vehicle(db: Session, vehicle_vin: str, user_id: UUID):
+    """Sahibin sildiği aracı geri getirir (silinmiş ya da arşivlenmiş); yoksa None."""
+    v = models.Vehicle
+    vehicle = db.scalar(
+        select(v).where(v.vin == vehicle_vin, v.owner_id == user_id, v.is_deleted == True).with_for_update()
+    )
+    if vehicle is not None:
+        vehicle.is_deleted = False
+        vehicle.deleted_at = None
+    elif not _restore_archived(db, vehicle_vin, user_id):
+        return None
+
+    db.flush()
+    audience = list(db.scalars(crud.vehicle_audience_query(vehicle_vin)))
+    events.publish(db, vehicle_vin, "vehicle.restored", recipients=audience)
+    db.commit()
+    response_cache.bump(*audience)
+    return db.get(v, vehicle_vin)
+
+def main():
+    parser = argparse.ArgumentParser(description="Silinmiş araçları arşiv tablolarına taşır.")
+    parser.add_argument("--retention-days", type=float, default=ARCHIVE_RETENTION_DAYS)
+    parser.add_argument("--batch", type=int, default=ARCHIVE_BATCH_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="taşımadan bekleyen araç sayısını yaz")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    if args.dry_run:
+        with SessionLocal() as db:
+            print(count_pending(db, args.retention_days))
+        return
+    print(archive_deleted(retention_days=args.retention_days, batch_size=args.batch))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""crud.py fonksiyonlarının AsyncSession karşılıkları (DB_ASYNC=true modunda kullanılır).
+
+Sorgular crud.py'deki sorgu kurucularından gelir; iki taraf aynı SQL'i üretir.
+"""
+from datetime import datetime, timezone
+from uuid import UUID
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import models, schemas, crud, stats, events
+from .cache import response_cache
+from .database import PRIMARY
+
+async def get_user_by_email(db: AsyncSession, email: str):
+    return await db.scalar(select(models.User).where(models.User.email == email))
+
+async def get_user(db: AsyncSession, user_id: UUID):
+    return await db.get(models.User, user_id)
+
+async def create_user(db: AsyncSession, user: schemas.UserCreate, hashed_password: str):
+    db_user = models.User(
+        email=user.email,
+        hashed_password=hashed_password
+    )
+
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    return db_user
+
+async def update_password_hash(db: AsyncSession, user: models.User, hashed_password: str):
+    user.hashed_password = hashed_password
+    await db.commit()
+    return user
+
+async def create_vehicle(db: AsyncSession, vehicle: schemas.VehicleCreate, user_id: UUID):
+    db_vehicle = models.Vehicle(**vehicle.model_dump(), owner_id=user_id)
+
+    db.add(db_vehicle)
+    await db.commit()
+    await db.refresh(db_vehicle)
+    response_cache.bump(user_id)
+    return db_vehicle
+
+async def get_user_vehicles(
+    db: AsyncSession,
+    user_id: UUID,
+    skip: int = 0,
+    limit: int = 20,
+    brand: str = None,
+    sort: str = "-year",
+    cursor: str = None
+):
+    query = crud.user_vehicles_query(user_id, skip=skip, limit=limit, brand=brand, sort=sort, cursor=cursor)
+    return (await db.scalars(query)).all()
+
+async def get_user_vehicle_rows(
+    db: AsyncSession,
+    user_id: UUID,
+    skip: int = 0,
+    limit: int = 20,
+    brand: str = None,
+    sort: str = "-year",
+    cursor: str = None
+) -> list:
+    query = crud.user_vehicles_query(
+        user_id, skip=skip, limit=limit, brand=brand, sort=sort, cursor=cursor, columns=crud.VEHICLE_ROW_COLUMNS
+    )
+    return crud.row_dicts(await db.execute(query))
+
+async def get_vehicle_role(db: AsyncSession, vehicle_vin: str, user_id: UUID):
+    row = (await db.execute(crud.vehicle_role_query(vehicle_vin, user_id), bind_arguments=PRIMARY)).first()
+    return crud.vehicle_role(row, user_id)
+
+async def delete_vehicle(db: AsyncSession, vehicle_vin: str, user_id: UUID):
+    db_vehicle = await db.scalar(select(models.Vehicle).where(
+        models.Vehicle.vin == vehicle_vin,
+        models.Vehicle.owner_id == user_id
+    ))
+
+    if db_vehicle:
+        if not db_vehicle.is_deleted:
+            # Arşivleme bekleme süresi ilk silmeden başlar (app.archive)
+            db_vehicle.deleted_at = datetime.now(timezone.utc)
+        db_vehicle.is_deleted = True
+        audience = list(await db.scalars(crud.vehicle_audience_query(vehicle_vin)))
+        await db.run_sync(lambda session: events.publish(session, vehicle_vin, "vehicle.deleted", recipients=audience))
+        await db.commit()
+        response_cache.bump(*audience)
+        return True
+
+    return False
+
+async def update_vehicle(db: AsyncSession, vehicle_vin: str, user_id: UUID, update_data: schemas.VehicleUpdate):
+    db_vehicle = await db.scalar(select(models.Vehicle).where(
+        models.Vehicle.vin == vehicle_vin,
+        models.Vehicle.owner_id == user_id,
+        models.Vehicle.is_deleted == False
+    ))
+    if db_vehicle:
+        update_dict = update_data.model_dump(exclude_unset=True)
+        for field, value in update_dict.items():
+            if value is not None:
+                setattr(db_vehicle, field, value)
+        audience = list(await db.scalars(crud.vehicle_audience_query(vehicle_vin)))
+        changes = {field: value for field, value in update_dict.items() if value is not None}
+        await db.run_sync(lambda session: events.publish(
+            session, vehicle_vin, "vehicle.updated", {"changes": changes}, recipients=audience
+        ))
+        await db.commit()
+        await db.refresh(db_vehicle)
+        response_cache.bump(*audience)
+        return db_vehicle
+    return None
+
+# --- ARAÇ PAYLAŞIM (ACCESS) İŞLEMLERİ ---
+
+async def share_vehicle(db: AsyncSession, vehicle_vin: str, target_user_id: UUID, permission: str):
+    existing_access = await db.scalar(select(models.VehicleAccess).where(
+        models.VehicleAccess.vehicle_vin == vehicle_vin,
+        models.VehicleAccess.user_id == target_user_id
+    ))
+
+    granted = crud.access_event_data(target_user_id, permission)
+    if existing_access:
+        existing_access.permission = permission
+        await db.flush()
+        await db.run_sync(lambda session: events.publish(session, vehicle_vin, "access.granted", granted))
+        await db.commit()
+        await db.refresh(existing_access)
+        response_cache.bump(target_user_id)
+        return existing_access
+
+    new_access = models.VehicleAccess(
+        vehicle_vin=vehicle_vin,
+        user_id=target_user_id,
+        permission=permission
+    )
+    db.add(new_access)
+    await db.flush()
+    await db.run_sync(lambda session: events.publish(session, vehicle_vin, "access.granted", granted))
+    await db.commit()
+    await db.refresh(new_access)
+    response_cache.bump(target_user_id)
+    return new_access
+
+async def get_vehicle_accesses(db: AsyncSession, vehicle_vin: str):
+    return crud.row_dicts(await db.execute(crud.vehicle_accesses_query(vehicle_vin)))
+
+async def revoke_vehicle_access(db: AsyncSession, vehicle_vin: str, target_user_id: UUID):
+    access = await db.scalar(select(models.VehicleAccess).where(
+        models.VehicleAccess.vehicle_vin == vehicle_vin,
+        models.VehicleAccess.user_id == target_user_id
+    ))
+
+    if access:
+        await db.delete(access)
+        await db.flush()
+        await db.run_sync(lambda session: events.publish(
+            session, vehicle_vin, "access.revoked", crud.access_event_data(target_user_id), also=(target_user_id,)
+        ))
+        await db.commit()
+        response_cache.bump(target_user_id)
+        return True
+    return False
+
+# --- SERVİS GEÇMİŞİ İŞLEMLERİ ---
+
+async def add_service_record(db: AsyncSession, vehicle_vin: str, record: schemas.ServiceRecordCreate):
+    db_record = models.ServiceRecord(
+        vehicle_vin=vehicle_vin,
+        **record.model_dump()
+    )
+    db.add(db_record)
+    await db.flush()
+    await db.run_sync(lambda session: stats.record_added(session, db_record))
+    await db.run_sync(lambda session: events.publish(
+        session, vehicle_vin, "service_record.added", crud.service_record_event_data(db_record)
+    ))
+    await db.commit()
+    crud.records_changed(vehicle_vin)
+    await db.refresh(db_record)
+    return db_record
+
+async def get_service_records(db: AsyncSession, vehicle_vin: str, limit: int = None, cursor: str = None):
+    return (await db.scalars(crud.service_records_query(vehicle_vin, limit=limit, cursor=cursor))).all()
+
+async def delete_service_record(db: AsyncSession, record_id: int, vehicle_vin: str):
+    record = await db.scalar(select(models.ServiceRecord).where(
+        models.ServiceRecord.id == record_id,
+        models.ServiceRecord.vehicle_vin == vehicle_vin
+    ))
+    if record:
+        await db.delete(record)
+        await db.flush()
+        await db.run_sync(lambda session: stats.schedule_refresh(session, [vehicle_vin]))
+        await db.run_sync(lambda session: events.publish(session, vehicle_vin, "service_record.deleted", {"id": record_id}))
+        await db.commit()
+        crud.records_changed(vehicle_vin)
+        return True
+    return False
+
+async def get_shared_vehicles(db: AsyncSession, user_id: UUID):
+    return crud.shared_vehicle_rows(crud.row_dicts(await db.execute(crud.shared_vehicles_query(user_id))))
@@ -0,0 +1,76 @@
+"""get_current_user için süreç içi TTL + LRU kullanıcı cache'i.
+
+Token'daki `uid` ile anahtarlanır; kayıt, token'daki `ver` ile users.token_version
+eşleştiği sürece geçerlidir. Ban / rol değişimi (PUT /users/{id}/ban | role ya da
+`python -m app.admin`) crud.set_user_banned / set_user_role ile sürümü artırıp bu süreçteki
+kaydı düşürür. Diğer worker'lar ve doğrudan DB'de yapılan değişiklikler kayıt en geç
+AUTH_CACHE_TTL saniye sonra DB'den yeniden okunduğunda görülür.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+# Çok worker'lı kurulumda diğer süreçlerdeki kayıtlar (ban / rol) en fazla bu kadar bayat kalır
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", "10"))
+
+@dataclass(frozen=True)
+class CachedUser:
+    id: UUID
+    email: str
+    role: str
+    is_banned: bool
+    token_version: int
+    created_at: datetime
+
+    @classmethod
+    def from_model(cls, user) -> "CachedUser":
+        return cls(
+            id=user.id,
+            email=user.email,
+            role=user.role or "driver",
+            is_banned=bool(user.is_banned),
+            token_version=user.token_version or 0,
+            created_at=user.created_at,
+        )
+
+class UserCache:
+    def __init__(self, maxsize: int = AUTH_CACHE_SIZE, ttl: float = AUTH_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[UUID, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: UUID) -> Optional[CachedUser]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            user, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return user
+
+    def put(self, user: CachedUser):
+        with self._lock:
+            self._entries[user.id] = (user, time.monotonic() + self.ttl)
+            self._entries.move_to_end(user.id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: UUID):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+user_cache = UserCache()
@@ -0,0 +1,198 @@
+"""Toplu işlemler: akış halinde araç içe aktarma ve toplu servis kaydı ekleme.
+
+Araç içe aktarmada gövde (CSV veya NDJSON) satır satır okunur, BULK_CHUNK_SIZE'lık
+parçalar halinde doğrulanır ve crud.bulk_insert_vehicles ile tek seferde yazılır.
+Bellek kullanımı yüklemenin boyutundan bağımsızdır; hatalı satırlar (geçersiz UTF-8 dahil)
+raporlanır, geri kalanı yazılmaya devam eder. CSV'de tırnaklı alanlar satır sonu içerebilir:
+tırnak kapanana kadar sonraki satırlar aynı kayda eklenir.
+"""
+import csv
+import json
+import os
+from typing import AsyncIterator, Optional
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+from app import crud, schemas
+
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "1000"))
+# Rapor sınırsız büyümesin: bu sayıdan sonrası sadece sayılır
+BULK_MAX_ERRORS = int(os.getenv("BULK_MAX_ERRORS", "1000"))
+BULK_MAX_LINE_BYTES = 64 * 1024
+
+CSV_COLUMNS = {"vin", "brand", "model", "year", "mileage", "color"}
+
+def detect_format(content_type: str, fmt: str = None) -> str:
+    if fmt:
+        if fmt not in ("csv", "ndjson"):
+            raise HTTPException(status_code=400, detail="format csv veya ndjson olmalıdır")
+        return fmt
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if content_type in ("text/csv", "application/csv"):
+        return "csv"
+    if content_type in ("application/x-ndjson", "application/ndjson", "application/jsonl", "application/x-jsonlines"):
+        return "ndjson"
+    raise HTTPException(status_code=415, detail="Desteklenmeyen içerik tipi (text/csv veya application/x-ndjson bekleniyor)")
+
+line_too_long = HTTPException(status_code=413, detail="Satır çok uzun")
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Ham satırlar; çözümleme (UTF-8) satır başına iter_records'ta yapılır."""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        if len(buffer) > BULK_MAX_LINE_BYTES:
+            raise line_too_long
+        for line in lines:
+            yield line.rstrip(b"\r")
+    if buffer:
+        yield buffer.rstrip(b"\r")
+
+async def iter_records(lines: AsyncIterator[bytes], fmt: str) -> AsyncIterator[tuple]:
+    """(satır no, dict | hata mesajı) üretir. Boş satırlar atlanır; CSV'de ilk satır başlıktır."""
+    header = None
+    row_number = 0
+    pending = None
+    async for line in lines:
+        if pending is not None:
+            line, pending = pending + b"\n" + line, None
+        # Tek sayıda tırnak: açık bir tırnaklı alan (kaçışlı "" çift sayılır), kayıt devam ediyor
+        if fmt == "csv" and line.count(b'"') % 2:
+            if len(line) > BULK_MAX_LINE_BYTES:
+                raise line_too_long
+            pending = line
+            continue
+        if not line.strip():
+            continue
+        try:
+            line = line.decode("utf-8")
+        except UnicodeDecodeError as exc:
+            if fmt == "csv" and header is None:
+                raise HTTPException(status_code=400, detail="CSV başlığı geçerli UTF-8 değil")
+            row_number += 1
+            yield row_number, f"Geçersiz UTF-8 ({exc.start}. bayt)"
+            continue
+        if fmt == "csv" and header is None:
+            header = [h.strip().lower() for h in next(csv.reader([line]))]
+            unknown = set(header) - CSV_COLUMNS
+            if unknown:
+                raise HTTPException(status_code=400, detail=f"Bilinmeyen CSV kolonları: {', '.join(sorted(unknown))}")
+            continue
+
+        row_number += 1
+        if fmt == "csv":
+            values = next(csv.reader([line]))
+            if len(values) != len(header):
+                yield row_number, f"{len(header)} hücre bekleniyordu, {len(values)} bulundu"
+                continue
+            # Boş hücreler şemadaki varsayılanlara bırakılır (mileage=0, color=None)
+            yield row_number, {k: v for k, v in zip(header, values) if v != ""}
+        else:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as exc:
+                yield row_number, f"Geçersiz JSON: {exc.msg}"
+                continue
+            yield row_number, record if isinstance(record, dict) else "Satır bir JSON nesnesi olmalıdır"
+    if pending is not None:
+        if header is None:
+            raise HTTPException(status_code=400, detail="CSV başlığında kapanmamış tırnak")
+        yield row_number + 1, "Kapanmamış tırnak"
+
+def validation_messages(exc: ValidationError) -> list:
+    return [f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in exc.errors()]
+
+def reported_vin(record: dict) -> Optional[str]:
+    """Hatalı satırın VIN'i; metin değilse (ör. {"vin": 12345}) raporda yer almaz."""
+    vin = record.get("vin")
+    return vin if isinstance(vin, str) else None
+
+class ImportReport:
+    def __init__(self):
+        self.total = 0
+        self.inserted = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_error(self, row: int, vin, messages: list):
+        self.failed += 1
+        if len(self.errors) < BULK_MAX_ERRORS:
+            self.errors.append({"row": row, "vin": vin, "errors": messages})
+
+    def result(self) -> dict:
+        return {
+            "total": self.total,
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+def _flush(db: Session, chunk: list, owner_id, report: ImportReport):
+    rows = [vehicle.model_dump() for _, vehicle in chunk]
+    inserted = crud.bulk_insert_vehicles(db, rows, owner_id)
+    report.inserted += len(inserted)
+    for row_number, vehicle in chunk:
+        if vehicle.vin not in inserted:
+            report.add_error(row_number, vehicle.vin, ["Bu VIN zaten kayıtlı"])
+
+async def import_vehicles(chunks: AsyncIterator[bytes], fmt: str, db: Session, owner_id) -> dict:
+    report = ImportReport()
+    chunk = []
+    seen_in_chunk = set()
+
+    async for row_number, record in iter_records(iter_lines(chunks), fmt):
+        report.total += 1
+        if isinstance(record, str):
+            report.add_error(row_number, None, [record])
+            continue
+        try:
+            vehicle = schemas.VehicleCreate.model_validate(record)
+        except ValidationError as exc:
+            report.add_error(row_number, reported_vin(record), validation_messages(exc))
+            continue
+        if vehicle.vin in seen_in_chunk:
+            report.add_error(row_number, vehicle.vin, ["VIN yükleme içinde tekrar ediyor"])
+            continue
+
+        chunk.append((row_number, vehicle))
+        seen_in_chunk.add(vehicle.vin)
+        if len(chunk) >= BULK_CHUNK_SIZE:
+            await run_in_threadpool(_flush, db, chunk, owner_id, report)
+            chunk, seen_in_chunk = [], set()
+
+    if chunk:
+        await run_in_threadpool(_flush, db, chunk, owner_id, report)
+    return report.result()
+
+# --- TOPLU SERVİS KAYDI ---
+
+SERVICE_RECORD_WRITE_ROLES = ("owner", "editor", "driver")
+
+def add_service_records_batch(db: Session, records: list, user_id) -> dict:
+    """Birden çok VIN'e ait kayıtları ekler: yetki tek sorguda, INSERT tek transaction'da."""
+    report = ImportReport()
+    report.total = len(records)
+    valid = []
+    for row_number, raw in enumerate(records, start=1):
+        try:
+            valid.append((row_number, schemas.ServiceRecordBatchItem.model_validate(raw)))
+        except ValidationError as exc:
+            report.add_error(row_number, reported_vin(raw), validation_messages(exc))
+
+    roles = crud.get_vehicle_roles(db, list({item.vin for _, item in valid}), user_id) if valid else {}
+    rows, positions = [], []
+    for row_number, item in valid:
+        if roles.get(item.vin) not in SERVICE_RECORD_WRITE_ROLES:
+            report.add_error(row_number, item.vin, ["Araç bulunamadı veya bu araca servis kaydı ekleme yetkiniz yok."])
+            continue
+        rows.append({"vehicle_vin": item.vin, **item.model_dump(exclude={"vin"})})
+        positions.append((row_number, item.vin))
+
+    ids = crud.bulk_add_service_records(db, rows)
+    report.inserted = len(ids)
+    result = report.result()
+    result["created"] = [{"row": row, "id": record_id, "vin": vin} for (row, vin), record_id in zip(positions, ids)]
+    return result
@@ -0,0 +1,247 @@
+"""Okuma ağırlıklı endpoint'ler için kullanıcı başına yanıt cache'i + ETag / koşullu GET.
+
+Her kullanıcının bir nesil (generation) sayacı vardır; cache anahtarı bu sayacı içerir.
+Araç oluşturma / güncelleme / silme, paylaşım ve yetki kaldırma etkilenen kullanıcıların
+sayacını artırır (bkz. crud), eski kayıtlar böylece kendiliğinden erişilmez olur ve LRU ile düşer.
+
+Cache isabetinde yanıt, sorgu ve Pydantic serileştirmesi yapılmadan saklanan byte'lardan döner;
+If-None-Match eşleşirse gövdesiz 304 döner. ETag gövdenin hash'idir (strong), bu yüzden
+süreç yeniden başlasa da aynı içerik aynı ETag'i üretir.
+
+Read replica: sayaç artışının zamanı da tutulur (incremented_at). Nesil değiştikten sonraki
+REPLICA_STICKY_SECONDS içinde replica'dan okunan yanıt döner ama cache'e yazılmaz; aksi halde
+başka worker'daki gecikmeli replica okuması yeni nesil altında TTL boyunca kalırdı.
+
+Backend: "memory" (süreç içi LRU), "none" (sadece ETag) ya da `paket.modul:fabrika` yolu;
+fabrika get / set / counter / incr / incremented_at / clear metotları olan bir nesne
+döndürmelidir. set sadece CachedResponse alır; sayaçlar yanıtlardan ayrı tutulur.
+"""
+import hashlib
+import importlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Awaitable, Callable, Optional
+from uuid import UUID
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+from app import serialization
+from app.database import REPLICA_STICKY_SECONDS, ReplicaReads, current_replica_reads
+
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory")
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "10000"))
+# Memory backend süreç içidir: çok worker'lı kurulumda başka süreçteki yazma en fazla bu kadar görünmez kalır
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "30"))
+# Nesil sayacı tutulan en fazla kullanıcı (yanıtlardan ayrı LRU)
+RESPONSE_CACHE_USERS = int(os.getenv("RESPONSE_CACHE_USERS", "100000"))
+
+CACHE_CONTROL = "private, no-cache"
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: bytes
+    etag: str
+    headers: dict = field(default_factory=dict)
+
+class Generations:
+    """Sınırlı nesil sayaçları: anahtar -> (nesil, son artış zamanı); LRU.
+
+    Nesiller süreç genelinde tek bir sıradan verilir. LRU'dan düşen sayaç tekrar istendiğinde
+    0'a değil yeni bir değere başlar, böylece eski nesil altındaki bir yanıt tekrar görünür olmaz.
+    """
+    def __init__(self, maxsize: int = RESPONSE_CACHE_USERS):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._sequence = 0
+
+    def _put(self, key: str, incremented_at: Optional[float]) -> int:
+        self._sequence += 1
+        self._entries[key] = (self._sequence, incremented_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return self._sequence
+
+    def get(self, key: str) -> int:
+        entry = self._entries.get(key)
+        if entry is None:
+            return self._put(key, None)
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def incr(self, key: str) -> int:
+        return self._put(key, time.time())
+
+    def incremented_at(self, key: str) -> Optional[float]:
+        entry = self._entries.get(key)
+        return entry[1] if entry else None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self):
+        self._entries.clear()
+
+class MemoryBackend:
+    def __init__(self, maxsize: int = RESPONSE_CACHE_SIZE, ttl: float = RESPONSE_CACHE_TTL,
+                 max_users: int = RESPONSE_CACHE_USERS):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        # Sayaçlar yanıtlarla aynı LRU'da değil: bump'lar yanıtları dışarı itmesin
+        self._generations = Generations(max_users)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: CachedResponse):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def counter(self, key: str) -> int:
+        with self._lock:
+            return self._generations.get(key)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            return self._generations.incr(key)
+
+    def incremented_at(self, key: str) -> Optional[float]:
+        with self._lock:
+            return self._generations.incremented_at(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+
+class NullBackend:
+    """Cache kapalı: her istek yeniden hesaplanır, ETag / 304 yine çalışır."""
+    def get(self, key: str) -> Optional[CachedResponse]:
+        return None
+
+    def set(self, key: str, value: CachedResponse):
+        pass
+
+    def counter(self, key: str) -> int:
+        return 0
+
+    def incr(self, key: str) -> int:
+        return 0
+
+    def incremented_at(self, key: str) -> Optional[float]:
+        return None
+
+    def clear(self):
+        pass
+
+def load_backend(spec: str):
+    if spec == "memory":
+        return MemoryBackend()
+    if spec in ("none", "off", ""):
+        return NullBackend()
+    module_name, _, attr = spec.partition(":")
+    return getattr(importlib.import_module(module_name), attr)()
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # If-None-Match zayıf karşılaştırma kullanır (RFC 9110 13.1.2)
+    return "*" in candidates or etag in (tag.removeprefix("W/") for tag in candidates)
+
+@lru_cache(maxsize=None)
+def _adapter(model) -> TypeAdapter:
+    return TypeAdapter(model)
+
+def serialize(content, model=None) -> bytes:
+    """model verilirse ORM nesneleri modele doğrulanıp yazılır; yoksa düz satırlar hızlı yoldan."""
+    if model is None:
+        return serialization.dumps(content)
+    adapter = _adapter(model)
+    return adapter.dump_json(adapter.validate_python(content, from_attributes=True))
+
+class ResponseCache:
+    def __init__(self, backend):
+        self.backend = backend
+
+    def generation(self, user_id: UUID) -> int:
+        return self.backend.counter(f"gen:{user_id}")
+
+    def bump(self, *user_ids: UUID):
+        for user_id in set(user_ids):
+            self.backend.incr(f"gen:{user_id}")
+
+    def _bumped_recently(self, user_id: UUID) -> bool:
+        bumped_at = self.backend.incremented_at(f"gen:{user_id}")
+        return bumped_at is not None and time.time() - bumped_at < REPLICA_STICKY_SECONDS
+
+    def key(self, user_id: UUID, request: Request) -> str:
+        return f"resp:{user_id}:{self.generation(user_id)}:{request.url.path}?{request.url.query}"
+
+    def _store(self, key: str, user_id: UUID, loaded: tuple, reads: ReplicaReads, model) -> CachedResponse:
+        content, headers = loaded
+        body = serialize(content, model)
+        entry = CachedResponse(body=body, etag=make_etag(body), headers=headers or {})
+        # Replica yazmanın gerisinde olabilir: yeni nesil hemen replica okumasıyla doldurulmaz
+        if not (reads.used and self._bumped_recently(user_id)):
+            self.backend.set(key, entry)
+        return entry
+
+    @staticmethod
+    def _response(request: Request, entry: CachedResponse) -> Response:
+        headers = {**entry.headers, "ETag": entry.etag, "Cache-Control": CACHE_CONTROL, "Vary": "Authorization"}
+        if etag_matches(request.headers.get("if-none-match"), entry.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry.body, media_type="application/json", headers=headers)
+
+    def respond(self, request: Request, user_id: UUID, load: Callable[[], tuple], model=None) -> Response:
+        """load() → (içerik, ek header'lar); sadece cache ıskalandığında çağrılır."""
+        key = self.key(user_id, request)
+        entry = self.backend.get(key)
+        if entry is None:
+            reads = ReplicaReads()
+            token = current_replica_reads.set(reads)
+            try:
+                loaded = load()
+            finally:
+                current_replica_reads.reset(token)
+            entry = self._store(key, user_id, loaded, reads, model)
+        return self._response(request, entry)
+
+    async def respond_async(self, request: Request, user_id: UUID, load: Callable[[], Awaitable[tuple]], model=None) -> Response:
+        key = self.key(user_id, request)
+        entry = self.backend.get(key)
+        if entry is None:
+            reads = ReplicaReads()
+            token = current_replica_reads.set(reads)
+            try:
+                loaded = await load()
+            finally:
+                current_replica_reads.reset(token)
+            entry = self._store(key, user_id, loaded, reads, model)
+        return self._response(request, entry)
+
+    def clear(self):
+        self.backend.clear()
+
+response_cache = ResponseCache(load_backend(RESPONSE_CACHE_BACKEND))
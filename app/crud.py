@@ -1,17 +1,27 @@
+import csv
+import io
 from sqlalchemy.orm import Session
-from . import models, schemas, utils
+from sqlalchemy.dialects import postgresql, sqlite
+from . import models, schemas, utils, stats, search, events, maintenance
+from .auth_cache import user_cache
+from .cache import response_cache
+from .database import PRIMARY
 from uuid import UUID
-from sqlalchemy import desc
+from sqlalchemy import Integer, and_, case, cast, desc, func, insert, null, or_, select, tuple_, union, union_all
+from datetime import datetime, timezone
+from .pagination import decode_cursor
 
 def get_user_by_email(db: Session, email: str):
     return db.query(models.User).filter(models.User.email == email).first()
 
-def create_user(db: Session, user: schemas.UserCreate):
-    hashed_pwd = utils.hash_password(user.password)
-    
+def get_user(db: Session, user_id: UUID):
+    return db.get(models.User, user_id)
+
+def create_user(db: Session, user: schemas.UserCreate, hashed_password: str):
+    # Hash, request thread'i dışında (app.hashing) hesaplanıp verilir
     db_user = models.User(
         email=user.email, 
-        hashed_password=hashed_pwd
+        hashed_password=hashed_password
     )
     
     db.add(db_user)
@@ -25,30 +35,283 @@ def create_vehicle(db: Session, vehicle: schemas.VehicleCreate, user_id: UUID):
     db.add(db_vehicle)
     db.commit()
     db.refresh(db_vehicle)
+    response_cache.bump(user_id)
     return db_vehicle
 
-def get_user_vehicles(
-    db: Session, 
+# --- TOPLU İÇE AKTARMA ---
+
+BULK_VEHICLE_COLUMNS = ["vin", "brand", "model", "year", "mileage", "color", "owner_id", "is_deleted"]
+
+def _copy_insert_vehicles(db: Session, rows: list) -> set:
+    # PostgreSQL + psycopg2: COPY ile geçici tabloya, oradan ON CONFLICT DO NOTHING ile vehicles'a
+    cols = ", ".join(BULK_VEHICLE_COLUMNS)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([row[c] for c in BULK_VEHICLE_COLUMNS])
+    buffer.seek(0)
+
+    conn = db.connection()
+    conn.exec_driver_sql(
+        "CREATE TEMP TABLE IF NOT EXISTS vehicle_import "
+        "(LIKE vehicles INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+    )
+    cursor = conn.connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY vehicle_import ({cols}) FROM STDIN WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+    result = conn.exec_driver_sql(
+        f"INSERT INTO vehicles ({cols}) SELECT {cols} FROM vehicle_import "
+        "ON CONFLICT (vin) DO NOTHING RETURNING vin"
+    )
+    return {vin for (vin,) in result}
+
+def bulk_insert_vehicles(db: Session, rows: list, owner_id: UUID) -> set:
+    """Satırları tek seferde ekler, VIN'i zaten kayıtlı olanları atlar; eklenen VIN'leri döner."""
+    if not rows:
+        return set()
+    for row in rows:
+        row.update(owner_id=owner_id, is_deleted=False)
+
+    dialect = db.get_bind().dialect
+    if dialect.name == "postgresql" and dialect.driver == "psycopg2":
+        inserted = _copy_insert_vehicles(db, rows)
+    else:
+        # Çok satırlı INSERT ... ON CONFLICT DO NOTHING RETURNING (insertmanyvalues)
+        dialect_insert = postgresql.insert if dialect.name == "postgresql" else sqlite.insert
+        stmt = (
+            dialect_insert(models.Vehicle.__table__)
+            .on_conflict_do_nothing(index_elements=["vin"])
+            .returning(models.Vehicle.vin)
+        )
+        inserted = set(db.execute(stmt, rows).scalars())
+    db.commit()
+    if inserted:
+        response_cache.bump(owner_id)
+    return inserted
+
+# Sorgu kurucular: senkron (crud) ve async (async_crud) tarafı aynı SELECT'i kullanır
+
+# Sütun projeksiyonu: liste endpoint'leri ORM nesnesi yerine schemas.VehicleOut sırasıyla
+# düz satır alır ve bunları serialization.dumps ile doğrudan JSON'a yazar.
+VEHICLE_OUT_COLUMNS = (
+    models.Vehicle.vin,
+    models.Vehicle.brand,
+    models.Vehicle.model,
+    models.Vehicle.year,
+    models.Vehicle.mileage,
+    models.Vehicle.color,
+    models.Vehicle.owner_id,
+    models.Vehicle.created_at,
+)
+
+def row_dicts(result) -> list:
+    return [dict(row) for row in result.mappings()]
+
+def epoch_seconds(db: Session, column):
+    """Zaman damgası kolonunu Unix saniyesine çeviren SQL ifadesi (PostgreSQL / SQLite)."""
+    if db.get_bind().dialect.name == "postgresql":
+        return cast(func.floor(func.extract("epoch", column)), Integer)
+    return cast(func.strftime("%s", column), Integer)
+
+def user_vehicles_query(
     user_id: UUID, 
     skip: int = 0, 
     limit: int = 20, 
     brand: str = None, 
-    sort: str = "-year"
+    sort: str = "-year",
+    cursor: str = None,
+    columns: tuple = None
 ):
-    query = db.query(models.Vehicle).filter(
+    """columns verilirse Vehicle yerine bu sütunlar seçilir (filtre ve sıralama aynı)."""
+    query = select(*columns) if columns else select(models.Vehicle)
+    query = query.where(
         models.Vehicle.owner_id == user_id,
         models.Vehicle.is_deleted == False
     )
     
     if brand:
-        query = query.filter(models.Vehicle.brand.ilike(f"%{brand}%"))
-        
-    if sort == "-year":
-        query = query.order_by(desc(models.Vehicle.year))
-    elif sort == "year":
-        query = query.order_by(models.Vehicle.year)
+        query = query.where(models.Vehicle.brand.ilike(f"%{brand}%"))
+
+    # Keyset sayfalama: (year, vin); vin aynı yıldaki araçların sırasını sabitler.
+    # Cursor verilince skip yok sayılır.
+    ascending = sort == "year"
+    if cursor:
+        after = decode_cursor(cursor, int, str)
+        key = tuple_(models.Vehicle.year, models.Vehicle.vin)
+        query = query.where(key > after if ascending else key < after)
+        skip = 0
+
+    if ascending:
+        query = query.order_by(models.Vehicle.year, models.Vehicle.vin)
+    elif sort == "-year" or cursor:
+        query = query.order_by(desc(models.Vehicle.year), desc(models.Vehicle.vin))
+
+    return query.offset(skip).limit(limit)
+
+# my-vehicles satırları VehicleOut'un boş alanlarını da taşır
+VEHICLE_ROW_COLUMNS = (*VEHICLE_OUT_COLUMNS, null().label("owner_email"), null().label("permission"))
+
+# --- FİLO YETKİLERİ ---
+# Kullanıcı, üyesi olduğu organizasyonlara verilmiş filolardaki (FleetGrant) araçlara erişir.
+# Doğrudan paylaşım ve filo yetkisi birlikte varsa yüksek olan geçerlidir.
+
+PERMISSION_RANK = {"viewer": 1, "driver": 2, "editor": 3}
+RANK_PERMISSION = {rank: permission for permission, rank in PERMISSION_RANK.items()}
+
+def best_permission(*permissions):
+    return max((p for p in permissions if p), key=PERMISSION_RANK.__getitem__, default=None)
+
+def fleet_rank_subquery(user_id: UUID):
+    """Vehicle satırına bağlı (correlated) skaler alt sorgu: kullanıcının aracın filosundaki en
+    yüksek yetki derecesi ya da NULL. fleet_grants PK'si ve organization_members PK'si ile iki
+    indeks araması."""
+    g, m = models.FleetGrant, models.OrganizationMember
+    return (
+        select(func.max(case(PERMISSION_RANK, value=g.permission)))
+        .join(m, and_(m.organization_id == g.organization_id, m.user_id == user_id))
+        .where(g.fleet_id == models.Vehicle.fleet_id)
+        .scalar_subquery()
+    )
+
+def fleet_vehicles_select(user_id: UUID, *columns):
+    """Kullanıcının organizasyonları → filo yetkileri → filodaki araçlar (FleetGrant.permission ile)."""
+    g, m = models.FleetGrant, models.OrganizationMember
+    return (
+        select(*columns)
+        .select_from(m)
+        .join(g, g.organization_id == m.organization_id)
+        .join(models.Vehicle, models.Vehicle.fleet_id == g.fleet_id)
+        .where(m.user_id == user_id)
+    )
+
+def fleet_audience_query(fleet_ids):
+    """Filolara yetkili organizasyonların üyeleri (fleet_ids: liste ya da select)."""
+    g, m = models.FleetGrant, models.OrganizationMember
+    return select(m.user_id).join(g, g.organization_id == m.organization_id).where(g.fleet_id.in_(fleet_ids))
+
+def shared_vehicles_query(user_id: UUID):
+    # Doğrudan paylaşılanlar + filo üzerinden erişilenler; aynı araç iki yoldan da gelebilir
+    # (bkz. shared_vehicle_rows). UNION ALL: tekilleştirme SQL'de sıralama gerektirirdi.
+    direct = (
+        select(
+            *VEHICLE_OUT_COLUMNS,
+            models.VehicleAccess.permission,
+            models.User.email.label("owner_email")
+        )
+        .join(models.VehicleAccess, models.VehicleAccess.vehicle_vin == models.Vehicle.vin)
+        .join(models.User, models.User.id == models.Vehicle.owner_id)  # ✅ owner join
+        .where(models.VehicleAccess.user_id == user_id)
+        .where(models.Vehicle.is_deleted == False)
+    )
+    via_fleet = (
+        fleet_vehicles_select(
+            user_id, *VEHICLE_OUT_COLUMNS, models.FleetGrant.permission, models.User.email.label("owner_email")
+        )
+        .join(models.User, models.User.id == models.Vehicle.owner_id)
+        .where(models.Vehicle.is_deleted == False, models.Vehicle.owner_id != user_id)
+    )
+    return union_all(direct, via_fleet)
+
+def shared_vehicle_rows(rows: list) -> list:
+    """Araç başına tek satır, en yüksek yetkiyle."""
+    merged = {}
+    for row in rows:
+        current = merged.get(row["vin"])
+        if current is None or PERMISSION_RANK[row["permission"]] > PERMISSION_RANK[current["permission"]]:
+            merged[row["vin"]] = row
+    return list(merged.values())
+
+def vehicle_audience_query(vehicle_vin: str):
+    """Aracı listelerinde gören kullanıcılar (sahip + paylaşılanlar + filo üyeleri): yanıt cache'i bunlar için düşer."""
+    return union(
+        select(models.Vehicle.owner_id).where(models.Vehicle.vin == vehicle_vin),
+        select(models.VehicleAccess.user_id).where(models.VehicleAccess.vehicle_vin == vehicle_vin),
+        fleet_audience_query(select(models.Vehicle.fleet_id).where(models.Vehicle.vin == vehicle_vin)),
+    )
+
+def service_records_query(vehicle_vin: str, limit: int = None, cursor: str = None):
+    # Bir aracın servis geçmişini tarihe göre yeniden eskiye (desc) sıralayarak getir
+    query = select(models.ServiceRecord).where(
+        models.ServiceRecord.vehicle_vin == vehicle_vin
+    )
+    if cursor:
+        after = decode_cursor(cursor, datetime, int)
+        query = query.where(tuple_(models.ServiceRecord.date, models.ServiceRecord.id) < after)
+
+    query = query.order_by(models.ServiceRecord.date.desc(), models.ServiceRecord.id.desc())
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+def _vehicle_role_select(user_id: UUID):
+    # Araç + (varsa) kullanıcının VehicleAccess yetkisi ve filo yetki derecesi; sahip ya da
+    # yetkili değilse satır gelmez
+    fleet_rank = fleet_rank_subquery(user_id)
+    return (
+        select(models.Vehicle, models.VehicleAccess.permission, fleet_rank.label("fleet_rank"))
+        .outerjoin(models.VehicleAccess, and_(
+            models.VehicleAccess.vehicle_vin == models.Vehicle.vin,
+            models.VehicleAccess.user_id == user_id
+        ))
+        .where(
+            models.Vehicle.is_deleted == False,
+            or_(models.Vehicle.owner_id == user_id, models.VehicleAccess.id.isnot(None), fleet_rank.isnot(None))
+        )
+    )
+
+def vehicle_role_query(vehicle_vin: str, user_id: UUID):
+    return _vehicle_role_select(user_id).where(models.Vehicle.vin == vehicle_vin)
 
-    return query.offset(skip).limit(limit).all()
+def vehicle_roles_query(vehicle_vins: list, user_id: UUID):
+    # Toplu işlemler: birden çok VIN'in yetkisi tek sorguda
+    return _vehicle_role_select(user_id).where(models.Vehicle.vin.in_(vehicle_vins))
+
+def vehicle_role(row, user_id: UUID):
+    """vehicle_role_query satırından (vehicle, rol) üretir; rol 'owner' ya da en yüksek yetkidir."""
+    if row is None:
+        return None, None
+    vehicle, permission, fleet_rank = row
+    if vehicle.owner_id == user_id:
+        return vehicle, "owner"
+    return vehicle, best_permission(permission, RANK_PERMISSION.get(fleet_rank))
+
+def get_user_vehicles(
+    db: Session, 
+    user_id: UUID, 
+    skip: int = 0, 
+    limit: int = 20, 
+    brand: str = None, 
+    sort: str = "-year",
+    cursor: str = None
+):
+    query = user_vehicles_query(user_id, skip=skip, limit=limit, brand=brand, sort=sort, cursor=cursor)
+    return db.scalars(query).all()
+
+def get_user_vehicle_rows(
+    db: Session,
+    user_id: UUID,
+    skip: int = 0,
+    limit: int = 20,
+    brand: str = None,
+    sort: str = "-year",
+    cursor: str = None
+) -> list:
+    """get_user_vehicles'ın ORM'siz hali: VehicleOut alanlarıyla dict listesi."""
+    query = user_vehicles_query(
+        user_id, skip=skip, limit=limit, brand=brand, sort=sort, cursor=cursor, columns=VEHICLE_ROW_COLUMNS
+    )
+    return row_dicts(db.execute(query))
+
+def get_vehicle_role(db: Session, vehicle_vin: str, user_id: UUID):
+    # Yetki kararı replica gecikmesinden etkilenmesin
+    return vehicle_role(db.execute(vehicle_role_query(vehicle_vin, user_id), bind_arguments=PRIMARY).first(), user_id)
+
+def get_vehicle_roles(db: Session, vehicle_vins: list, user_id: UUID) -> dict:
+    """{vin: rol}; erişilemeyen VIN'ler sözlükte yer almaz."""
+    rows = db.execute(vehicle_roles_query(vehicle_vins, user_id)).all()
+    return {vehicle.vin: role for vehicle, role in (vehicle_role(row, user_id) for row in rows)}
 
 def delete_vehicle(db: Session, vehicle_vin: str, user_id: UUID):
     db_vehicle = db.query(models.Vehicle).filter(
@@ -57,8 +320,14 @@ def delete_vehicle(db: Session, vehicle_vin: str, user_id: UUID):
     ).first()
     
     if db_vehicle:
-        db_vehicle.is_deleted = True 
+        if not db_vehicle.is_deleted:
+            # Arşivleme bekleme süresi ilk silmeden başlar (app.archive)
+            db_vehicle.deleted_at = datetime.now(timezone.utc)
+        db_vehicle.is_deleted = True
+        audience = list(db.scalars(vehicle_audience_query(vehicle_vin)))
+        events.publish(db, vehicle_vin, "vehicle.deleted", recipients=audience)
         db.commit()
+        response_cache.bump(*audience)
         return True
         
     return False
@@ -74,11 +343,38 @@ def update_vehicle(db: Session, vehicle_vin: str, user_id: UUID, update_data: sc
         for field, value in update_dict.items():
             if value is not None:
                 setattr(db_vehicle, field, value)
+        audience = list(db.scalars(vehicle_audience_query(vehicle_vin)))
+        changes = {field: value for field, value in update_dict.items() if value is not None}
+        events.publish(db, vehicle_vin, "vehicle.updated", {"changes": changes}, recipients=audience)
         db.commit()
         db.refresh(db_vehicle)
+        response_cache.bump(*audience)
         return db_vehicle
     return None
 
+def update_password_hash(db: Session, user: models.User, hashed_password: str):
+    user.hashed_password = hashed_password
+    db.commit()
+    return user
+
+# Ban / rol değişimi token_version'ı artırır: eski token'lar ve auth cache kaydı geçersizleşir
+
+def set_user_banned(db: Session, user: models.User, is_banned: bool):
+    user.is_banned = is_banned
+    user.token_version = (user.token_version or 0) + 1
+    db.commit()
+    user_cache.invalidate(user.id)
+    response_cache.bump(user.id)
+    return user
+
+def set_user_role(db: Session, user: models.User, role: str):
+    user.role = role
+    user.token_version = (user.token_version or 0) + 1
+    db.commit()
+    user_cache.invalidate(user.id)
+    response_cache.bump(user.id)
+    return user
+
 def authenticate_user(db: Session, email: str, password: str):
     user = get_user_by_email(db, email=email)
     if not user:
@@ -97,8 +393,11 @@ def share_vehicle(db: Session, vehicle_vin: str, target_user_id: UUID, permissio
 
     if existing_access:
         existing_access.permission = permission 
+        db.flush()
+        events.publish(db, vehicle_vin, "access.granted", access_event_data(target_user_id, permission))
         db.commit()
         db.refresh(existing_access)
+        response_cache.bump(target_user_id)
         return existing_access
 
     new_access = models.VehicleAccess(
@@ -107,28 +406,34 @@ def share_vehicle(db: Session, vehicle_vin: str, target_user_id: UUID, permissio
         permission=permission
     )
     db.add(new_access)
+    db.flush()
+    events.publish(db, vehicle_vin, "access.granted", access_event_data(target_user_id, permission))
     db.commit()
     db.refresh(new_access)
+    response_cache.bump(target_user_id)
     return new_access
 
-def get_vehicle_accesses(db: Session, vehicle_vin: str):
-    rows = (
-        db.query(models.VehicleAccess, models.User.email)
+def access_event_data(user_id: UUID, permission: str = None) -> dict:
+    data = {"user_id": str(user_id)}
+    if permission:
+        data["permission"] = permission
+    return data
+
+def vehicle_accesses_query(vehicle_vin: str):
+    return (
+        select(
+            models.VehicleAccess.id,
+            models.VehicleAccess.vehicle_vin,
+            models.VehicleAccess.user_id,
+            models.User.email,
+            models.VehicleAccess.permission,
+        )
         .join(models.User, models.User.id == models.VehicleAccess.user_id)
-        .filter(models.VehicleAccess.vehicle_vin == vehicle_vin)
-        .all()
+        .where(models.VehicleAccess.vehicle_vin == vehicle_vin)
     )
 
-    return [
-        {
-            "id": access.id,
-            "vehicle_vin": access.vehicle_vin,
-            "user_id": access.user_id,
-            "email": email,
-            "permission": access.permission,
-        }
-        for (access, email) in rows
-    ]
+def get_vehicle_accesses(db: Session, vehicle_vin: str):
+    return row_dicts(db.execute(vehicle_accesses_query(vehicle_vin)))
 
 def revoke_vehicle_access(db: Session, vehicle_vin: str, target_user_id: UUID):
     access = db.query(models.VehicleAccess).filter(
@@ -138,12 +443,31 @@ def revoke_vehicle_access(db: Session, vehicle_vin: str, target_user_id: UUID):
     
     if access:
         db.delete(access)
+        db.flush()
+        # Yetkisi kaldırılan kullanıcı artık kitlede değil; olayı yine de alır
+        events.publish(db, vehicle_vin, "access.revoked", access_event_data(target_user_id), also=(target_user_id,))
         db.commit()
+        response_cache.bump(target_user_id)
         return True
     return False
 
 # --- SERVİS GEÇMİŞİ İŞLEMLERİ ---
 
+def service_record_event_data(record: models.ServiceRecord) -> dict:
+    # date sunucu varsayılanı: flush sonrası okumak ek bir SELECT demek, olayda yer almaz
+    return {
+        "id": record.id,
+        "description": record.description,
+        "mileage": record.mileage,
+        "cost": record.cost,
+        "service_name": record.service_name,
+    }
+
+def records_changed(*vins: str):
+    """Servis kaydı eklendi / silindi (commit sonrası): kayıtlardan türetilen süreç içi cache'ler düşer."""
+    search.records_changed(*vins)
+    maintenance.records_changed(*vins)
+
 def add_service_record(db: Session, vehicle_vin: str, record: schemas.ServiceRecordCreate):
     # Yeni bir servis kaydı oluştur
     db_record = models.ServiceRecord(
@@ -151,15 +475,36 @@ def add_service_record(db: Session, vehicle_vin: str, record: schemas.ServiceRec
         **record.model_dump()
     )
     db.add(db_record)
+    db.flush()
+    stats.record_added(db, db_record)
+    events.publish(db, vehicle_vin, "service_record.added", service_record_event_data(db_record))
     db.commit()
+    records_changed(vehicle_vin)
     db.refresh(db_record)
     return db_record
 
-def get_service_records(db: Session, vehicle_vin: str):
-    # Bir aracın tüm servis geçmişini tarihe göre yeniden eskiye (desc) sıralayarak getir
-    return db.query(models.ServiceRecord).filter(
-        models.ServiceRecord.vehicle_vin == vehicle_vin
-    ).order_by(models.ServiceRecord.date.desc()).all()
+def bulk_add_service_records(db: Session, rows: list) -> list:
+    """Tüm kayıtları tek transaction'da, tek çok satırlı INSERT ... RETURNING ile ekler; id'leri sırayla döner."""
+    if not rows:
+        return []
+    stmt = insert(models.ServiceRecord.__table__).returning(
+        models.ServiceRecord.id, sort_by_parameter_order=True
+    )
+    ids = list(db.execute(stmt, rows).scalars())
+    vins = list({row["vehicle_vin"] for row in rows})
+    stats.schedule_refresh(db, vins)
+    if events.active():
+        ids_by_vin = {}
+        for row, record_id in zip(rows, ids):
+            ids_by_vin.setdefault(row["vehicle_vin"], []).append(record_id)
+        for vin, audience in events.audiences(db, vins).items():
+            events.publish(db, vin, "service_records.imported", {"ids": ids_by_vin[vin]}, recipients=audience)
+    db.commit()
+    records_changed(*vins)
+    return ids
+
+def get_service_records(db: Session, vehicle_vin: str, limit: int = None, cursor: str = None):
+    return db.scalars(service_records_query(vehicle_vin, limit=limit, cursor=cursor)).all()
 
 def delete_service_record(db: Session, record_id: int, vehicle_vin: str):
     record = db.query(models.ServiceRecord).filter(
@@ -168,36 +513,13 @@ def delete_service_record(db: Session, record_id: int, vehicle_vin: str):
     ).first()
     if record:
         db.delete(record)
+        db.flush()
+        stats.schedule_refresh(db, [vehicle_vin])
+        events.publish(db, vehicle_vin, "service_record.deleted", {"id": record_id})
         db.commit()
+        records_changed(vehicle_vin)
         return True
     return False
 
 def get_shared_vehicles(db: Session, user_id: UUID):
-    rows = (
-        db.query(
-            models.Vehicle,
-            models.VehicleAccess.permission,
-            models.User.email.label("owner_email")
-        )
-        .join(models.VehicleAccess, models.VehicleAccess.vehicle_vin == models.Vehicle.vin)
-        .join(models.User, models.User.id == models.Vehicle.owner_id)  # ✅ owner join
-        .filter(models.VehicleAccess.user_id == user_id)
-        .filter(models.Vehicle.is_deleted == False)
-        .all()
-    )
-
-    return [
-        {
-            "vin": v.vin,
-            "brand": v.brand,
-            "model": v.model,
-            "year": v.year,
-            "mileage": v.mileage,
-            "color": v.color,
-            "owner_id": v.owner_id,
-            "created_at": v.created_at,
-            "permission": perm,
-            "owner_email": owner_email,
-        }
-        for (v, perm, owner_email) in rows
-    ]
\ No newline at end of file
+    return shared_vehicle_rows(row_dicts(db.execute(shared_vehicles_query(user_id))))
@@ -1,16 +1,223 @@
+import hashlib
+import hmac
 import os
-from sqlalchemy import create_engine
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import NullPool
 from dotenv import load_dotenv
+from app.metrics import TimedAsyncQueuePool, TimedQueuePool
+from app.utils import SECRET_KEY
 
 load_dotenv()
 
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+def _flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# DB_ASYNC=true → AsyncEngine + async endpoint'ler (bkz. main.create_app)
+DB_ASYNC = _flag("DB_ASYNC", "false")
+
+# --- BAĞLANTI HAVUZU ---
+# Havuz worker süreci başınadır. DB_MAX_CONNECTIONS verilirse (tüm worker'lar için toplam bütçe)
+# ve DB_POOL_SIZE verilmemişse bütçe WEB_CONCURRENCY'ye bölünür: 2/3'ü kalıcı, kalanı overflow.
+WEB_CONCURRENCY = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+DB_MAX_CONNECTIONS = os.getenv("DB_MAX_CONNECTIONS")
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = _flag("DB_POOL_PRE_PING", "true")
+# PgBouncer transaction pooling: havuzu PgBouncer tutar, burada NullPool + prepared statement yok
+DB_PGBOUNCER = _flag("DB_PGBOUNCER", "false")
+
+def pool_sizes() -> tuple:
+    """(pool_size, max_overflow) — env'den ya da worker başına bölünmüş bağlantı bütçesinden."""
+    if os.getenv("DB_POOL_SIZE") is None and DB_MAX_CONNECTIONS:
+        per_worker = max(1, int(DB_MAX_CONNECTIONS) // WEB_CONCURRENCY)
+        pool_size = max(1, per_worker * 2 // 3)
+        return pool_size, per_worker - pool_size
+    return int(os.getenv("DB_POOL_SIZE", "5")), int(os.getenv("DB_MAX_OVERFLOW", "10"))
+
+def engine_options(url: str, is_async: bool = False) -> dict:
+    """create_engine / create_async_engine için havuz ayarları."""
+    if url.startswith("sqlite"):
+        # SQLite havuzları (SingletonThreadPool / QueuePool) varsayılanlarında kalır
+        return {"pool_pre_ping": DB_POOL_PRE_PING}
+    if DB_PGBOUNCER:
+        options = {"poolclass": NullPool}
+        if is_async:
+            # asyncpg varsayılan olarak prepared statement cache'ler; transaction pooling'de
+            # sonraki sorgu başka bir sunucu bağlantısına düşebileceği için kapatılır
+            options["connect_args"] = {"statement_cache_size": 0, "prepared_statement_cache_size": 0}
+        return options
+    pool_size, max_overflow = pool_sizes()
+    return {
+        "poolclass": TimedAsyncQueuePool if is_async else TimedQueuePool,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **engine_options(SQLALCHEMY_DATABASE_URL))
+
+# --- READ REPLICA ---
+# DATABASE_REPLICA_URL verilirse salt okunur handler'lar (get_read_db) replica'ya gider.
+# Yazan kullanıcının okumaları REPLICA_STICKY_SECONDS boyunca primary'de kalır (read-your-writes):
+# aynı worker'da recent_writers ile, diğer worker'larda yanıta eklenen imzalı son yazma zamanıyla
+# (LastWriteMiddleware: çerez + X-Last-Write header'ı, get_read_db kontrol eder).
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", "5"))
+
+# Replica'ya gitmemesi gereken okumalar (yetki kontrolü gibi) için: execute(..., bind_arguments=PRIMARY)
+PRIMARY = {"primary": True}
+
+class RecentWriters:
+    """Son REPLICA_STICKY_SECONDS içinde commit eden kullanıcılar (süreç içi)."""
+    def __init__(self, window: float = REPLICA_STICKY_SECONDS):
+        self.window = window
+        self._writes: "OrderedDict[object, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def mark(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            self._writes[user_id] = now
+            self._writes.move_to_end(user_id)
+            # En eski kayıtlar başta: süresi dolanları buradan temizle
+            while self._writes and next(iter(self._writes.values())) < now - self.window:
+                self._writes.popitem(last=False)
+
+    def is_recent(self, user_id) -> bool:
+        with self._lock:
+            written_at = self._writes.get(user_id)
+        return written_at is not None and written_at >= time.monotonic() - self.window
+
+    def clear(self):
+        with self._lock:
+            self._writes.clear()
+
+recent_writers = RecentWriters()
+
+LAST_WRITE_COOKIE = "last_write"
+LAST_WRITE_HEADER = "X-Last-Write"
+
+class RequestWrite:
+    """İstekte replica'lı bir session'da commit eden kullanıcı ve zamanı (LastWriteMiddleware okur)."""
+    __slots__ = ("user_id", "at")
+
+    def __init__(self):
+        self.user_id = None
+        self.at: Optional[float] = None
+
+current_write: ContextVar[Optional[RequestWrite]] = ContextVar("current_write", default=None)
+
+class ReplicaReads:
+    """Bir işlem sırasında replica'dan okundu mu (yanıt cache'i bakar)."""
+    __slots__ = ("used",)
+
+    def __init__(self):
+        self.used = False
+
+current_replica_reads: ContextVar[Optional[ReplicaReads]] = ContextVar("current_replica_reads", default=None)
+
+def _signature(value: str) -> str:
+    return hmac.new(SECRET_KEY.encode(), value.encode(), hashlib.sha256).hexdigest()[:32]
+
+def sign_last_write(user_id, at: float) -> str:
+    value = f"{user_id}:{int(at * 1000)}"
+    return f"{value}:{_signature(value)}"
+
+def last_write_at(token: Optional[str], user_id) -> Optional[float]:
+    """İmzası ve kullanıcısı doğruysa token'daki son yazma zamanı (Unix saniyesi), değilse None."""
+    if not token:
+        return None
+    value, _, signature = token.rpartition(":")
+    owner, _, millis = value.partition(":")
+    if owner != str(user_id) or not millis.isdigit() or not hmac.compare_digest(signature, _signature(value)):
+        return None
+    return int(millis) / 1000
+
+def wrote_recently(token: Optional[str], user_id) -> bool:
+    """Başka bir worker'daki yazma da dahil: kullanıcı REPLICA_STICKY_SECONDS içinde yazdı mı."""
+    if recent_writers.is_recent(user_id):
+        return True
+    at = last_write_at(token, user_id)
+    return at is not None and time.time() - at < REPLICA_STICKY_SECONDS
+
+class LastWriteMiddleware:
+    """Replica'lı session'da commit eden isteğin yanıtına imzalı son yazma zamanını ekler."""
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        write = RequestWrite()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and write.at is not None:
+                token = sign_last_write(write.user_id, write.at)
+                cookie = (f"{LAST_WRITE_COOKIE}={token}; Max-Age={max(1, round(REPLICA_STICKY_SECONDS))}; "
+                          "Path=/; HttpOnly; SameSite=Lax")
+                message = {**message, "headers": [
+                    *message.get("headers", []),
+                    (b"set-cookie", cookie.encode()),
+                    (LAST_WRITE_HEADER.lower().encode(), token.encode()),
+                ]}
+            await send(message)
+
+        token = current_write.set(write)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_write.reset(token)
+
+class RoutingSession(Session):
+    """info["read_only"] işaretli session'ların SELECT'leri info["replica"] engine'ine gider.
+
+    Flush, PRIMARY ile işaretli sorgular ve yakın zamanda yazmış kullanıcının okumaları primary'de kalır.
+    """
+    def get_bind(self, mapper=None, clause=None, primary: bool = False, **kw):
+        replica = self.info.get("replica")
+        if (
+            replica is not None
+            and self.info.get("read_only")
+            and not primary
+            and not self._flushing
+            and not recent_writers.is_recent(self.info.get("user_id"))
+        ):
+            reads = current_replica_reads.get()
+            if reads is not None:
+                reads.used = True
+            return replica
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+@event.listens_for(RoutingSession, "after_commit")
+def _remember_writer(session):
+    # get_current_user session'a user_id'yi yazar; commit eden kullanıcı primary'ye yapışır
+    user_id = session.info.get("user_id")
+    if user_id is not None and not session.info.get("read_only"):
+        recent_writers.mark(user_id)
+        write = current_write.get()
+        if write is not None and session.info.get("replica") is not None:
+            write.user_id, write.at = user_id, time.time()
+
+replica_engine = None
+if DATABASE_REPLICA_URL:
+    replica_engine = create_engine(DATABASE_REPLICA_URL, **engine_options(DATABASE_REPLICA_URL))
+
+SessionLocal = sessionmaker(
+    class_=RoutingSession, autocommit=False, autoflush=False, bind=engine, info={"replica": replica_engine}
+)
 
 Base = declarative_base()
 
@@ -19,4 +226,39 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# --- ASYNC MOD ---
+
+def to_async_url(url: str) -> str:
+    """Senkron sürücü URL'ini async sürücü karşılığına çevirir (asyncpg / aiosqlite)."""
+    scheme, rest = url.split("://", 1)
+    if scheme in ("postgresql", "postgres", "postgresql+psycopg2"):
+        return f"postgresql+asyncpg://{rest}"
+    if scheme in ("sqlite", "sqlite+pysqlite"):
+        return f"sqlite+aiosqlite://{rest}"
+    return url
+
+async_engine = None
+AsyncSessionLocal = None
+
+if DB_ASYNC:
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+    ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(SQLALCHEMY_DATABASE_URL)
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL, is_async=True))
+    async_replica_engine = None
+    if DATABASE_REPLICA_URL:
+        ASYNC_DATABASE_REPLICA_URL = os.getenv("ASYNC_DATABASE_REPLICA_URL") or to_async_url(DATABASE_REPLICA_URL)
+        async_replica_engine = create_async_engine(
+            ASYNC_DATABASE_REPLICA_URL, **engine_options(ASYNC_DATABASE_REPLICA_URL, is_async=True)
+        )
+    # expire_on_commit=False: commit sonrası attribute erişimi lazy-load (await'siz IO) tetiklemesin
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine, sync_session_class=RoutingSession, autoflush=False, expire_on_commit=False,
+        info={"replica": async_replica_engine.sync_engine if async_replica_engine else None},
+    )
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,27 +1,130 @@
-from fastapi import Depends, HTTPException, status
+from uuid import UUID
+from fastapi import Depends, HTTPException, Request, status
 from jose import jwt, JWTError
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.security import OAuth2PasswordBearer
-from app import crud, utils, models
-from app.database import get_db
+from app import crud, async_crud, utils, models
+from app.auth_cache import CachedUser, user_cache
+from app.database import LAST_WRITE_COOKIE, LAST_WRITE_HEADER, get_db, get_async_db, wrote_recently
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Kimlik doğrulanamadı",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+credentials_exception = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Kimlik doğrulanamadı",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+
+def _decode_token(token: str) -> dict:
     try:
         payload = jwt.decode(token, utils.SECRET_KEY, algorithms=[utils.ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
+        if payload.get("sub") is None:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-    
-    user = crud.get_user_by_email(db, email=email)
-    if user is None:
+    return payload
+
+def _token_user_id(payload: dict):
+    # uid claim'i olmayan eski token'lar için None → email ile aranır
+    uid = payload.get("uid")
+    if uid is None:
+        return None
+    try:
+        return UUID(uid)
+    except (TypeError, ValueError):
+        raise credentials_exception
+
+def _check_user(user: CachedUser, payload: dict) -> CachedUser:
+    # Ban / rol değişiminden önce üretilmiş token'lar reddedilir
+    if "ver" in payload and payload["ver"] != user.token_version:
         raise credentials_exception
-    return user
\ No newline at end of file
+    if user.is_banned:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Hesabınız askıya alınmış.")
+    return user
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    payload = _decode_token(token)
+    user_id = _token_user_id(payload)
+
+    # Çoğu istek cache'ten döner, DB'ye hiç gidilmez
+    user = user_cache.get(user_id) if user_id else None
+    if user is None:
+        if user_id:
+            db_user = crud.get_user(db, user_id)
+        else:
+            db_user = crud.get_user_by_email(db, email=payload["sub"])
+        if db_user is None:
+            raise credentials_exception
+        user = CachedUser.from_model(db_user)
+        user_cache.put(user)
+    # RoutingSession read-your-writes için commit eden kullanıcıyı bilir
+    db.info["user_id"] = user.id
+    return _check_user(user, payload)
+
+async def get_current_user_async(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
+    payload = _decode_token(token)
+    user_id = _token_user_id(payload)
+
+    user = user_cache.get(user_id) if user_id else None
+    if user is None:
+        if user_id:
+            db_user = await async_crud.get_user(db, user_id)
+        else:
+            db_user = await async_crud.get_user_by_email(db, email=payload["sub"])
+        if db_user is None:
+            raise credentials_exception
+        user = CachedUser.from_model(db_user)
+        user_cache.put(user)
+    db.info["user_id"] = user.id
+    return _check_user(user, payload)
+
+def require_admin(current_user=Depends(get_current_user)):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Bu işlem için yönetici yetkisi gerekir.")
+    return current_user
+
+# --- READ REPLICA ---
+# Salt okunur handler'lar get_db yerine bunu kullanır: aynı istek session'ı replica'ya yönlenir.
+# Kullanıcı doğrulaması bu işaretten önce (primary'de) yapılır, araç yetkisi PRIMARY ile okunur.
+
+# Başka bir worker'da yazmış kullanıcı, yanıtta aldığı imzalı son yazma zamanını (çerez ya da
+# X-Last-Write) geri gönderir; REPLICA_STICKY_SECONDS içindeyse okuma primary'de kalır.
+
+def _last_write_token(request: Request):
+    return request.headers.get(LAST_WRITE_HEADER) or request.cookies.get(LAST_WRITE_COOKIE)
+
+def get_read_db(request: Request, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+    if not wrote_recently(_last_write_token(request), current_user.id):
+        db.info["read_only"] = True
+    return db
+
+async def get_read_db_async(request: Request, db: AsyncSession = Depends(get_async_db), current_user=Depends(get_current_user_async)):
+    if not wrote_recently(_last_write_token(request), current_user.id):
+        db.info["read_only"] = True
+    return db
+
+# --- ARAÇ YETKİSİ ---
+# get_vehicle_role istek başına bir kez çalışır (FastAPI dependency cache'i); aynı istekte
+# birden fazla require_vehicle_access kullanılsa da yetki sorgusu tekrar edilmez.
+
+def get_vehicle_role(vin: str, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+    return crud.get_vehicle_role(db, vin, current_user.id)
+
+async def get_vehicle_role_async(vin: str, db: AsyncSession = Depends(get_async_db), current_user=Depends(get_current_user_async)):
+    return await async_crud.get_vehicle_role(db, vin, current_user.id)
+
+def _vehicle_access_checker(resolver, permissions: tuple, detail: str):
+    async def check(access: tuple = Depends(resolver)):
+        vehicle, role = access
+        if vehicle is None or (role != "owner" and role not in permissions):
+            raise HTTPException(status_code=404, detail=detail)
+        return vehicle, role
+    return check
+
+def require_vehicle_access(*permissions: str, detail: str = "Araç bulunamadı veya yetkiniz yok."):
+    """(vehicle, rol) döner. Sahip her zaman geçer; izin verilmezse sadece sahip erişebilir."""
+    return _vehicle_access_checker(get_vehicle_role, permissions, detail)
+
+def require_vehicle_access_async(*permissions: str, detail: str = "Araç bulunamadı veya yetkiniz yok."):
+    return _vehicle_access_checker(get_vehicle_role_async, permissions, detail)
@@ -0,0 +1,268 @@
+"""Araç değişiklik akışı: servis kaydı, kilometre / araç güncellemesi ve paylaşım olayları.
+
+crud fonksiyonları olayı commit'ten önce, aynı transaction içinde `publish` ile kaydeder. Alıcılar
+aracın sahibi ve yetkilileridir (vehicle_audience_query); yetkisi kaldırılan kullanıcı `also` ile
+eklenir. Olaylar commit'ten sonra dağıtılır, rollback'te atılır.
+
+Backend:
+- "memory": commit sonrası süreç içi Broker'a verilir; sadece aynı worker'a bağlı abonelere ulaşır.
+- "postgres": alıcılar ve veri transaction içinde change_events'e yazılır, `pg_notify` sadece
+  {id, type, vin} taşır (commit ile birlikte teslim edilir; NOTIFY 8000 byte sınırı büyük
+  kitlelerde yazmayı düşürmesin). Her worker'daki dinleyici thread LISTEN ile kimlikleri alır,
+  satırları okuyup kendi abonelerine dağıtır ve EVENTS_RETENTION'dan eski satırları budar. Çok
+  worker'lı kurulum içindir. LISTEN kalıcı bağlantı ister, PgBouncer transaction modunda çalışmaz.
+
+Abonelik kullanıcı başınadır ve sınırlı bir kuyruktur: yetişemeyen istemcinin akışı "resync"
+olayıyla kapanır, istemci yeniden bağlanıp listeleri tazeler.
+"""
+import asyncio
+import json
+import logging
+import os
+import select
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Optional
+from uuid import UUID
+from sqlalchemy import delete, event, func, insert, union_all
+from sqlalchemy import select as sql_select
+from sqlalchemy.orm import Session
+from app import models
+from app.serialization import dumps
+
+EVENTS_BACKEND = os.getenv("EVENTS_BACKEND", "memory")
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "100"))
+EVENTS_HEARTBEAT = float(os.getenv("EVENTS_HEARTBEAT", "15"))
+EVENTS_RETENTION = float(os.getenv("EVENTS_RETENTION", "300"))
+EVENTS_CHANNEL = "vehicle_events"
+
+logger = logging.getLogger(__name__)
+
+RESYNC = {"type": "resync"}
+
+class Subscription:
+    def __init__(self, user_id: UUID, loop: asyncio.AbstractEventLoop, maxsize: int = EVENTS_QUEUE_SIZE):
+        self.user_id = user_id
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.closed = False
+
+    def deliver(self, event: dict):
+        """Abonenin event loop'unda çalışır."""
+        if self.closed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Yavaş istemci: bekleyenleri at, akışı resync ile kapat
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+            self.closed = True
+
+class Broker:
+    """Süreç içi pub/sub: user_id -> abonelikler. publish herhangi bir thread'den çağrılabilir."""
+    def __init__(self):
+        self._subscriptions: dict = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id: UUID) -> Subscription:
+        subscription = Subscription(user_id, asyncio.get_running_loop())
+        with self._lock:
+            self._subscriptions.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.user_id]
+
+    def has_subscribers(self) -> bool:
+        return bool(self._subscriptions)
+
+    def publish(self, recipients: Iterable, event: dict):
+        with self._lock:
+            targets = [s for user_id in recipients for s in self._subscriptions.get(user_id, ())]
+        for subscription in targets:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:  # loop kapanmış: bağlantı zaten bitmiş
+                self.unsubscribe(subscription)
+
+    def clear(self):
+        with self._lock:
+            self._subscriptions.clear()
+
+broker = Broker()
+
+def active() -> bool:
+    """Olay üretmeye değer mi: postgres'te diğer worker'ların abonelerini bilemeyiz."""
+    return EVENTS_BACKEND == "postgres" or broker.has_subscribers()
+
+def audiences(db: Session, vehicle_vins: list) -> dict:
+    """VIN -> {sahip + yetkili kullanıcılar}; toplu yazmalarda tek sorgu."""
+    v, a = models.Vehicle, models.VehicleAccess
+    g, m = models.FleetGrant, models.OrganizationMember
+    rows = db.execute(union_all(
+        sql_select(v.vin, v.owner_id).where(v.vin.in_(vehicle_vins)),
+        sql_select(a.vehicle_vin, a.user_id).where(a.vehicle_vin.in_(vehicle_vins)),
+        sql_select(v.vin, m.user_id)
+        .join(g, g.fleet_id == v.fleet_id)
+        .join(m, m.organization_id == g.organization_id)
+        .where(v.vin.in_(vehicle_vins)),
+    ))
+    result = {vin: set() for vin in vehicle_vins}
+    for vin, user_id in rows:
+        result[vin].add(user_id)
+    return result
+
+def publish(db: Session, vehicle_vin: Optional[str], event_type: str, data: Optional[dict] = None,
+            recipients: Optional[Iterable] = None, also: Iterable = ()):
+    """Commit'ten önce çağrılır. recipients verilmezse aracın güncel kitlesi sorgulanır (flush sonrası).
+    Filo olaylarında vehicle_vin None'dır, recipients verilmelidir."""
+    if recipients is None:
+        if not active():
+            return
+        recipients = audiences(db, [vehicle_vin])[vehicle_vin]
+    users = sorted({str(user_id) for user_id in (*recipients, *also)})
+    if not users:
+        return
+    payload = {
+        "id": uuid.uuid4().hex,
+        "type": event_type,
+        "vin": vehicle_vin,
+        "at": datetime.now(timezone.utc),
+        "data": data or {},
+    }
+    if EVENTS_BACKEND == "postgres":
+        message = dumps({"recipients": users, "event": payload}).decode("utf-8")
+        db.execute(insert(models.ChangeEvent).values(id=payload["id"], message=message))
+        _notify(db, notify_payload(payload))
+    else:
+        db.info.setdefault("pending_events", []).append((users, payload))
+
+@event.listens_for(Session, "after_commit")
+def _dispatch_pending(session):
+    pending = session.info.pop("pending_events", None)
+    for users, payload in pending or ():
+        broker.publish([UUID(user_id) for user_id in users], payload)
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending(session):
+    session.info.pop("pending_events", None)
+
+# --- PostgreSQL LISTEN ---
+
+def notify_payload(event: dict) -> str:
+    """Kitle ve veri büyüklüğünden bağımsız, sabit boyutlu NOTIFY gövdesi."""
+    return dumps({"id": event["id"], "type": event["type"], "vin": event["vin"]}).decode("utf-8")
+
+def _notify(db: Session, payload: str):
+    db.execute(sql_select(func.pg_notify(EVENTS_CHANNEL, payload)))
+
+def deliver_stored(engine, event_ids: list):
+    """Bildirilen olayları change_events'ten okuyup bu süreçteki abonelere verir (bildirim sırasıyla)."""
+    if not event_ids or not broker.has_subscribers():
+        return
+    e = models.ChangeEvent
+    with engine.connect() as conn:
+        messages = dict(conn.execute(sql_select(e.id, e.message).where(e.id.in_(event_ids))).all())
+    for event_id in event_ids:
+        if event_id not in messages:  # budanmış
+            continue
+        message = json.loads(messages[event_id])
+        broker.publish([UUID(user_id) for user_id in message["recipients"]], message["event"])
+
+def prune(engine, retention: float = EVENTS_RETENTION) -> int:
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=retention)
+    with engine.begin() as conn:
+        return conn.execute(delete(models.ChangeEvent).where(models.ChangeEvent.created_at < cutoff)).rowcount
+
+class PostgresListener(threading.Thread):
+    """LISTEN vehicle_events; gelen bildirimleri bu süreçteki Broker'a verir, koparsa yeniden bağlanır."""
+    def __init__(self, engine):
+        super().__init__(name="vehicle-events-listener", daemon=True)
+        self.engine = engine
+        self._pruned_at = 0.0
+
+    def run(self):
+        while True:
+            try:
+                self._listen()
+            except Exception:
+                logger.exception("LISTEN %s bağlantısı koptu, yeniden bağlanılıyor", EVENTS_CHANNEL)
+                time.sleep(1)
+
+    def _listen(self):
+        proxied = self.engine.raw_connection()
+        proxied.detach()  # havuz dışında, sürekli açık bağlantı
+        connection = proxied.dbapi_connection
+        try:
+            connection.autocommit = True
+            with connection.cursor() as cursor:
+                cursor.execute(f"LISTEN {EVENTS_CHANNEL}")
+            while True:
+                if select.select([connection], [], [], EVENTS_HEARTBEAT) != ([], [], []):
+                    connection.poll()
+                    event_ids = []
+                    while connection.notifies:
+                        event_ids.append(json.loads(connection.notifies.pop(0).payload)["id"])
+                    deliver_stored(self.engine, event_ids)
+                self._prune()
+        finally:
+            connection.close()
+
+    def _prune(self):
+        # Tüm worker'lar budar; aynı satırları silmeleri zararsız
+        if time.monotonic() - self._pruned_at >= EVENTS_RETENTION:
+            self._pruned_at = time.monotonic()
+            try:
+                prune(self.engine)
+            except Exception:
+                logger.exception("change_events budanamadı")
+
+_listener: Optional[PostgresListener] = None
+_listener_lock = threading.Lock()
+
+def ensure_listener():
+    global _listener
+    if EVENTS_BACKEND != "postgres" or _listener is not None:
+        return
+    with _listener_lock:
+        if _listener is None:
+            from app.database import engine
+            _listener = PostgresListener(engine)
+            _listener.start()
+
+# --- SSE ---
+
+def format_sse(event: dict) -> str:
+    lines = [f"event: {event['type']}"]
+    if "id" in event:
+        lines.insert(0, f"id: {event['id']}")
+    lines.append(f"data: {dumps(event).decode('utf-8')}")
+    return "\n".join(lines) + "\n\n"
+
+async def stream(user_id: UUID, heartbeat: float = EVENTS_HEARTBEAT):
+    """text/event-stream gövdesi. Abonelik ilk okumada açılır, bağlantı kapanınca (generator iptal
+    edilir) silinir; yanıt hiç başlamazsa arkada abonelik kalmaz."""
+    subscription = broker.subscribe(user_id)
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                # Proxy'ler boşta kalan bağlantıyı kesmesin
+                yield ": ping\n\n"
+                continue
+            yield format_sse(event)
+            if event is RESYNC:
+                return
+    finally:
+        broker.unsubscribe(subscription)
@@ -0,0 +1,80 @@
+"""Kullanıcının garajını (araçlar + servis geçmişi) akış halinde dışa aktarma.
+
+Tek bir sorgu (araçlar LEFT JOIN servis kayıtları) server-side cursor ile (yield_per)
+okunur; ardışık satırlar araç bazında gruplanıp NDJSON satırı ya da CSV satırları olarak
+yazılır. NDJSON, liste endpoint'leriyle aynı kodlayıcıyı (serialization.dumps) kullanır. Bellek kullanımı garaj boyutundan bağımsızdır.
+"""
+import csv
+import io
+from datetime import datetime
+from uuid import UUID
+from sqlalchemy import desc, select
+from sqlalchemy.orm import Session
+from app import models
+from app.serialization import dumps
+
+EXPORT_BATCH_SIZE = 500
+
+VEHICLE_FIELDS = ["vin", "brand", "model", "year", "mileage", "color", "created_at"]
+RECORD_FIELDS = ["record_id", "description", "record_mileage", "cost", "service_name", "date"]
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+def export_query(user_id: UUID):
+    v, r = models.Vehicle, models.ServiceRecord
+    return (
+        select(
+            v.vin, v.brand, v.model, v.year, v.mileage, v.color, v.created_at,
+            r.id.label("record_id"), r.description, r.mileage.label("record_mileage"),
+            r.cost, r.service_name, r.date,
+        )
+        .outerjoin(r, r.vehicle_vin == v.vin)
+        .where(v.owner_id == user_id, v.is_deleted == False)
+        # my-vehicles ile aynı sıra (owner index'i); aynı aracın kayıtları ardışık gelir
+        .order_by(desc(v.year), desc(v.vin), desc(r.date), desc(r.id))
+    )
+
+def _iter_rows(db: Session, user_id: UUID):
+    try:
+        result = db.execute(export_query(user_id).execution_options(yield_per=EXPORT_BATCH_SIZE))
+        for partition in result.mappings().partitions():
+            yield from partition
+    finally:
+        # Yanıt akışı dependency'nin ömründen uzun sürebilir; session'ı akış bitince kapat
+        db.close()
+
+def iter_ndjson(db: Session, user_id: UUID):
+    vehicle = None
+    for row in _iter_rows(db, user_id):
+        if vehicle is None or vehicle["vin"] != row["vin"]:
+            if vehicle is not None:
+                yield dumps(vehicle) + b"\n"
+            vehicle = {field: row[field] for field in VEHICLE_FIELDS}
+            vehicle["service_records"] = []
+        if row["record_id"] is not None:
+            vehicle["service_records"].append({
+                "id": row["record_id"],
+                "description": row["description"],
+                "mileage": row["record_mileage"],
+                "cost": row["cost"],
+                "service_name": row["service_name"],
+                "date": row["date"],
+            })
+    if vehicle is not None:
+        yield dumps(vehicle) + b"\n"
+
+def iter_csv(db: Session, user_id: UUID):
+    """Servis kaydı başına bir satır; kaydı olmayan araçlar boş kayıt kolonlarıyla tek satır."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(VEHICLE_FIELDS + RECORD_FIELDS)
+    for i, row in enumerate(_iter_rows(db, user_id), start=1):
+        writer.writerow([
+            row[f].isoformat() if isinstance(row[f], datetime) else row[f]
+            for f in VEHICLE_FIELDS + RECORD_FIELDS
+        ])
+        if i % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
@@ -0,0 +1,184 @@
+"""Organizasyonlar (ekipler), filolar (araç koleksiyonları) ve filo yetkileri.
+
+Bir filo, sahibinin araçlarından oluşan bir koleksiyondur (vehicles.fleet_id). Filo sahibi filoyu
+bir organizasyona "viewer" / "driver" / "editor" yetkisiyle verir; organizasyonun her üyesi
+filodaki tüm araçlara bu yetkiyle erişir. 5.000 araçlık filoyu N kişilik ekiple paylaşmak
+5.000 × N VehicleAccess satırı yerine bir FleetGrant ve N üyelik satırıdır; araç eklemek /
+çıkarmak tek bir UPDATE'tir.
+
+Yetki çözümü crud'dadır (fleet_rank_subquery, shared_vehicles_query): araç başına kontrol PK
+aramalarıyla yapılır, filo ya da ekip büyüklüğünden bağımsızdır. Bu modüldeki yazmalar etkilenen
+kullanıcıların yanıt cache'ini (ve dolayısıyla arama indeksini) düşürür; filo yetkisi verilip
+kaldırılınca organizasyon üyelerine, üye eklenip çıkarılınca o kullanıcıya organizasyonun her
+filosu için access.granted / access.revoked olayı gider.
+"""
+from uuid import UUID
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+from app import crud, events, models
+from app.cache import response_cache
+from app.database import PRIMARY
+
+# --- ORGANİZASYON ---
+
+def create_organization(db: Session, name: str, user_id: UUID) -> dict:
+    organization = models.Organization(name=name)
+    db.add(organization)
+    db.flush()
+    organization_id = organization.id
+    # Kuran kullanıcı yönetici olur
+    db.add(models.OrganizationMember(organization_id=organization_id, user_id=user_id, role="admin"))
+    db.commit()
+    return {"id": organization_id, "name": name, "role": "admin"}
+
+def get_user_organizations(db: Session, user_id: UUID) -> list:
+    o, m = models.Organization, models.OrganizationMember
+    return crud.row_dicts(db.execute(
+        select(o.id, o.name, m.role).join(m, m.organization_id == o.id).where(m.user_id == user_id)
+    ))
+
+def get_membership_role(db: Session, organization_id: UUID, user_id: UUID):
+    m = models.OrganizationMember
+    return db.execute(
+        select(m.role).where(m.organization_id == organization_id, m.user_id == user_id), bind_arguments=PRIMARY
+    ).scalar()
+
+def get_members(db: Session, organization_id: UUID) -> list:
+    m = models.OrganizationMember
+    return crud.row_dicts(db.execute(
+        select(m.user_id, models.User.email, m.role)
+        .join(models.User, models.User.id == m.user_id)
+        .where(m.organization_id == organization_id)
+    ))
+
+def is_last_admin(db: Session, organization_id: UUID, user_id: UUID) -> bool:
+    """Kullanıcı organizasyonun tek yöneticisi mi. Yönetici satırları transaction sonuna kadar
+    kilitlenir (PostgreSQL): iki yönetici aynı anda birbirini çıkaramaz."""
+    m = models.OrganizationMember
+    admins = db.scalars(
+        select(m.user_id).where(m.organization_id == organization_id, m.role == "admin").with_for_update(),
+        bind_arguments=PRIMARY,
+    ).all()
+    return list(admins) == [user_id]
+
+def organization_grants(db: Session, organization_id: UUID) -> list:
+    g = models.FleetGrant
+    return db.execute(select(g.fleet_id, g.permission).where(g.organization_id == organization_id)).all()
+
+def add_member(db: Session, organization_id: UUID, user_id: UUID, role: str):
+    member = db.get(models.OrganizationMember, (organization_id, user_id))
+    if member is None:
+        db.add(models.OrganizationMember(organization_id=organization_id, user_id=user_id, role=role))
+        # Yeni üye organizasyona verilmiş her filoya erişir
+        for fleet_id, permission in organization_grants(db, organization_id):
+            events.publish(db, None, "access.granted", grant_event_data(fleet_id, organization_id, permission),
+                           recipients=[user_id])
+    else:
+        member.role = role
+    db.commit()
+    # Yeni üye organizasyonun filolarını shared-with-me'de görür
+    response_cache.bump(user_id)
+
+def remove_member(db: Session, organization_id: UUID, user_id: UUID) -> bool:
+    member = db.get(models.OrganizationMember, (organization_id, user_id))
+    if member is None:
+        return False
+    db.delete(member)
+    for fleet_id, _ in organization_grants(db, organization_id):
+        events.publish(db, None, "access.revoked", grant_event_data(fleet_id, organization_id),
+                       recipients=(), also=(user_id,))
+    db.commit()
+    response_cache.bump(user_id)
+    return True
+
+# --- FİLO ---
+
+def create_fleet(db: Session, name: str, owner_id: UUID) -> dict:
+    fleet = models.Fleet(name=name, owner_id=owner_id)
+    db.add(fleet)
+    db.flush()
+    fleet_id = fleet.id
+    db.commit()
+    return {"id": fleet_id, "name": name, "vehicle_count": 0}
+
+def get_user_fleets(db: Session, owner_id: UUID) -> list:
+    f, v = models.Fleet, models.Vehicle
+    vehicle_count = (
+        select(func.count()).where(v.fleet_id == f.id, v.is_deleted == False).scalar_subquery()
+    )
+    return crud.row_dicts(db.execute(
+        select(f.id, f.name, vehicle_count.label("vehicle_count")).where(f.owner_id == owner_id).order_by(f.id)
+    ))
+
+def get_owned_fleet(db: Session, fleet_id: int, owner_id: UUID):
+    fleet = db.get(models.Fleet, fleet_id)
+    return fleet if fleet is not None and fleet.owner_id == owner_id else None
+
+def add_vehicles(db: Session, fleet: models.Fleet, vins: list) -> list:
+    """Sahibin araçlarını filoya taşır (tek UPDATE); taşınan VIN'leri döner. Başka bir filodaki
+    araç oradan çıkar: eski ve yeni filonun üyelerinin cache'i düşer."""
+    v = models.Vehicle
+    owned = (v.vin.in_(vins), v.owner_id == fleet.owner_id, v.is_deleted == False)
+    previous = select(v.fleet_id).where(*owned, v.fleet_id.isnot(None), v.fleet_id != fleet.id)
+    audience = set(db.scalars(crud.fleet_audience_query(previous).union(crud.fleet_audience_query([fleet.id]))))
+    moved = list(db.scalars(
+        update(v).where(*owned).values(fleet_id=fleet.id).returning(v.vin),
+        execution_options={"synchronize_session": False},
+    ))
+    db.commit()
+    if moved:
+        response_cache.bump(fleet.owner_id, *audience)
+    return moved
+
+def remove_vehicle(db: Session, fleet: models.Fleet, vin: str) -> bool:
+    v = models.Vehicle
+    audience = list(db.scalars(crud.fleet_audience_query([fleet.id])))
+    removed = db.execute(
+        update(v).where(v.vin == vin, v.fleet_id == fleet.id).values(fleet_id=None),
+        execution_options={"synchronize_session": False},
+    ).rowcount
+    db.commit()
+    if removed:
+        response_cache.bump(fleet.owner_id, *audience)
+    return bool(removed)
+
+def organization_members_query(organization_id: UUID):
+    m = models.OrganizationMember
+    return select(m.user_id).where(m.organization_id == organization_id)
+
+def grant_event_data(fleet_id: int, organization_id: UUID, permission: str = None) -> dict:
+    """Filo olayları araca değil filoya aittir (vin yok); istemci paylaşılan listeyi tazeler."""
+    data = {"fleet_id": fleet_id, "organization_id": str(organization_id)}
+    if permission:
+        data["permission"] = permission
+    return data
+
+def grant(db: Session, fleet: models.Fleet, organization_id: UUID, permission: str):
+    existing = db.get(models.FleetGrant, (fleet.id, organization_id))
+    if existing is None:
+        db.add(models.FleetGrant(fleet_id=fleet.id, organization_id=organization_id, permission=permission))
+    else:
+        existing.permission = permission
+    members = list(db.scalars(organization_members_query(organization_id)))
+    events.publish(db, None, "access.granted", grant_event_data(fleet.id, organization_id, permission), recipients=members)
+    db.commit()
+    response_cache.bump(*members)
+
+def revoke(db: Session, fleet: models.Fleet, organization_id: UUID) -> bool:
+    existing = db.get(models.FleetGrant, (fleet.id, organization_id))
+    if existing is None:
+        return False
+    members = list(db.scalars(organization_members_query(organization_id)))
+    db.delete(existing)
+    events.publish(db, None, "access.revoked", grant_event_data(fleet.id, organization_id), recipients=members)
+    db.commit()
+    response_cache.bump(*members)
+    return True
+
+def get_grants(db: Session, fleet_id: int) -> list:
+    g, o = models.FleetGrant, models.Organization
+    return crud.row_dicts(db.execute(
+        select(g.organization_id, o.name.label("organization_name"), g.permission)
+        .join(o, o.id == g.organization_id)
+        .where(g.fleet_id == fleet_id)
+    ))
@@ -0,0 +1,71 @@
+"""bcrypt işlemleri için ayrı worker havuzu.
+
+hash/verify çağrıları request threadpool'unu değil bu havuzu meşgul eder. Havuz + kuyruk
+doluysa yeni iş beklemeye alınmaz, 503 ile hemen reddedilir (backpressure).
+"""
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from fastapi import HTTPException, status
+from app import metrics, utils
+
+HASH_EXECUTOR = os.getenv("HASH_EXECUTOR", "thread")  # thread | process
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(os.cpu_count() or 2)))
+HASH_QUEUE_LIMIT = int(os.getenv("HASH_QUEUE_LIMIT", "32"))
+
+class PasswordHasher:
+    def __init__(self, workers: int = HASH_WORKERS, queue_limit: int = HASH_QUEUE_LIMIT, executor: str = HASH_EXECUTOR):
+        self.workers = workers
+        # Aynı anda kabul edilen iş sayısı: çalışanlar + kuyrukta bekleyenler
+        self.capacity = workers + queue_limit
+        self.executor_kind = executor
+        self._executor: Executor = None
+        self._inflight = 0
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                # bcrypt GIL'i bırakır; thread havuzu da gerçek paralellik sağlar
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    def _acquire(self):
+        with self._lock:
+            if self._inflight >= self.capacity:
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Sunucu şu anda yoğun, lütfen biraz sonra tekrar deneyin.",
+                    headers={"Retry-After": "1"},
+                )
+            self._inflight += 1
+
+    def _release(self):
+        with self._lock:
+            self._inflight -= 1
+
+    async def _run(self, fn, *args, op: str = "other"):
+        self._acquire()
+        started = time.perf_counter()
+        try:
+            return await asyncio.wrap_future(self._get_executor().submit(fn, *args))
+        finally:
+            self._release()
+            metrics.observe_bcrypt(op, time.perf_counter() - started)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(utils.hash_password, password, utils.BCRYPT_ROUNDS, op="hash")
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(utils.verify_password, plain_password, hashed_password, op="verify")
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+hasher = PasswordHasher()
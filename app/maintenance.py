@@ -0,0 +1,222 @@
+"""Tahmini bakım takvimi: servis geçmişinden bir sonraki bakımın kilometresi ve tarihi.
+
+Her araç ve servis türü (service_name, yoksa açıklama) için kayıtlar tarihe göre sıralanır ve
+kilometre ile tarih, servis sırasına (1, 2, ..., n) karşı en küçük kareler doğrusuyla uydurulur;
+eğim, o servisin tipik km ve gün aralığıdır. Tek bir aykırı kayıt, ardışık farkların
+ortalamasına göre tahmini daha az bozar. Hesap tek SQL sorgusudur (row_number() window +
+aggregate): bir kullanıcının tüm araçları için tek seferde yapılır, en az iki kaydı olan
+servisler tahmin edilir.
+
+Tahminler VIN başına süreç içi cache'te tutulur (`estimate_cache`). Sadece servis kayıtlarına
+bağlıdırlar: kayıt eklenip silinince crud.records_changed o VIN'i düşürür ve sonraki okuma sadece
+eksik VIN'leri hesaplar. Aracın güncel kilometresi (PUT ya da telemetri) okuma anında eklenir,
+cache'i etkilemez. Diğer worker'larda eskime MAINTENANCE_CACHE_TTL ile sınırlıdır.
+
+Bir sonraki bakım:
+- kilometre: son servis kilometresi + km aralığı; kalan = bu değer - güncel kilometre
+- tarih: son servis tarihi + gün aralığı ile, kalan kilometrenin servisin geçmişindeki km/gün
+  hızıyla dolacağı tarihten erken olanı
+Durum: eşiklerden biri geçildiyse "overdue", MAINTENANCE_DUE_SOON_KM / _DAYS içindeyse
+"due_soon", değilse "ok".
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from uuid import UUID
+from sqlalchemy import Float, case, cast, func, select
+from sqlalchemy.orm import Session
+from app import crud, models
+
+MAINTENANCE_CACHE_VINS = int(os.getenv("MAINTENANCE_CACHE_VINS", "100000"))
+MAINTENANCE_CACHE_TTL = float(os.getenv("MAINTENANCE_CACHE_TTL", "300"))
+MAINTENANCE_DUE_SOON_DAYS = float(os.getenv("MAINTENANCE_DUE_SOON_DAYS", "30"))
+MAINTENANCE_DUE_SOON_KM = int(os.getenv("MAINTENANCE_DUE_SOON_KM", "1000"))
+
+STATUS_ORDER = {"overdue": 0, "due_soon": 1, "ok": 2}
+# Tek IN listesindeki VIN sayısı (SQLite bind parametresi sınırının altında)
+VIN_CHUNK = 5000
+
+class EstimateCache:
+    """vin -> (kurulma zamanı, [servis tahmini]); LRU + TTL."""
+    def __init__(self, maxsize: int = MAINTENANCE_CACHE_VINS, ttl: float = MAINTENANCE_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Her düşürmede artar: hesap sürerken kayıt değiştiyse sonuç cache'e yazılmaz
+        self.version = 0
+
+    def get_many(self, vins: list) -> tuple:
+        """(bulunanlar {vin: tahminler}, eksik VIN'ler)."""
+        found, missing = {}, []
+        now = time.monotonic()
+        with self._lock:
+            for vin in vins:
+                entry = self._entries.get(vin)
+                if entry is None or entry[0] + self.ttl < now:
+                    self._entries.pop(vin, None)
+                    missing.append(vin)
+                    continue
+                self._entries.move_to_end(vin)
+                found[vin] = entry[1]
+        return found, missing
+
+    def set_many(self, entries: dict, version: int):
+        now = time.monotonic()
+        with self._lock:
+            if version != self.version:
+                return
+            for vin, estimates in entries.items():
+                self._entries[vin] = (now, estimates)
+                self._entries.move_to_end(vin)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def drop(self, *vins: str):
+        with self._lock:
+            self.version += 1
+            for vin in vins:
+                self._entries.pop(vin, None)
+
+    def clear(self):
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+
+estimate_cache = EstimateCache()
+
+def records_changed(*vins: str):
+    """Servis kaydı eklendi / silindi: bu araçların tahminleri bir sonraki okumada yeniden hesaplanır."""
+    estimate_cache.drop(*vins)
+
+def estimates_query(db: Session, vins: list):
+    """(vin, servis) başına kayıt sayısı, km / gün aralığı (en küçük kareler eğimi) ve son servis."""
+    r = models.ServiceRecord
+    service = func.coalesce(r.service_name, r.description)
+    partition = (r.vehicle_vin, service)
+    ordered = (
+        select(
+            r.vehicle_vin.label("vin"),
+            service.label("service"),
+            r.mileage,
+            r.date,
+            (cast(crud.epoch_seconds(db, r.date), Float) / 86400).label("day"),
+            func.row_number().over(partition_by=partition, order_by=(r.date, r.id)).label("x"),
+            func.count().over(partition_by=partition).label("n"),
+        )
+        .where(r.vehicle_vin.in_(vins), r.date.isnot(None))
+        .subquery()
+    )
+    o = ordered.c
+    x, n = cast(o.x, Float), cast(func.count(), Float)
+    denominator = n * func.sum(x * x) - func.sum(x) * func.sum(x)
+
+    def slope(y):
+        return (n * func.sum(x * y) - func.sum(x) * func.sum(y)) / denominator
+
+    is_last = o.x == o.n
+    return (
+        select(
+            o.vin,
+            o.service,
+            func.count().label("service_count"),
+            slope(o.mileage).label("km_interval"),
+            slope(o.day).label("days_interval"),
+            func.max(case((is_last, o.mileage))).label("last_service_mileage"),
+            func.max(case((is_last, o.date))).label("last_service_date"),
+        )
+        .group_by(o.vin, o.service)
+        .having(func.count() >= 2)
+    )
+
+def get_estimates(db: Session, vins: list) -> dict:
+    """{vin: [servis tahmini]}; cache'te olmayan VIN'ler tek sorguda (VIN_CHUNK'lık parçalar) hesaplanır."""
+    found, missing = estimate_cache.get_many(vins)
+    if missing:
+        version = estimate_cache.version
+        computed = {vin: [] for vin in missing}
+        for start in range(0, len(missing), VIN_CHUNK):
+            for row in db.execute(estimates_query(db, missing[start:start + VIN_CHUNK])).mappings():
+                estimate = dict(row)
+                computed[estimate.pop("vin")].append(estimate)
+        estimate_cache.set_many(computed, version)
+        found.update(computed)
+    return found
+
+def _as_utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+def _add_days(value: datetime, days: float) -> Optional[datetime]:
+    """Tarih aralığı dışına taşan tahmin (ör. 1 km / 30 günlük aralıkla binlerce km gecikme) yok sayılır."""
+    try:
+        return value + timedelta(days=days)
+    except OverflowError:
+        return None
+
+def project(vin: str, estimate: dict, current_mileage: int, now: datetime) -> Optional[dict]:
+    """Cache'teki tahmini aracın güncel kilometresi ve bugünle birleştirir."""
+    km = estimate["km_interval"] if estimate["km_interval"] and estimate["km_interval"] > 0 else None
+    days = estimate["days_interval"] if estimate["days_interval"] and estimate["days_interval"] > 0 else None
+    if km is None and days is None:
+        return None
+    last_date = _as_utc(estimate["last_service_date"])
+    mileage = max(current_mileage or 0, estimate["last_service_mileage"])
+
+    next_mileage = km_remaining = None
+    due_dates = []
+    if km is not None:
+        next_mileage = round(estimate["last_service_mileage"] + km)
+        km_remaining = next_mileage - mileage
+    if days is not None:
+        due_dates.append(_add_days(last_date, days))
+        if km is not None:
+            # Kalan kilometre, bu servisin geçmişindeki km/gün hızıyla
+            due_dates.append(_add_days(now, km_remaining / (km / days)))
+    due_dates = [due for due in due_dates if due is not None]
+    due_date = min(due_dates) if due_dates else None
+
+    if (km_remaining is not None and km_remaining <= 0) or (due_date is not None and due_date <= now):
+        status = "overdue"
+    elif (km_remaining is not None and km_remaining <= MAINTENANCE_DUE_SOON_KM) or (
+        due_date is not None and due_date <= now + timedelta(days=MAINTENANCE_DUE_SOON_DAYS)
+    ):
+        status = "due_soon"
+    else:
+        status = "ok"
+    return {
+        "vin": vin,
+        "service": estimate["service"],
+        "service_count": estimate["service_count"],
+        "last_service_date": last_date,
+        "last_service_mileage": estimate["last_service_mileage"],
+        "km_interval": round(km, 1) if km is not None else None,
+        "days_interval": round(days, 1) if days is not None else None,
+        "next_mileage": next_mileage,
+        "km_remaining": km_remaining,
+        "due_date": due_date,
+        "status": status,
+    }
+
+def upcoming_maintenance(db: Session, vehicles: list, now: Optional[datetime] = None) -> list:
+    """vehicles: (vin, güncel kilometre) listesi. En acil olandan başlayarak sıralı tahminler."""
+    now = now or datetime.now(timezone.utc)
+    estimates = get_estimates(db, [vin for vin, _ in vehicles])
+    projected = [
+        item
+        for vin, mileage in vehicles
+        for item in (project(vin, estimate, mileage, now) for estimate in estimates[vin])
+        if item is not None
+    ]
+    latest = datetime.max.replace(tzinfo=timezone.utc)
+    return sorted(projected, key=lambda item: (
+        STATUS_ORDER[item["status"]], item["due_date"] or latest, item["vin"], item["service"]
+    ))
+
+def get_due_soon(db: Session, user_id: UUID, now: Optional[datetime] = None) -> list:
+    """Garajdaki (sahip olunan) tüm araçların yaklaşan ve gecikmiş bakımları."""
+    v = models.Vehicle
+    vehicles = db.execute(select(v.vin, v.mileage).where(v.owner_id == user_id, v.is_deleted == False)).all()
+    return [item for item in upcoming_maintenance(db, vehicles, now) if item["status"] != "ok"]
@@ -0,0 +1,307 @@
+"""Prometheus metin formatında süreç içi metrikler (GET /metrics).
+
+- HTTP: route şablonu başına (`/vehicles/{vin}/service-records`) istek sayısı ve gecikme
+  histogram'ı; saf ASGI MetricsMiddleware ile ölçülür.
+- SQL: engine event'leriyle sorgu süresi histogram'ı ve route başına sorgu sayısı / süresi.
+  İstek içindeki sorgular contextvar'daki RequestQueries'e yazılır.
+- bcrypt: hashing.PasswordHasher iş süresi (kuyrukta bekleme dahil).
+- Bağlantı havuzu: boyut, kullanımdaki / boştaki bağlantı, overflow ve bağlantı bekleme süresi.
+  Bekleme süresi TimedQueuePool'un checkout'u sarmasıyla ölçülür.
+
+Metrikler worker süreci başınadır; `pid` etiketi çok worker'lı kurulumda serileri ayırır.
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Histogram sınırları (saniye)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+# Eşleşmeyen path'ler tek etiket altında toplanır (rastgele URL'ler seri sayısını şişirmesin)
+UNMATCHED_ROUTE = "unmatched"
+
+class Histogram:
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        # Son eleman +Inf kovası; render sırasında kümülatife çevrilir
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += value
+
+    def lines(self, name: str, labels: dict) -> list:
+        result = []
+        cumulative = 0
+        for bound, count in zip((*self.buckets, "+Inf"), self.counts):
+            cumulative += count
+            result.append(f"{name}_bucket{_labels(**labels, le=bound)} {cumulative}")
+        result += [
+            f"{name}_sum{_labels(**labels)} {self.total:.6f}",
+            f"{name}_count{_labels(**labels)} {self.count}",
+        ]
+        return result
+
+class Registry:
+    """İsim + etiket demeti başına histogram'lar (thread'lerden güncellenebilir)."""
+    def __init__(self):
+        self._help: dict = {}
+        self._histograms: dict = {}
+        self._lock = threading.Lock()
+
+    def describe(self, name: str, kind: str, help_text: str):
+        self._help[name] = (kind, help_text)
+
+    def observe(self, name: str, labels: tuple, value: float, buckets: tuple = LATENCY_BUCKETS):
+        key = (name, labels)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, Histogram(buckets))
+        histogram.observe(value)
+
+    def lines(self) -> list:
+        pid = os.getpid()
+        with self._lock:
+            histograms = sorted(self._histograms.items(), key=lambda item: item[0])
+        result = []
+        for name, (kind, help_text) in sorted(self._help.items()):
+            result += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            for (metric, labels), histogram in histograms:
+                if metric == name:
+                    result += histogram.lines(name, dict(labels, pid=pid))
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._histograms.clear()
+
+registry = Registry()
+registry.describe("db_query_duration_seconds", "histogram", "SQL statement latency")
+registry.describe("bcrypt_duration_seconds", "histogram", "bcrypt hash / verify time including queue wait")
+
+# --- İSTEK BAŞINA SORGU SAYACI ---
+
+class RequestQueries:
+    __slots__ = ("count", "seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+current_queries: ContextVar[Optional[RequestQueries]] = ContextVar("current_queries", default=None)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_started = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_metrics_started", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    registry.observe("db_query_duration_seconds", (), elapsed, QUERY_BUCKETS)
+    queries = current_queries.get()
+    if queries is not None:
+        queries.count += 1
+        queries.seconds += elapsed
+
+def install_query_hooks():
+    """Tüm engine'lere (sync, async'in sync_engine'i, replica) sorgu zamanlayıcısını bağlar."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+def observe_bcrypt(op: str, seconds: float):
+    registry.observe("bcrypt_duration_seconds", (("op", op),), seconds, LATENCY_BUCKETS)
+
+# --- HTTP MIDDLEWARE ---
+# Middleware ve /metrics handler'ı event loop thread'inde çalışır: route istatistikleri kilitsiz
+# güncellenir (istek başına birkaç µs bütçesi; bkz. benchmarks/metrics_overhead.py).
+
+def route_template(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path_format", None) or UNMATCHED_ROUTE
+
+class RouteStats:
+    __slots__ = ("statuses", "counts", "count", "total", "queries", "query_seconds")
+
+    def __init__(self):
+        self.statuses: dict = {}
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.queries = 0
+        self.query_seconds = 0.0
+
+class HttpMetrics:
+    def __init__(self):
+        self.routes: dict = {}
+
+    def record(self, method: str, template: str, status_code: int, elapsed: float, queries: RequestQueries):
+        key = (method, template)
+        stats = self.routes.get(key)
+        if stats is None:
+            stats = self.routes[key] = RouteStats()
+        stats.statuses[status_code] = stats.statuses.get(status_code, 0) + 1
+        stats.counts[bisect_left(LATENCY_BUCKETS, elapsed)] += 1
+        stats.count += 1
+        stats.total += elapsed
+        if queries.count:
+            stats.queries += queries.count
+            stats.query_seconds += queries.seconds
+
+    def lines(self) -> list:
+        pid = os.getpid()
+        requests = [
+            "# HELP http_requests_total HTTP requests by route template and status",
+            "# TYPE http_requests_total counter",
+        ]
+        latency = [
+            "# HELP http_request_duration_seconds HTTP request latency by route template",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        queries = [
+            "# HELP db_queries_total SQL statements executed, by route template",
+            "# TYPE db_queries_total counter",
+        ]
+        query_seconds = [
+            "# HELP db_query_seconds_total Time spent in SQL statements, by route template",
+            "# TYPE db_query_seconds_total counter",
+        ]
+        for (method, template), stats in sorted(self.routes.items()):
+            labels = dict(method=method, route=template, pid=pid)
+            for status_code, count in sorted(stats.statuses.items()):
+                requests.append(f"http_requests_total{_labels(**labels, status=status_code)} {count}")
+            cumulative = 0
+            for bound, count in zip((*LATENCY_BUCKETS, "+Inf"), stats.counts):
+                cumulative += count
+                latency.append(f"http_request_duration_seconds_bucket{_labels(**labels, le=bound)} {cumulative}")
+            latency += [
+                f"http_request_duration_seconds_sum{_labels(**labels)} {stats.total:.6f}",
+                f"http_request_duration_seconds_count{_labels(**labels)} {stats.count}",
+            ]
+            queries.append(f"db_queries_total{_labels(**labels)} {stats.queries}")
+            query_seconds.append(f"db_query_seconds_total{_labels(**labels)} {stats.query_seconds:.6f}")
+        # Her aile kendi HELP / TYPE satırının hemen ardından tek blok halinde yazılır
+        return requests + latency + queries + query_seconds
+
+    def clear(self):
+        self.routes.clear()
+
+http_metrics = HttpMetrics()
+
+class MetricsMiddleware:
+    """Saf ASGI middleware: BaseHTTPMiddleware'in gövde kopyalama / task maliyeti olmadan ölçer."""
+    def __init__(self, app, metrics: HttpMetrics = http_metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        queries = RequestQueries()
+        token = current_queries.set(queries)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            current_queries.reset(token)
+            # Router scope'a eşleşen route'u yazar; şablon ham path yerine etiket olur
+            self.metrics.record(scope["method"], route_template(scope), status_code, elapsed, queries)
+
+# --- BAĞLANTI HAVUZU ---
+
+class WaitStats(Histogram):
+    def __init__(self, buckets: tuple = WAIT_BUCKETS):
+        super().__init__(buckets)
+        self.timeouts = 0
+
+    def timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+class _TimedPoolMixin:
+    """QueuePool checkout'unu (havuzdan alma + gerekirse bekleme / yeni bağlantı) ölçer."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = WaitStats()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.wait_stats.timeout()
+            raise
+        finally:
+            self.wait_stats.observe(time.perf_counter() - started)
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels.items()) + "}"
+
+def pool_metrics(pools: dict) -> list:
+    """{ad: Pool} → metrik satırları. NullPool gibi sayacı olmayan havuzlar atlanır."""
+    pid = os.getpid()
+    families = {
+        name: [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        for name, kind, help_text in (
+            ("db_pool_size", "gauge", "Configured pool size"),
+            ("db_pool_checked_out", "gauge", "Connections currently in use"),
+            ("db_pool_checked_in", "gauge", "Idle connections in the pool"),
+            ("db_pool_overflow", "gauge", "Connections opened beyond pool_size"),
+            ("db_pool_wait_seconds", "histogram", "Time spent acquiring a connection"),
+            ("db_pool_timeouts_total", "counter", "Checkouts that hit pool_timeout"),
+        )
+    }
+    for name, pool in pools.items():
+        if not isinstance(pool, QueuePool):
+            continue
+        base = dict(pool=name, pid=pid)
+        families["db_pool_size"].append(f"db_pool_size{_labels(**base)} {pool.size()}")
+        families["db_pool_checked_out"].append(f"db_pool_checked_out{_labels(**base)} {pool.checkedout()}")
+        families["db_pool_checked_in"].append(f"db_pool_checked_in{_labels(**base)} {pool.checkedin()}")
+        families["db_pool_overflow"].append(f"db_pool_overflow{_labels(**base)} {max(pool.overflow(), 0)}")
+        stats = getattr(pool, "wait_stats", None)
+        if stats is None:
+            continue
+        families["db_pool_wait_seconds"] += stats.lines("db_pool_wait_seconds", base)
+        families["db_pool_timeouts_total"].append(f"db_pool_timeouts_total{_labels(**base)} {stats.timeouts}")
+    # Aile başına tek blok (Registry.lines gibi): havuzlar arası serpiştirme format dışı
+    return [line for family in families.values() for line in family]
+
+def render(pools: dict) -> str:
+    return "\n".join(http_metrics.lines() + registry.lines() + pool_metrics(pools)) + "\n"
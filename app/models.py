@@ -1,9 +1,27 @@
-from sqlalchemy import Column, String, Boolean, ForeignKey, Integer, DateTime
+from sqlalchemy import Column, DDL, JSON, String, Boolean, ForeignKey, Integer, DateTime, Index, UniqueConstraint, event, literal_column
 from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.sql import func
 import uuid
 from .database import Base
 
+# app.search'ün trigram indeksleri için (sadece PostgreSQL)
+event.listen(
+    Base.metadata, "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
+def search_vector(column):
+    """Servis açıklaması tam metin araması; sorgu ve GIN indeksi aynı ifadeyi kullanmalı."""
+    return func.to_tsvector(literal_column("'simple'::regconfig"), column)
+
+# SQLite'ta CURRENT_TIMESTAMP ile aynı metin formatı; aksi halde server_default ile yazılan
+# ve Python'dan bağlanan tarihler string olarak yanlış sıralanır (keyset cursor'ları bozulur)
+Timestamp = DateTime(timezone=True).with_variant(
+    sqlite.DATETIME(storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"),
+    "sqlite",
+)
+
 class User(Base):
     __tablename__ = "users"
 
@@ -12,6 +30,8 @@ class User(Base):
     hashed_password = Column(String, nullable=False)
     role = Column(String, default="driver")
     is_banned = Column(Boolean, default=False)
+    # Ban / rol değişiminde artar; eski token'lar ve auth cache kayıtları geçersizleşir
+    token_version = Column(Integer, server_default="0", default=0, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 class Vehicle(Base):
@@ -26,6 +46,34 @@ class Vehicle(Base):
     owner_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     is_deleted = Column(Boolean, default=False)
+    # Arşivleme bekleme süresi buradan sayılır (app.archive)
+    deleted_at = Column(Timestamp, nullable=True)
+    # Araç en fazla bir filodadır; filo yetkileri (FleetGrant) bu kolon üzerinden çözülür
+    fleet_id = Column(Integer, ForeignKey("fleets.id", ondelete="SET NULL"), nullable=True)
+
+    __table_args__ = (
+        # get_user_vehicles: owner_id filtresi + year sıralaması, sadece silinmemiş araçlar
+        Index(
+            "ix_vehicles_owner_active_year", "owner_id", "year", "vin",
+            postgresql_where=(is_deleted == False),
+            sqlite_where=(is_deleted == False),
+        ),
+        # /vehicles/search: bulanık metin (pg_trgm) ve VIN öneki (LIKE 'ABC%')
+        *(
+            Index(f"ix_vehicles_{name}_trgm", name, postgresql_using="gin", postgresql_ops={name: "gin_trgm_ops"})
+            .ddl_if(dialect="postgresql")
+            for name in ("brand", "model", "color")
+        ),
+        Index("ix_vehicles_vin_pattern", "vin", postgresql_ops={"vin": "varchar_pattern_ops"}).ddl_if(dialect="postgresql"),
+        # shared-with-me (filo yolu): yetkili filoların araçları
+        Index("ix_vehicles_fleet_id", "fleet_id"),
+        # Arşivleme işi: süresi dolmuş silinmiş araçlar
+        Index(
+            "ix_vehicles_deleted_at", "deleted_at",
+            postgresql_where=(is_deleted == True),
+            sqlite_where=(is_deleted == True),
+        ),
+    )
 
 class VehicleAccess(Base):
     __tablename__ = "vehicle_access"
@@ -36,6 +84,57 @@ class VehicleAccess(Base):
     permission = Column(String, default="viewer", nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    __table_args__ = (
+        # _can_access_vehicle / share_vehicle lookup'ı; bir kullanıcının araçta tek yetkisi olur
+        UniqueConstraint("vehicle_vin", "user_id", name="uq_vehicle_access_vehicle_user"),
+        # get_shared_vehicles: user_id ile arama
+        Index("ix_vehicle_access_user_id", "user_id"),
+    )
+
+# --- ORGANİZASYON / FİLO ---
+# Bir filo paylaşımı araç × kullanıcı başına VehicleAccess satırı yerine tek FleetGrant satırıdır:
+# kullanıcı → organization_members → fleet_grants → vehicles.fleet_id (bkz. crud, app.fleets)
+
+class Organization(Base):
+    __tablename__ = "organizations"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    name = Column(String, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class OrganizationMember(Base):
+    __tablename__ = "organization_members"
+
+    organization_id = Column(UUID(as_uuid=True), ForeignKey("organizations.id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    role = Column(String, default="member", nullable=False)  # admin | member
+
+    __table_args__ = (
+        # Yetki çözümü kullanıcıdan başlar: kullanıcının organizasyonları
+        Index("ix_organization_members_user", "user_id", "organization_id"),
+    )
+
+class Fleet(Base):
+    __tablename__ = "fleets"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    name = Column(String, nullable=False)
+    owner_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class FleetGrant(Base):
+    __tablename__ = "fleet_grants"
+
+    # PK (fleet_id, organization_id): araç yetki kontrolü filodan organizasyona iner
+    fleet_id = Column(Integer, ForeignKey("fleets.id", ondelete="CASCADE"), primary_key=True)
+    organization_id = Column(UUID(as_uuid=True), ForeignKey("organizations.id", ondelete="CASCADE"), primary_key=True)
+    permission = Column(String, default="viewer", nullable=False)
+
+    __table_args__ = (
+        # shared-with-me: kullanıcının organizasyonlarına verilmiş filolar
+        Index("ix_fleet_grants_organization", "organization_id", "fleet_id"),
+    )
+
 class ServiceRecord(Base):
     __tablename__ = "service_records"
 
@@ -47,4 +146,123 @@ class ServiceRecord(Base):
     cost = Column(Integer, nullable=True)
     service_name = Column(String, nullable=True)
 
-    date = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    date = Column(Timestamp, server_default=func.now())
+
+    __table_args__ = (
+        # get_service_records: VIN başına tarihe göre sıralı okuma
+        Index("ix_service_records_vin_date", "vehicle_vin", "date", "id"),
+        # /vehicles/search: açıklamalarda tam metin
+        Index(
+            "ix_service_records_description_fts", search_vector(description), postgresql_using="gin"
+        ).ddl_if(dialect="postgresql"),
+    )
+
+class VehicleStats(Base):
+    """Servis kayıtlarının VIN başına özeti (STATS_SUMMARY=true iken app.stats tarafından güncellenir)."""
+    __tablename__ = "vehicle_stats"
+
+    vehicle_vin = Column(String, ForeignKey("vehicles.vin", ondelete="CASCADE"), primary_key=True)
+    service_count = Column(Integer, nullable=False, default=0)
+    total_cost = Column(Integer, nullable=False, default=0)
+    cost_count = Column(Integer, nullable=False, default=0)
+    min_mileage = Column(Integer, nullable=True)
+    max_mileage = Column(Integer, nullable=True)
+    first_mileage = Column(Integer, nullable=True)
+    last_mileage = Column(Integer, nullable=True)
+    first_date = Column(Timestamp, nullable=True)
+    last_date = Column(Timestamp, nullable=True)
+
+class OutboxMessage(Base):
+    """Mutasyonla aynı transaction'da yazılan yan iş; app.outbox worker'ı batch'ler halinde işler."""
+    __tablename__ = "outbox"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    topic = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False)
+    # Aynı anahtarla tekrar eklenen mesaj yok sayılır; handler'lar dış sistemlere de bu anahtarı iletir
+    idempotency_key = Column(String, nullable=False, unique=True)
+    status = Column(String, nullable=False, server_default="pending", default="pending")
+    # Her claim'de artar; worker sonucu yazarken hâlâ mesajın sahibi olduğunu bununla doğrular
+    attempts = Column(Integer, nullable=False, server_default="0", default=0)
+    available_at = Column(Timestamp, nullable=False, server_default=func.now())
+    created_at = Column(Timestamp, server_default=func.now())
+    processed_at = Column(Timestamp, nullable=True)
+    last_error = Column(String, nullable=True)
+
+    __table_args__ = (
+        # Worker'ın claim sorgusu: zamanı gelmiş bekleyen mesajlar, eklenme sırasıyla
+        Index(
+            "ix_outbox_pending", "available_at", "id",
+            postgresql_where=(status == "pending"),
+            sqlite_where=(status == "pending"),
+        ),
+    )
+
+class ChangeEvent(Base):
+    """EVENTS_BACKEND=postgres: olayın alıcıları ve verisi. NOTIFY sadece kimliği taşır (8000 byte
+    sınırı), dinleyiciler satırı buradan okur; EVENTS_RETENTION'dan eski satırlar budanır."""
+    __tablename__ = "change_events"
+
+    id = Column(String, primary_key=True)
+    message = Column(String, nullable=False)
+    created_at = Column(Timestamp, nullable=False, server_default=func.now(), index=True)
+
+# --- TELEMETRİ ---
+
+class OdometerReading(Base):
+    """Araç başına zaman sıralı kilometre okumaları (append-only, app.telemetry yazar).
+
+    Satır başına sadece anahtar + değer: PK (vehicle_vin, recorded_at) hem aralık sorgularının
+    indeksi hem de tekrar gönderilen okumaların tekilleştiricisidir. SQLite'ta WITHOUT ROWID ile
+    satırlar doğrudan PK sırasıyla saklanır. FK yok: VIN'ler ingest sırasında yetkiyle
+    doğrulanır, arşivleme (app.archive) okumaları açıkça siler."""
+    __tablename__ = "odometer_readings"
+
+    vehicle_vin = Column(String, primary_key=True)
+    recorded_at = Column(Timestamp, primary_key=True)
+    odometer = Column(Integer, nullable=False)
+
+    __table_args__ = {"sqlite_with_rowid": False}
+
+# --- ARŞİV ---
+# Silinmiş araçlar ARCHIVE_RETENTION_DAYS sonra servis kayıtları ve paylaşımlarıyla birlikte
+# buraya taşınır (app.archive). Bir arşiv kaydı (vin, archived_at) ile tanımlanır: aynı VIN
+# sonradan yeniden kaydedilip tekrar silinebilir.
+
+class VehicleArchive(Base):
+    __tablename__ = "vehicles_archive"
+
+    vin = Column(String, primary_key=True)
+    archived_at = Column(Timestamp, primary_key=True)
+    model = Column(String, nullable=False)
+    brand = Column(String, nullable=False)
+    year = Column(Integer, nullable=False)
+    mileage = Column(Integer, nullable=False)
+    color = Column(String, nullable=True)
+    owner_id = Column(UUID(as_uuid=True), nullable=True, index=True)
+    created_at = Column(DateTime(timezone=True), nullable=True)
+    deleted_at = Column(Timestamp, nullable=True)
+
+class ServiceRecordArchive(Base):
+    __tablename__ = "service_records_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    vehicle_vin = Column(String, nullable=False)
+    archived_at = Column(Timestamp, nullable=False)
+    description = Column(String, nullable=False)
+    mileage = Column(Integer, nullable=False)
+    cost = Column(Integer, nullable=True)
+    service_name = Column(String, nullable=True)
+    date = Column(Timestamp, nullable=True)
+
+    __table_args__ = (
+        Index("ix_service_records_archive_vehicle", "vehicle_vin", "archived_at"),
+    )
+
+class VehicleAccessArchive(Base):
+    __tablename__ = "vehicle_access_archive"
+
+    vehicle_vin = Column(String, primary_key=True)
+    archived_at = Column(Timestamp, primary_key=True)
+    user_id = Column(UUID(as_uuid=True), primary_key=True)
+    permission = Column(String, nullable=False)
@@ -0,0 +1,272 @@
+"""Transactional outbox: mutasyonun yan işleri aynı transaction'da kuyruğa yazılır, worker işler.
+
+crud fonksiyonları isteğin sonucunu etkilemeyen ağır işleri (ör. vehicle_stats'ın VIN bazında
+yeniden hesaplanması) `enqueue` ile outbox tablosuna yazar. Mesaj mutasyonla birlikte commit
+edilir, rollback'te onunla birlikte kaybolur; istek süresi yan işin maliyetinden bağımsızdır.
+
+Worker (`drain`):
+- Zamanı gelmiş bekleyen mesajları tek UPDATE ... RETURNING ile claim eder: attempts artar,
+  available_at OUTBOX_LEASE_SECONDS ileri alınır (PostgreSQL'de FOR UPDATE SKIP LOCKED; birden
+  çok worker aynı mesajı almaz). Claim eden worker çökerse mesaj kira bitince yeniden alınır.
+- Mesajları topic'e göre gruplayıp handler'a tek çağrıda verir (ör. aynı VIN'in tekrar eden
+  yeniden hesapları birleşir). Handler'ın DB etkileri ve mesajın "done" işareti aynı
+  transaction'dadır; işaret, claim'deki attempts değeriyle koşulludur, kira dolup mesaj başka bir
+  worker'a geçtiyse handler'ın yazdıkları geri alınır.
+- Hata alan batch mesaj mesaj tekrar denenir; başarısız mesaj üstel bekleme ile yeniden kuyruğa
+  döner, OUTBOX_MAX_ATTEMPTS denemeden sonra "failed" olarak kalır.
+
+Teslimat en az bir kezdir: DB dışı yan etkiler (e-posta, webhook) message.key'i idempotency
+anahtarı olarak kullanmalıdır. `enqueue(..., key=...)` aynı anahtarı ikinci kez kuyruğa eklemez.
+
+Çalıştırma: OUTBOX_WORKER=inprocess (varsayılan) ile her uygulama süreci bir asyncio görevi
+başlatır; commit edilen mesaj worker'ı hemen uyandırır. OUTBOX_WORKER=off ile ayrı süreç:
+
+    python -m app.outbox            # sürekli
+    python -m app.outbox --once     # kuyruğu bir kez boşalt
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, event, select, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app import models
+from app.database import SessionLocal
+
+OUTBOX_WORKER = os.getenv("OUTBOX_WORKER", "inprocess")
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "1"))
+OUTBOX_LEASE_SECONDS = float(os.getenv("OUTBOX_LEASE_SECONDS", "60"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+OUTBOX_RETRY_BASE = float(os.getenv("OUTBOX_RETRY_BASE", "2"))
+OUTBOX_RETRY_MAX = float(os.getenv("OUTBOX_RETRY_MAX", "600"))
+# İşlenmiş mesajlar bu kadar saat saklanır (idempotency anahtarları da bu süre boyunca geçerli)
+OUTBOX_RETENTION_HOURS = float(os.getenv("OUTBOX_RETENTION_HOURS", "24"))
+PURGE_INTERVAL = 3600
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class Message:
+    id: int
+    topic: str
+    key: str
+    payload: dict
+    attempts: int
+
+# topic -> handler(db, messages); handler commit etmez, drain eder
+HANDLERS: dict = {}
+
+def handler(topic: str) -> Callable:
+    def register(fn: Callable) -> Callable:
+        HANDLERS[topic] = fn
+        return fn
+    return register
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+def enqueue(db: Session, topic: str, payload: dict, key: Optional[str] = None):
+    """Mesajı çağıranın transaction'ına yazar (tek INSERT); commit crud tarafındadır.
+    payload JSON'a çevrilebilir olmalıdır (UUID'ler str)."""
+    dialect = db.get_bind().dialect.name
+    dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    db.execute(
+        dialect_insert(models.OutboxMessage.__table__)
+        .values(topic=topic, payload=payload, idempotency_key=key or uuid.uuid4().hex)
+        .on_conflict_do_nothing(index_elements=["idempotency_key"])
+    )
+    db.info["outbox_enqueued"] = True
+
+@event.listens_for(Session, "after_commit")
+def _wake_worker(session):
+    if session.info.pop("outbox_enqueued", False):
+        worker.wake()
+
+@event.listens_for(Session, "after_rollback")
+def _forget_enqueued(session):
+    session.info.pop("outbox_enqueued", None)
+
+def claim(db: Session, limit: int) -> list:
+    o = models.OutboxMessage
+    now = utcnow()
+    due = (
+        select(o.id)
+        .where(o.status == "pending", o.available_at <= now)
+        .order_by(o.available_at, o.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    rows = db.execute(
+        update(o)
+        .where(o.id.in_(due.scalar_subquery()))
+        .values(attempts=o.attempts + 1, available_at=now + timedelta(seconds=OUTBOX_LEASE_SECONDS))
+        .returning(o.id, o.topic, o.idempotency_key, o.payload, o.attempts)
+    )
+    return sorted((Message(*row) for row in rows), key=lambda m: m.id)
+
+def retry_delay(attempts: int) -> float:
+    return min(OUTBOX_RETRY_BASE * 2 ** (attempts - 1), OUTBOX_RETRY_MAX)
+
+def _process(session_factory, topic: str, messages: list) -> bool:
+    """Handler + "done" işareti tek transaction'da; mesajlar başka worker'a geçtiyse geri alınır."""
+    o = models.OutboxMessage
+    with session_factory() as db:
+        fn = HANDLERS.get(topic)
+        if fn is None:
+            raise LookupError(f"'{topic}' için kayıtlı handler yok")
+        fn(db, messages)
+        result = db.execute(
+            update(o)
+            .where(tuple_(o.id, o.attempts).in_([(m.id, m.attempts) for m in messages]), o.status == "pending")
+            .values(status="done", processed_at=utcnow(), last_error=None)
+        )
+        if result.rowcount != len(messages):
+            db.rollback()
+            logger.warning("outbox: %s mesajlarının kirası doldu, sonuç başka worker'a bırakıldı", topic)
+            return False
+        db.commit()
+        return True
+
+def _fail(session_factory, message: Message, error: Exception):
+    o = models.OutboxMessage
+    values = {"last_error": f"{type(error).__name__}: {error}"[:1000]}
+    if message.attempts >= OUTBOX_MAX_ATTEMPTS:
+        values["status"] = "failed"
+    else:
+        values["available_at"] = utcnow() + timedelta(seconds=retry_delay(message.attempts))
+    with session_factory() as db:
+        db.execute(update(o).where(o.id == message.id, o.attempts == message.attempts).values(**values))
+        db.commit()
+
+def drain(session_factory=None, limit: int = OUTBOX_BATCH_SIZE) -> int:
+    """Bir batch claim edip işler; claim edilen mesaj sayısını döner."""
+    session_factory = session_factory or SessionLocal
+    with session_factory() as db:
+        messages = claim(db, limit)
+        db.commit()
+
+    by_topic: dict = {}
+    for message in messages:
+        by_topic.setdefault(message.topic, []).append(message)
+    for topic, group in by_topic.items():
+        try:
+            _process(session_factory, topic, group)
+        except Exception as exc:
+            if len(group) == 1:
+                logger.exception("outbox: %s mesajı #%s başarısız", topic, group[0].id)
+                _fail(session_factory, group[0], exc)
+            else:
+                # Batch hatası: hatalı mesaj diğerlerini bekletmesin
+                _process_each(session_factory, topic, group)
+    return len(messages)
+
+def _process_each(session_factory, topic: str, messages: list):
+    for message in messages:
+        try:
+            _process(session_factory, topic, [message])
+        except Exception as exc:
+            logger.exception("outbox: %s mesajı #%s başarısız", topic, message.id)
+            _fail(session_factory, message, exc)
+
+def purge(session_factory=None, retention_hours: float = OUTBOX_RETENTION_HOURS) -> int:
+    """Saklama süresi geçmiş işlenmiş mesajları siler; "failed" mesajlar incelenmek üzere kalır."""
+    o = models.OutboxMessage
+    session_factory = session_factory or SessionLocal
+    with session_factory() as db:
+        result = db.execute(delete(o).where(
+            o.status == "done", o.processed_at < utcnow() - timedelta(hours=retention_hours)
+        ))
+        db.commit()
+        return result.rowcount
+
+class Worker:
+    """Süreç içi asyncio worker: batch dolu geldikçe devam eder, sonra yeni commit'i ya da
+    OUTBOX_POLL_INTERVAL'ı bekler (başka süreçlerin yazdığı mesajlar için)."""
+    def __init__(self, session_factory=None):
+        self.session_factory = session_factory
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def start(self) -> asyncio.Task:
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="outbox-worker")
+        return self._task
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = self._loop = self._wakeup = None
+
+    def wake(self):
+        """Herhangi bir thread'den çağrılabilir; worker çalışmıyorsa bir şey yapmaz."""
+        loop, wakeup = self._loop, self._wakeup
+        if loop is not None and wakeup is not None:
+            try:
+                loop.call_soon_threadsafe(wakeup.set)
+            except RuntimeError:  # loop kapanmış
+                pass
+
+    async def _run(self):
+        last_purge = 0.0
+        while True:
+            # Drain sırasında gelen commit'ler event'i tekrar kurar, beklemeden bir tur daha döner
+            self._wakeup.clear()
+            try:
+                processed = await run_in_threadpool(drain, self.session_factory)
+                if time.monotonic() - last_purge > PURGE_INTERVAL:
+                    await run_in_threadpool(purge, self.session_factory)
+                    last_purge = time.monotonic()
+            except Exception:
+                logger.exception("outbox worker turu başarısız")
+                processed = 0
+            if processed >= OUTBOX_BATCH_SIZE:
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=OUTBOX_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+worker = Worker()
+
+def main():
+    # Handler'lar sahibi modüllerle birlikte kaydolur
+    from app import stats  # noqa: F401
+
+    parser = argparse.ArgumentParser(description="Outbox worker'ı (OUTBOX_WORKER=off ile ayrı süreç olarak)")
+    parser.add_argument("--once", action="store_true", help="kuyruğu bir kez boşaltıp çık")
+    parser.add_argument("--batch", type=int, default=OUTBOX_BATCH_SIZE)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    last_purge = 0.0
+    while True:
+        processed = drain(limit=args.batch)
+        if processed:
+            logger.info("outbox: %d mesaj işlendi", processed)
+        if time.monotonic() - last_purge > PURGE_INTERVAL:
+            purge()
+            last_purge = time.monotonic()
+        if processed < args.batch:
+            if args.once:
+                return
+            time.sleep(OUTBOX_POLL_INTERVAL)
+
+if __name__ == "__main__":
+    # `python -m` bu dosyayı __main__ olarak yükler; handler'ların kaydolduğu app.outbox'ı kullan
+    from app.outbox import main as run
+    run()
@@ -0,0 +1,40 @@
+"""Keyset (cursor) sayfalama için opak cursor kodlama.
+
+Cursor, son satırın sıralama anahtarlarının base64url(JSON) halidir; istemci içini yorumlamaz.
+"""
+import base64
+import json
+from datetime import datetime
+from fastapi import HTTPException
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+# Sayfa boyutu üst sınırı; cursor verilip limit verilmezse sayfa bu kadardır
+MAX_PAGE_SIZE = 100
+
+def encode_cursor(*values) -> str:
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, *types) -> tuple:
+    """Cursor'ı çözüp her değeri verilen tipe çevirir (int, str, datetime)."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError
+        return tuple(
+            datetime.fromisoformat(v) if t is datetime else t(v)
+            for t, v in zip(types, values)
+        )
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Geçersiz sayfalama cursor'ı")
+
+def next_cursor_headers(rows: list, limit, key) -> dict:
+    """Sayfa doluysa sonraki sayfanın cursor'ını içeren X-Next-Cursor header'ı."""
+    if limit and len(rows) == limit:
+        return {NEXT_CURSOR_HEADER: encode_cursor(*key(rows[-1]))}
+    return {}
+
+def set_next_cursor(response, rows: list, limit, key) -> None:
+    response.headers.update(next_cursor_headers(rows, limit, key))
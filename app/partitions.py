@@ -0,0 +1,143 @@
+"""service_records için aylık range partitioning (PostgreSQL, isteğe bağlı).
+
+Servis geçmişi zamanla en büyük tablodur; okumaları VIN + tarih üzerinden gider. Tabloyu `date`
+üzerinde aylık bölümlere ayırmak bölüm başına indeksleri küçük tutar, tarih aralıklı sorgular
+(istatistik, geçmiş) partition pruning ile sadece ilgili ayları okur, eski aylar VACUUM ve
+REINDEX'te sıcak aylardan bağımsızlaşır.
+
+    python -m app.partitions convert   # mevcut tabloyu bölümlü tabloya çevirir (bir kez, bakım penceresinde)
+    python -m app.partitions ensure    # önümüzdeki PARTITION_MONTHS_AHEAD ayın bölümlerini açar (cron)
+
+Dönüşüm tek transaction'dır: aynı kolonlarla PARTITION BY RANGE (date) tablo kurulur, ilk
+kaydın ayından PARTITION_MONTHS_AHEAD ay sonrasına kadar aylık bölümler ve bir DEFAULT bölüm
+açılır, satırlar kopyalanır ve tablolar yer değiştirir. Eski tablo service_records_unpartitioned
+adıyla kalır; doğruladıktan sonra elle silin. Bölümlü tabloda birincil anahtar (id, date) olur
+(PostgreSQL bölüm anahtarını PK'de ister, `date` NOT NULL olur); id'ler aynı sequence'tan gelir,
+uygulama kodu ve arşivleme (app.archive) değişmez. `ensure` bölümlenmemiş tabloda ve SQLite'ta
+hiçbir şey yapmaz.
+"""
+import argparse
+import os
+from datetime import date, datetime, timezone
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from app import models
+from app.database import engine
+
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+
+TABLE = models.ServiceRecord.__tablename__
+
+def _month(value) -> date:
+    return date(value.year, value.month, 1)
+
+def _next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+def _add_months(month: date, count: int) -> date:
+    for _ in range(count):
+        month = _next_month(month)
+    return month
+
+def _months(start: date, end: date) -> list:
+    months = [start]
+    while months[-1] < end:
+        months.append(_next_month(months[-1]))
+    return months
+
+def partition_name(month: date) -> str:
+    return f"{TABLE}_y{month.year:04d}m{month.month:02d}"
+
+def is_partitioned(conn: Connection) -> bool:
+    if conn.dialect.name != "postgresql":
+        return False
+    return conn.execute(
+        text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table)"), {"table": TABLE}
+    ).first() is not None
+
+def _create_partition(conn: Connection, parent: str, month: date):
+    # DDL'de bind parametresi yok; sınırlar tarihten üretilir
+    conn.exec_driver_sql(
+        f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF {parent} "
+        f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{_next_month(month).isoformat()} 00:00:00+00')"
+    )
+
+def _existing_partitions(conn: Connection) -> set:
+    return set(conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(:table)"
+    ), {"table": TABLE}).scalars())
+
+def ensure_partitions(conn: Connection, months_ahead: int = PARTITION_MONTHS_AHEAD) -> list:
+    """Bu ay ve sonraki `months_ahead` ay için eksik bölümleri açar; açılanların adlarını döner.
+
+    Bölüm, verisi gelmeden açılmalıdır: DEFAULT bölümde o aya ait satır varsa PostgreSQL yeni
+    bölümü reddeder."""
+    if not is_partitioned(conn):
+        return []
+    existing = _existing_partitions(conn)
+    this_month = _month(datetime.now(timezone.utc))
+    created = []
+    for month in _months(this_month, _add_months(this_month, max(months_ahead, 0))):
+        if partition_name(month) not in existing:
+            _create_partition(conn, TABLE, month)
+            created.append(partition_name(month))
+    return created
+
+def convert(conn: Connection, months_ahead: int = PARTITION_MONTHS_AHEAD) -> bool:
+    """service_records'u aylık bölümlü tabloya çevirir; zaten bölümlüyse False."""
+    if conn.dialect.name != "postgresql":
+        raise RuntimeError("service_records partitioning sadece PostgreSQL'de desteklenir.")
+    if is_partitioned(conn):
+        return False
+
+    staging, legacy = f"{TABLE}_partitioned", f"{TABLE}_unpartitioned"
+    columns = [column.name for column in models.ServiceRecord.__table__.columns]
+    conn.exec_driver_sql(f"LOCK TABLE {TABLE} IN ACCESS EXCLUSIVE MODE")
+    # Eski tablonun indeks adları yeni tabloya bırakılır (PK indeksi constraint'iyle birlikte)
+    for name in conn.execute(
+        text("SELECT indexname FROM pg_indexes WHERE schemaname = current_schema() AND tablename = :table"),
+        {"table": TABLE},
+    ).scalars():
+        conn.exec_driver_sql(f'ALTER INDEX "{name}" RENAME TO "{name}_old"')
+
+    conn.exec_driver_sql(f"CREATE TABLE {staging} (LIKE {TABLE} INCLUDING DEFAULTS) PARTITION BY RANGE (date)")
+    conn.exec_driver_sql(
+        f"ALTER TABLE {staging} ALTER COLUMN date SET NOT NULL, "
+        f"ADD CONSTRAINT {TABLE}_pkey PRIMARY KEY (id, date), "
+        f"ADD FOREIGN KEY (vehicle_vin) REFERENCES vehicles (vin) ON DELETE CASCADE"
+    )
+    first = conn.execute(text(f"SELECT min(date) FROM {TABLE}")).scalar()
+    now = datetime.now(timezone.utc)
+    start = _month(first.astimezone(timezone.utc) if first is not None else now)
+    for month in _months(start, _add_months(_month(now), months_ahead)):
+        _create_partition(conn, staging, month)
+    conn.exec_driver_sql(f"CREATE TABLE {TABLE}_default PARTITION OF {staging} DEFAULT")
+
+    selected = ", ".join("COALESCE(date, now())" if name == "date" else name for name in columns)
+    conn.exec_driver_sql(f"INSERT INTO {staging} ({', '.join(columns)}) SELECT {selected} FROM {TABLE}")
+    sequence = conn.execute(text("SELECT pg_get_serial_sequence(:table, 'id')"), {"table": TABLE}).scalar()
+    if sequence:
+        # Eski tablo silindiğinde sequence onunla gitmesin
+        conn.exec_driver_sql(f"ALTER SEQUENCE {sequence} OWNED BY {staging}.id")
+    conn.exec_driver_sql(f"ALTER TABLE {TABLE} RENAME TO {legacy}")
+    conn.exec_driver_sql(f"ALTER TABLE {staging} RENAME TO {TABLE}")
+    # models.py'deki indeksler bölümlü tabloda (her bölüme yayılarak) yeniden kurulur
+    for index in models.ServiceRecord.__table__.indexes:
+        index.create(conn)
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description="service_records aylık range partitioning (PostgreSQL).")
+    parser.add_argument("command", choices=("convert", "ensure"))
+    parser.add_argument("--months-ahead", type=int, default=PARTITION_MONTHS_AHEAD)
+    args = parser.parse_args()
+    with engine.begin() as conn:
+        if args.command == "convert":
+            print("dönüştürüldü" if convert(conn, args.months_ahead) else "zaten bölümlü")
+        else:
+            for name in ensure_partitions(conn, args.months_ahead):
+                print(name)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Geliştirme / test modu: istek başına SQL kaydı, N+1 tespiti ve sorgu bütçesi.
+
+QUERY_DEBUG=true iken QueryBudgetMiddleware her isteğin SQL ifadelerini engine event'leriyle
+kaydeder. Aynı SELECT şekli (parametreler ve IN listeleri normalize edilmiş hali) bir istekte
+N_PLUS_ONE_THRESHOLD kez çalışırsa N+1, route'un bütçesi aşılırsa bütçe ihlali olarak
+`violations` listesine yazılır ve loglanır. tests/test_api.py bu listeyi her testten sonra kontrol
+eder. Yanıtlara X-Query-Count header'ı eklenir.
+
+Bütçe: "METHOD /route/{şablonu}" → en fazla sorgu. ROUTE_QUERY_BUDGETS'ta olmayan route'lar
+QUERY_BUDGET'ı kullanır; QUERY_BUDGETS env'i (JSON) tabloyu ezer.
+"""
+import json
+import logging
+import os
+import re
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.metrics import route_template
+
+QUERY_DEBUG = os.getenv("QUERY_DEBUG", "false").lower() in ("1", "true", "yes")
+QUERY_BUDGET = int(os.getenv("QUERY_BUDGET", "10"))
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "3"))
+
+QUERY_COUNT_HEADER = "X-Query-Count"
+
+# Sıcak okuma yolları: kullanıcı lookup'ı (auth cache ıskalanırsa) + yetki + asıl sorgu
+ROUTE_QUERY_BUDGETS = {
+    "GET /users/me": 1,
+    "GET /vehicles/my-vehicles": 2,
+    "GET /vehicles/shared-with-me": 2,
+    "GET /vehicles/export": 2,
+    "GET /vehicles/stats": 2,
+    # SQLite'ta indeks kurulurken araçlar + açıklamalar + sayfa satırları
+    "GET /vehicles/search": 4,
+    "GET /vehicles/{vin}/stats": 3,
+    "GET /vehicles/{vin}/service-records": 3,
+    "GET /vehicles/{vin}/access": 3,
+    "GET /vehicles/deleted": 3,
+    "GET /vehicles/maintenance/due-soon": 3,
+    "GET /vehicles/{vin}/upcoming-maintenance": 3,
+    # Arşivden geri yükleme: üç arşiv tablosu için INSERT ... SELECT + DELETE (seyrek işlem)
+    "POST /vehicles/{vin}/restore": 14,
+}
+ROUTE_QUERY_BUDGETS.update(json.loads(os.getenv("QUERY_BUDGETS", "{}")))
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+# IN (?, ?, ?) / VALUES (...), (...) gibi uzunluğu parametreye bağlı listeler tek şekle iner
+_PARAM_LIST = re.compile(r"\(\s*(?:\?|%s|%\(\w+\)s|\$\d+|:\w+)(?:\s*,\s*(?:\?|%s|%\(\w+\)s|\$\d+|:\w+))*\s*\)")
+_NUMBER = re.compile(r"\b\d+\b")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+
+def statement_shape(statement: str) -> str:
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    shape = _STRING.sub("?", shape)
+    shape = _NUMBER.sub("?", shape)
+    return _PARAM_LIST.sub("(?)", shape)
+
+@dataclass
+class QueryRecorder:
+    statements: list = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.statements)
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> list:
+        """threshold kez ya da daha fazla tekrarlanan SELECT şekilleri: [(şekil, adet)]."""
+        shapes = Counter(
+            statement_shape(s) for s in self.statements if s.lstrip().upper().startswith(("SELECT", "WITH"))
+        )
+        return [(shape, count) for shape, count in shapes.most_common() if count >= threshold]
+
+    def problems(self, budget: int, threshold: int = N_PLUS_ONE_THRESHOLD) -> list:
+        result = []
+        if len(self) > budget:
+            result.append(f"{len(self)} sorgu, bütçe {budget}")
+        result += [f"N+1: {count}x {shape}" for shape, count in self.repeated(threshold)]
+        return result
+
+current_recorder: ContextVar[Optional[QueryRecorder]] = ContextVar("current_recorder", default=None)
+
+def _record_statement(conn, cursor, statement, parameters, context, executemany):
+    recorder = current_recorder.get()
+    if recorder is not None:
+        recorder.statements.append(statement)
+
+def install_recorder_hooks():
+    if not event.contains(Engine, "before_cursor_execute", _record_statement):
+        event.listen(Engine, "before_cursor_execute", _record_statement)
+
+def route_budget(method: str, template: str) -> int:
+    return ROUTE_QUERY_BUDGETS.get(f"{method} {template}", QUERY_BUDGET)
+
+# İhlaller (method, route, [sorun]) olarak birikir; testler her testten sonra boşaltır
+violations: list = []
+
+class QueryBudgetMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        recorder = QueryRecorder()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((QUERY_COUNT_HEADER.lower().encode(), str(len(recorder)).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = current_recorder.set(recorder)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_recorder.reset(token)
+            template = route_template(scope)
+            problems = recorder.problems(route_budget(scope["method"], template))
+            if problems:
+                violations.append((scope["method"], template, problems))
+                logger.warning("%s %s: %s", scope["method"], template, "; ".join(problems))
@@ -0,0 +1,221 @@
+"""/auth/login ve /auth/signup için token bucket rate limit.
+
+Her deneme bir bcrypt işi demektir; sınırsız deneme API'yi CPU ile kilitlemenin ucuz bir yoludur.
+RateLimitMiddleware bu istekleri route'a, DB'ye ve bcrypt'e ulaşmadan IP başına ve hesap
+(e-posta) başına iki bucket'tan geçirir; boş bucket'ta Retry-After ile 429 döner. Hesap anahtarı
+için gövde middleware'de okunur (en fazla RATE_LIMIT_MAX_BODY byte) ve uygulamaya aynen iletilir.
+
+Oran "adet/saniye" biçimindedir: "5/60" → en fazla 5 ardışık deneme, sonra 12 saniyede bir token.
+Boş ya da "0" o bucket'ı kapatır.
+
+Store: "memory" (süreç içi, kilitleri shard'lanmış), "none" ya da `paket.modul:fabrika`. Fabrika
+`take(key, rate) -> retry_after` (senkron ya da awaitable) ve `clear()` metotları olan bir nesne
+döndürmelidir. Memory store süreç içidir: WEB_CONCURRENCY worker'da etkin sınır worker sayısıyla
+çarpılır; paylaşılan sınır için ortak bir store kullanın.
+"""
+import inspect
+import json
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from importlib import import_module
+from typing import Optional
+from urllib.parse import parse_qs
+from starlette.routing import Match
+from app.serialization import dumps
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_SHARDS = int(os.getenv("RATE_LIMIT_SHARDS", "16"))
+RATE_LIMIT_KEYS = int(os.getenv("RATE_LIMIT_KEYS", "100000"))
+RATE_LIMIT_MAX_BODY = int(os.getenv("RATE_LIMIT_MAX_BODY", "65536"))
+# Sadece güvenilen bir reverse proxy arkasında: istemci IP'si X-Forwarded-For'un son elemanı
+RATE_LIMIT_TRUST_FORWARDED = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "false").lower() in ("1", "true", "yes")
+
+@dataclass(frozen=True)
+class Rate:
+    capacity: float
+    period: float
+
+    @property
+    def refill(self) -> float:
+        """Saniyede eklenen token."""
+        return self.capacity / self.period
+
+    @classmethod
+    def parse(cls, spec: str) -> Optional["Rate"]:
+        count, _, period = (spec or "0").partition("/")
+        if float(count) <= 0:
+            return None
+        return cls(float(count), float(period or 1))
+
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    ip: Optional[Rate]
+    account: Optional[Rate]
+    account_field: str
+
+RULES = {
+    ("POST", "/auth/login"): Rule(
+        "login",
+        Rate.parse(os.getenv("RATE_LIMIT_LOGIN_IP", "20/60")),
+        Rate.parse(os.getenv("RATE_LIMIT_LOGIN_ACCOUNT", "5/60")),
+        "username",
+    ),
+    ("POST", "/auth/signup"): Rule(
+        "signup",
+        Rate.parse(os.getenv("RATE_LIMIT_SIGNUP_IP", "10/60")),
+        Rate.parse(os.getenv("RATE_LIMIT_SIGNUP_ACCOUNT", "3/60")),
+        "email",
+    ),
+}
+
+class MemoryStore:
+    """Süreç içi bucket'lar; anahtarlar shard'lara dağılır, her shard'ın kendi kilidi ve LRU'su var."""
+    def __init__(self, shards: int = RATE_LIMIT_SHARDS, max_keys: int = RATE_LIMIT_KEYS):
+        self._shards = [(threading.Lock(), OrderedDict()) for _ in range(shards)]
+        # LRU'dan düşen anahtar dolu bucket'la yeniden başlar: uzun süre sessiz kalan anahtarlar düşer
+        self._max_per_shard = max(1, max_keys // shards)
+
+    def take(self, key: str, rate: Rate) -> float:
+        """Bir token harcar; izin varsa 0, yoksa tekrar denemeden önce beklenecek saniye."""
+        lock, buckets = self._shards[hash(key) % len(self._shards)]
+        now = time.monotonic()
+        with lock:
+            tokens, updated = buckets.get(key, (rate.capacity, now))
+            tokens = min(rate.capacity, tokens + (now - updated) * rate.refill)
+            if tokens >= 1:
+                buckets[key] = (tokens - 1, now)
+                retry_after = 0.0
+            else:
+                buckets[key] = (tokens, now)
+                retry_after = (1 - tokens) / rate.refill
+            buckets.move_to_end(key)
+            if len(buckets) > self._max_per_shard:
+                buckets.popitem(last=False)
+            return retry_after
+
+    def clear(self):
+        for lock, buckets in self._shards:
+            with lock:
+                buckets.clear()
+
+class NullStore:
+    def take(self, key: str, rate: Rate) -> float:
+        return 0.0
+
+    def clear(self):
+        pass
+
+def load_store(spec: str):
+    if spec == "memory":
+        return MemoryStore()
+    if spec in ("none", "off", ""):
+        return NullStore()
+    module_name, _, attr = spec.partition(":")
+    return getattr(import_module(module_name), attr)()
+
+store = load_store(RATE_LIMIT_BACKEND)
+
+def client_ip(scope) -> str:
+    if RATE_LIMIT_TRUST_FORWARDED:
+        for name, value in scope["headers"]:
+            if name == b"x-forwarded-for":
+                # Proxy kendi gördüğü adresi sona ekler; baştaki değerleri istemci uydurabilir
+                return value.decode("latin-1").split(",")[-1].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+def account_key(content_type: str, body: bytes, field: str) -> Optional[str]:
+    """Form (login) ya da JSON (signup) gövdesinden hesap alanı; okunamazsa None (sadece IP sınırı)."""
+    try:
+        if content_type.startswith("application/x-www-form-urlencoded"):
+            value = parse_qs(body.decode("utf-8")).get(field, [None])[0]
+        elif content_type.startswith("application/json"):
+            payload = json.loads(body)
+            value = payload.get(field) if isinstance(payload, dict) else None
+        else:
+            return None
+    except (UnicodeDecodeError, ValueError, RecursionError):
+        # Bozuk ya da aşırı iç içe gövde: doğrulamayı FastAPI yapar (400/422), burada sadece IP sınırı
+        return None
+    return value.strip().lower() if isinstance(value, str) and value.strip() else None
+
+class RateLimitMiddleware:
+    """Saf ASGI middleware; RULES dışındaki istekler için tek bir dict lookup'ı."""
+    def __init__(self, app, rules: dict = RULES, store=None):
+        self.app = app
+        self.rules = rules
+        self.store = store
+
+    async def _take(self, key: str, rate: Optional[Rate]) -> float:
+        if rate is None:
+            return 0.0
+        retry_after = (self.store or store).take(key, rate)
+        if inspect.isawaitable(retry_after):
+            retry_after = await retry_after
+        return retry_after
+
+    async def __call__(self, scope, receive, send):
+        rule = self.rules.get((scope.get("method"), scope.get("path"))) if scope["type"] == "http" else None
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+
+        retry_after = await self._take(f"{rule.name}:ip:{client_ip(scope)}", rule.ip)
+        messages = []
+        if not retry_after and rule.account is not None:
+            messages, body, complete = await self._read_body(receive)
+            content_type = next((v.decode("latin-1") for k, v in scope["headers"] if k == b"content-type"), "")
+            account = account_key(content_type, body, rule.account_field) if complete else None
+            if account is not None:
+                retry_after = await self._take(f"{rule.name}:account:{account}", rule.account)
+
+        if retry_after:
+            await self._reject(scope, send, retry_after)
+            return
+
+        async def replay():
+            # Okunan gövde uygulamaya aynen verilir; kalan mesajlar asıl receive'den gelir
+            return messages.pop(0) if messages else await receive()
+
+        await self.app(scope, replay, send)
+
+    @staticmethod
+    async def _read_body(receive) -> tuple:
+        messages, size = [], 0
+        while True:
+            message = await receive()
+            messages.append(message)
+            if message["type"] != "http.request":
+                return messages, b"", False
+            size += len(message.get("body", b""))
+            if not message.get("more_body", False):
+                return messages, b"".join(m.get("body", b"") for m in messages), True
+            if size > RATE_LIMIT_MAX_BODY:
+                return messages, b"", False
+
+    @staticmethod
+    async def _reject(scope, send, retry_after: float):
+        # Metrikler 429'ları "unmatched" yerine asıl route şablonuyla saysın
+        app = scope.get("app")
+        for route in getattr(getattr(app, "router", None), "routes", []):
+            if route.matches(scope)[0] == Match.FULL:
+                scope["route"] = route
+                break
+        seconds = max(1, math.ceil(retry_after))
+        body = dumps({"detail": f"Çok fazla deneme. Lütfen {seconds} saniye sonra tekrar deneyin."})
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(seconds).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
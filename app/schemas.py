@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field, field_validator
-from typing import Optional
+from typing import Any, Dict, List, Optional
 from uuid import UUID
 from datetime import datetime
 import re
@@ -29,6 +29,14 @@ class UserOut(BaseModel):
     class Config:
         from_attributes = True
 
+USER_ROLES = ("driver", "admin")
+
+class UserBanUpdate(BaseModel):
+    is_banned: bool
+
+class UserRoleUpdate(BaseModel):
+    role: str = Field(..., pattern="^(" + "|".join(USER_ROLES) + ")$")
+
 class VehicleBase(BaseModel):
     vin: str = Field(..., min_length=4, max_length=17)
     brand: str = Field(..., min_length=1)
@@ -99,4 +107,141 @@ class VehicleAccessOutWithEmail(BaseModel):
     permission: str
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class BulkRowError(BaseModel):
+    row: int
+    vin: Optional[str] = None
+    errors: List[str]
+
+class BulkImportResult(BaseModel):
+    total: int
+    inserted: int
+    failed: int
+    errors: List[BulkRowError]
+    errors_truncated: bool = False
+
+class ServiceRecordBatchItem(ServiceRecordCreate):
+    vin: str
+
+class ServiceRecordBatch(BaseModel):
+    # Kayıtlar tek tek doğrulanır; hatalı olanlar raporlanır, diğerleri eklenir
+    records: List[Dict[str, Any]] = Field(..., min_length=1, max_length=1000)
+
+class ServiceRecordBatchCreated(BaseModel):
+    row: int
+    id: int
+    vin: str
+
+class ServiceRecordBatchResult(BaseModel):
+    total: int
+    inserted: int
+    failed: int
+    created: List[ServiceRecordBatchCreated]
+    errors: List[BulkRowError]
+
+class VehicleStatsOut(BaseModel):
+    vin: str
+    current_mileage: int
+    service_count: int
+    total_cost: int
+    avg_cost: Optional[float] = None
+    cost_per_km: Optional[float] = None
+    first_service_date: Optional[datetime] = None
+    last_service_date: Optional[datetime] = None
+    avg_km_between_services: Optional[float] = None
+    avg_days_between_services: Optional[float] = None
+
+class GarageStatsOut(BaseModel):
+    vehicle_count: int
+    service_count: int
+    total_cost: int
+    vehicles: List[VehicleStatsOut]
+
+class VehicleSearchResult(VehicleOut):
+    rank: float
+
+class DeletedVehicleOut(BaseModel):
+    vin: str
+    brand: str
+    model: str
+    year: int
+    deleted_at: Optional[datetime] = None
+    archived: bool
+
+class MaintenanceEstimateOut(BaseModel):
+    vin: str
+    service: str
+    service_count: int
+    last_service_date: datetime
+    last_service_mileage: int
+    km_interval: Optional[float] = None
+    days_interval: Optional[float] = None
+    next_mileage: Optional[int] = None
+    km_remaining: Optional[int] = None
+    due_date: Optional[datetime] = None
+    status: str
+
+# --- ORGANİZASYON / FİLO ---
+
+class OrganizationCreate(BaseModel):
+    name: str = Field(..., min_length=1, max_length=100)
+
+class OrganizationOut(BaseModel):
+    id: UUID
+    name: str
+    role: str
+
+class OrganizationMemberCreate(BaseModel):
+    email: EmailStr
+    role: str = Field(default="member", pattern="^(admin|member)$")
+
+class OrganizationMemberOut(BaseModel):
+    user_id: UUID
+    email: EmailStr
+    role: str
+
+class FleetCreate(BaseModel):
+    name: str = Field(..., min_length=1, max_length=100)
+
+class FleetOut(BaseModel):
+    id: int
+    name: str
+    vehicle_count: int = 0
+
+class FleetVehiclesAdd(BaseModel):
+    vins: List[str] = Field(..., min_length=1, max_length=5000)
+
+class FleetVehiclesResult(BaseModel):
+    added: int
+    # Sahibi olunmayan, silinmiş ya da bulunamayan VIN'ler
+    not_found: List[str]
+
+class FleetGrantCreate(BaseModel):
+    organization_id: UUID
+    permission: str = Field(default="viewer", pattern="^(viewer|editor|driver)$")
+
+class FleetGrantOut(BaseModel):
+    organization_id: UUID
+    organization_name: str
+    permission: str
+
+# --- TELEMETRİ ---
+
+class OdometerReadingIn(BaseModel):
+    vin: str
+    timestamp: datetime
+    odometer: int = Field(..., ge=0)
+
+class OdometerBatch(BaseModel):
+    readings: List[OdometerReadingIn] = Field(..., min_length=1, max_length=10000)
+
+class OdometerIngestResult(BaseModel):
+    accepted: int
+    rejected: List[str]
+
+class OdometerBucketOut(BaseModel):
+    bucket_start: datetime
+    min_odometer: int
+    max_odometer: int
+    readings: int
@@ -0,0 +1,266 @@
+"""Araç araması: marka, model, renk (bulanık), VIN öneki ve servis açıklamaları (tam metin).
+
+Kullanıcının sahip olduğu ve kendisiyle paylaşılan, silinmemiş araçlar aranır. Sıralama puanı:
+
+- VIN öneki eşleşirse 1.0
+- marka / model / renk için trigram benzerliği (pg_trgm `similarity`)
+- servis açıklamalarından biri sorgunun tüm kelimelerini içeriyorsa 0.5
+
+En yüksek olanı kullanılır. Sayfalama (puan azalan, VIN artan) keyset cursor'ı ile yapılır.
+
+PostgreSQL'de sorgu pg_trgm GIN (marka / model / renk), to_tsvector GIN (açıklama) ve
+varchar_pattern_ops (VIN öneki) indekslerini kullanır (bkz. alembic d4a9f1e3b7c2). Diğer
+veritabanlarında (SQLite) kullanıcının araçları için süreç içi bir TrigramIndex kurulur. İndeks
+kullanıcının yanıt cache'i nesliyle anahtarlanır (araç yazmaları onu geçersiz kılar). Servis
+kaydı yazmaları `records_changed` ile o aracı içeren indeksleri düşürür; diğer worker'larda
+eskime SEARCH_INDEX_TTL ile sınırlıdır.
+"""
+import bisect
+import heapq
+import os
+import re
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass, field
+from uuid import UUID
+from sqlalchemy import Float, and_, case, cast, exists, func, literal_column, or_, select
+from sqlalchemy.orm import Session
+from app import crud, models
+from app.cache import response_cache
+from app.pagination import decode_cursor
+
+SEARCH_INDEX_USERS = int(os.getenv("SEARCH_INDEX_USERS", "1000"))
+SEARCH_INDEX_TTL = float(os.getenv("SEARCH_INDEX_TTL", "30"))
+
+# pg_trgm.similarity_threshold varsayılanı; `%` operatörü ile aynı eşik
+SIMILARITY_THRESHOLD = 0.3
+VIN_PREFIX_RANK = 1.0
+DESCRIPTION_RANK = 0.5
+TEXT_FIELDS = ("brand", "model", "color")
+
+_WORD = re.compile(r"[^\W_]+")
+
+def words(text: str) -> list:
+    return _WORD.findall((text or "").lower())
+
+def trigrams(text: str) -> set:
+    """pg_trgm ile aynı: kelime başına "  kelime " dolgusu ve 3'lü kesitler."""
+    result = set()
+    for word in words(text):
+        padded = f"  {word} "
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return result
+
+def similarity(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    shared = len(a & b)
+    return shared / (len(a) + len(b) - shared)
+
+def normalize_query(q: str) -> str:
+    return " ".join(q.split())
+
+# --- PostgreSQL: GIN indeksli tek sorgu ---
+
+def _accessible(user_id: UUID):
+    v = models.Vehicle
+    shared = select(models.VehicleAccess.vehicle_vin).where(models.VehicleAccess.user_id == user_id)
+    fleets = select(models.FleetGrant.fleet_id).join(
+        models.OrganizationMember, models.OrganizationMember.organization_id == models.FleetGrant.organization_id
+    ).where(models.OrganizationMember.user_id == user_id)
+    return and_(v.is_deleted == False, or_(v.owner_id == user_id, v.vin.in_(shared), v.fleet_id.in_(fleets)))
+
+def search_query(user_id: UUID, q: str, limit: int = 20, cursor: str = None):
+    v = models.Vehicle
+    r = models.ServiceRecord
+    prefix = q.upper().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    pattern = "%" + q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    fields = [getattr(v, name) for name in TEXT_FIELDS]
+
+    vin_match = v.vin.like(prefix, escape="\\")
+    description_match = exists().where(
+        r.vehicle_vin == v.vin,
+        models.search_vector(r.description).op("@@")(func.plainto_tsquery(literal_column("'simple'::regconfig"), q)),
+    )
+    rank = cast(func.greatest(
+        case((vin_match, VIN_PREFIX_RANK), else_=0.0),
+        *(func.coalesce(func.similarity(column, q), 0.0) for column in fields),
+        case((description_match, DESCRIPTION_RANK), else_=0.0),
+    ), Float).label("rank")
+
+    hits = (
+        select(*crud.VEHICLE_OUT_COLUMNS, rank)
+        .where(
+            _accessible(user_id),
+            or_(
+                vin_match,
+                *(column.op("%")(q) for column in fields),
+                *(column.ilike(pattern, escape="\\") for column in fields),
+                description_match,
+            ),
+        )
+        .subquery()
+    )
+    query = select(hits)
+    if cursor:
+        after_rank, after_vin = decode_cursor(cursor, float, str)
+        query = query.where(or_(
+            hits.c.rank < after_rank,
+            and_(hits.c.rank == after_rank, hits.c.vin > after_vin),
+        ))
+    return query.order_by(hits.c.rank.desc(), hits.c.vin).limit(limit)
+
+# --- SQLite vb.: süreç içi indeks ---
+
+@dataclass
+class TrigramIndex:
+    """Bir kullanıcının erişebildiği araçların aranabilir hali.
+
+    Marka / model / renk değerleri araçlar arasında çok tekrarlandığından trigram'lar farklı
+    metinler üzerinden tutulur; benzerlik her metin için bir kez hesaplanıp araçlara yayılır.
+    """
+    vins: list = field(default_factory=list)                             # sıralı, VIN öneki için
+    text_vins: dict = field(default_factory=lambda: defaultdict(set))    # küçük harf metin -> {vin}
+    text_trigrams: dict = field(default_factory=dict)                    # metin -> trigramlar
+    postings: dict = field(default_factory=lambda: defaultdict(set))     # trigram -> {metin}
+    word_postings: dict = field(default_factory=lambda: defaultdict(set))  # kelime -> {(vin, kayıt id)}
+
+    @classmethod
+    def build(cls, vehicles, records) -> "TrigramIndex":
+        index = cls()
+        for vin, *texts in vehicles:
+            index.vins.append(vin)
+            for text in texts:
+                if text:
+                    index.text_vins[text.lower()].add(vin)
+        index.vins.sort()
+        for text in index.text_vins:
+            grams = trigrams(text)
+            index.text_trigrams[text] = grams
+            for gram in grams:
+                index.postings[gram].add(text)
+        for record_id, vin, description in records:
+            for word in set(words(description)):
+                index.word_postings[word].add((vin, record_id))
+        return index
+
+    def __contains__(self, vin: str) -> bool:
+        position = bisect.bisect_left(self.vins, vin)
+        return position < len(self.vins) and self.vins[position] == vin
+
+    def _vin_prefix(self, q: str) -> list:
+        prefix = q.upper()
+        start = bisect.bisect_left(self.vins, prefix)
+        end = bisect.bisect_left(self.vins, prefix + "\U0010ffff", start)
+        return self.vins[start:end]
+
+    def _description_matches(self, q: str) -> set:
+        terms = set(words(q))
+        if not terms:
+            return set()
+        records = set.intersection(*(self.word_postings.get(term, set()) for term in terms))
+        return {vin for vin, _ in records}
+
+    def search(self, q: str) -> dict:
+        """{vin: puan} — sıralama ve sayfalama çağırana kalır."""
+        query_grams = trigrams(q)
+        needle = q.lower()
+        by_vin = dict.fromkeys(self._vin_prefix(q), VIN_PREFIX_RANK)
+        for vin in self._description_matches(q):
+            by_vin[vin] = max(by_vin.get(vin, 0.0), DESCRIPTION_RANK)
+
+        # Sadece sorguyla trigram paylaşan metinlere bakılır (GIN indeksinin yaptığı gibi)
+        candidates = set().union(*(self.postings.get(gram, ()) for gram in query_grams))
+        scored = [(similarity(query_grams, self.text_trigrams[text]), text) for text in candidates]
+        for score, text in scored:
+            if score >= SIMILARITY_THRESHOLD or needle in text:
+                for vin in self.text_vins[text]:
+                    if by_vin.get(vin, 0.0) < score:
+                        by_vin[vin] = score
+        return by_vin
+
+class SearchIndexCache:
+    """user_id -> (nesil, kurulma zamanı, TrigramIndex); LRU."""
+    def __init__(self, maxsize: int = SEARCH_INDEX_USERS, ttl: float = SEARCH_INDEX_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[UUID, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: UUID, generation: int):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            entry_generation, built_at, index = entry
+            if entry_generation != generation or built_at + self.ttl < time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return index
+
+    def set(self, user_id: UUID, generation: int, index: TrigramIndex):
+        with self._lock:
+            self._entries[user_id] = (generation, time.monotonic(), index)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def drop_vin(self, vin: str):
+        with self._lock:
+            for user_id in [uid for uid, (_, _, index) in self._entries.items() if vin in index]:
+                del self._entries[user_id]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+index_cache = SearchIndexCache()
+
+def records_changed(*vins: str):
+    """Servis kaydı eklendi / silindi: bu araçları içeren süreç içi indeksler yeniden kurulur."""
+    for vin in set(vins):
+        index_cache.drop_vin(vin)
+
+def _build_index(db: Session, user_id: UUID) -> TrigramIndex:
+    v = models.Vehicle
+    r = models.ServiceRecord
+    vehicles = db.execute(select(v.vin, *(getattr(v, name) for name in TEXT_FIELDS)).where(_accessible(user_id))).all()
+    vins = [row[0] for row in vehicles]
+    records = db.execute(
+        select(r.id, r.vehicle_vin, r.description).where(r.vehicle_vin.in_(vins))
+    ).all() if vins else []
+    return TrigramIndex.build(vehicles, records)
+
+def _search_fallback(db: Session, user_id: UUID, q: str, limit: int, cursor: str) -> list:
+    generation = response_cache.generation(user_id)
+    index = index_cache.get(user_id, generation)
+    if index is None:
+        index = _build_index(db, user_id)
+        index_cache.set(user_id, generation, index)
+
+    # Sıralama anahtarı (-puan, vin); sayfa için sadece ilk `limit` tanesi seçilir
+    keys = ((-rank, vin) for vin, rank in index.search(q).items())
+    if cursor:
+        after_rank, after_vin = decode_cursor(cursor, float, str)
+        keys = (key for key in keys if key > (-after_rank, after_vin))
+    ranks = {vin: -negative_rank for negative_rank, vin in heapq.nsmallest(limit, keys)}
+    if not ranks:
+        return []
+
+    rows = crud.row_dicts(db.execute(
+        select(*crud.VEHICLE_OUT_COLUMNS).where(models.Vehicle.vin.in_(ranks), _accessible(user_id))
+    ))
+    for row in rows:
+        row["rank"] = ranks[row["vin"]]
+    return sorted(rows, key=lambda row: (-row["rank"], row["vin"]))
+
+def search_vehicles(db: Session, user_id: UUID, q: str, limit: int = 20, cursor: str = None) -> list:
+    """Puan sıralı araç satırları (VehicleOut alanları + rank)."""
+    q = normalize_query(q)
+    if not q:
+        return []
+    if db.get_bind().dialect.name == "postgresql":
+        return crud.row_dicts(db.execute(search_query(user_id, q, limit=limit, cursor=cursor)))
+    return _search_fallback(db, user_id, q, limit, cursor)
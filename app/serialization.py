@@ -0,0 +1,36 @@
+"""Liste endpoint'leri için hızlı JSON yolu.
+
+Sütun projeksiyonu ile gelen düz satırlar (dict) ORM nesnesine dönüştürülmeden ve Pydantic ile
+tekrar doğrulanmadan doğrudan JSON byte'larına yazılır. orjson kuruluysa o, değilse stdlib json
+kullanılır; çıktı response_model'in ürettiğiyle aynıdır (UUID metin, datetime ISO 8601, UTC "Z").
+"""
+import json
+from datetime import date, datetime
+from uuid import UUID
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # orjson yoksa stdlib json'a düş
+    orjson = None
+
+def _default(value):
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, datetime):
+        text = value.isoformat()
+        return text[:-6] + "Z" if text.endswith("+00:00") else text
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} JSON'a çevrilemez")
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -0,0 +1,152 @@
+"""Araç bakım maliyeti ve kilometre istatistikleri (SQL aggregate + window function).
+
+Ortalama servis aralığı, tarihe göre sıralı kayıtlar arasındaki farkların ortalamasıdır;
+bu toplam teleskopik olduğundan (son - ilk) / (n - 1) ile aynıdır. İlk ve son kaydın
+kilometresi first_value() window'u ile bulunur.
+
+STATS_SUMMARY=true ise sonuçlar vehicle_stats tablosundan okunur. Tek kayıt eklemesi özete
+istek içinde artımlı işlenir; VIN bazında yeniden hesaplama (silme, toplu ekleme, geçmiş
+tarihli kayıt) outbox'a bırakılır ve worker tarafından yapılır (bkz. app.outbox).
+"""
+import os
+from uuid import UUID
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+from app import models, outbox
+
+STATS_SUMMARY = os.getenv("STATS_SUMMARY", "false").lower() in ("1", "true", "yes")
+
+STAT_COLUMNS = [
+    "service_count", "total_cost", "cost_count", "min_mileage", "max_mileage",
+    "first_date", "last_date", "first_mileage", "last_mileage",
+]
+
+def aggregate_query(vin_filter):
+    """VIN başına aggregate satırı. vin_filter: VIN listesi ya da VIN döndüren bir select."""
+    r = models.ServiceRecord
+    ordered = (
+        select(
+            r.vehicle_vin, r.mileage, r.cost, r.date,
+            func.first_value(r.mileage).over(
+                partition_by=r.vehicle_vin, order_by=(r.date, r.id)
+            ).label("first_mileage"),
+            func.first_value(r.mileage).over(
+                partition_by=r.vehicle_vin, order_by=(r.date.desc(), r.id.desc())
+            ).label("last_mileage"),
+        )
+        .where(r.vehicle_vin.in_(vin_filter))
+        .subquery()
+    )
+    return (
+        select(
+            ordered.c.vehicle_vin,
+            func.count().label("service_count"),
+            func.coalesce(func.sum(ordered.c.cost), 0).label("total_cost"),
+            func.count(ordered.c.cost).label("cost_count"),
+            func.min(ordered.c.mileage).label("min_mileage"),
+            func.max(ordered.c.mileage).label("max_mileage"),
+            func.min(ordered.c.date).label("first_date"),
+            func.max(ordered.c.date).label("last_date"),
+            func.max(ordered.c.first_mileage).label("first_mileage"),
+            func.max(ordered.c.last_mileage).label("last_mileage"),
+        )
+        .group_by(ordered.c.vehicle_vin)
+    )
+
+def _stats_source(vin_filter):
+    if STATS_SUMMARY:
+        return select(models.VehicleStats).where(models.VehicleStats.vehicle_vin.in_(vin_filter)).subquery()
+    return aggregate_query(vin_filter).subquery()
+
+def _garage_query(vehicle_filter, vin_filter):
+    v = models.Vehicle
+    agg = _stats_source(vin_filter)
+    return (
+        select(v.vin, v.mileage, *(agg.c[name] for name in STAT_COLUMNS))
+        .outerjoin(agg, agg.c.vehicle_vin == v.vin)
+        .where(vehicle_filter, v.is_deleted == False)
+        .order_by(v.vin)
+    )
+
+def build_stats(row) -> dict:
+    count = row.service_count or 0
+    total_cost = row.total_cost or 0
+    tracked_to = max(row.mileage or 0, row.max_mileage or 0)
+    km_covered = tracked_to - row.min_mileage if count else 0
+    intervals = count - 1
+    return {
+        "vin": row.vin,
+        "current_mileage": row.mileage,
+        "service_count": count,
+        "total_cost": total_cost,
+        "avg_cost": round(total_cost / row.cost_count, 2) if row.cost_count else None,
+        "cost_per_km": round(total_cost / km_covered, 4) if km_covered > 0 else None,
+        "first_service_date": row.first_date,
+        "last_service_date": row.last_date,
+        "avg_km_between_services": round((row.last_mileage - row.first_mileage) / intervals, 1) if intervals > 0 else None,
+        "avg_days_between_services": (
+            round((row.last_date - row.first_date).total_seconds() / 86400 / intervals, 1) if intervals > 0 else None
+        ),
+    }
+
+def get_vehicle_stats(db: Session, vehicle_vin: str) -> dict:
+    row = db.execute(_garage_query(models.Vehicle.vin == vehicle_vin, [vehicle_vin])).first()
+    return build_stats(row) if row else None
+
+def get_garage_stats(db: Session, user_id: UUID) -> dict:
+    owned = select(models.Vehicle.vin).where(models.Vehicle.owner_id == user_id)
+    vehicles = [build_stats(row) for row in db.execute(_garage_query(models.Vehicle.owner_id == user_id, owned))]
+    return {
+        "vehicle_count": len(vehicles),
+        "service_count": sum(v["service_count"] for v in vehicles),
+        "total_cost": sum(v["total_cost"] for v in vehicles),
+        "vehicles": vehicles,
+    }
+
+# --- ÖZET TABLO BAKIMI (STATS_SUMMARY) ---
+# Çağıran transaction'ın içinde çalışır; commit crud tarafındadır (outbox'ta drain).
+
+def refresh_summary(db: Session, vins: list):
+    """Verilen VIN'lerin özet satırlarını servis kayıtlarından yeniden hesaplar."""
+    if not STATS_SUMMARY or not vins:
+        return
+    db.execute(delete(models.VehicleStats).where(models.VehicleStats.vehicle_vin.in_(vins)))
+    db.execute(insert(models.VehicleStats).from_select(["vehicle_vin", *STAT_COLUMNS], aggregate_query(vins)))
+
+def schedule_refresh(db: Session, vins: list):
+    """Yeniden hesaplamayı mutasyonla aynı transaction'da outbox'a yazar (tek INSERT)."""
+    if not STATS_SUMMARY or not vins:
+        return
+    outbox.enqueue(db, "stats.refresh", {"vins": sorted(vins)})
+
+@outbox.handler("stats.refresh")
+def _refresh_job(db: Session, messages: list):
+    # Batch'teki tüm mesajların VIN'leri tek yeniden hesaplamada birleşir
+    refresh_summary(db, sorted({vin for message in messages for vin in message.payload["vins"]}))
+
+def record_added(db: Session, record: models.ServiceRecord):
+    """Tek kayıt eklemesini özet satırına artımlı olarak işler (min/max/toplam)."""
+    if not STATS_SUMMARY:
+        return
+    summary = db.scalar(
+        select(models.VehicleStats)
+        .where(models.VehicleStats.vehicle_vin == record.vehicle_vin)
+        .with_for_update()
+    )
+    if summary is None:
+        schedule_refresh(db, [record.vehicle_vin])
+        return
+
+    # Yeni kayıt en güncel tarihli değilse ilk/son sıralaması değişir: VIN'i yeniden hesapla
+    if record.date is None or record.date < summary.last_date:
+        schedule_refresh(db, [record.vehicle_vin])
+        return
+
+    summary.service_count += 1
+    summary.min_mileage = min(summary.min_mileage, record.mileage)
+    summary.max_mileage = max(summary.max_mileage, record.mileage)
+    if record.cost is not None:
+        summary.total_cost += record.cost
+        summary.cost_count += 1
+    summary.last_date = record.date
+    summary.last_mileage = record.mileage
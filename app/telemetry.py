@@ -0,0 +1,255 @@
+"""Kilometre telemetrisi: toplu ingest, bellek içi tampon, toplu flush ve örneklenmiş okuma.
+
+POST /telemetry/odometer (vin, timestamp, odometer) okumalarını batch olarak alır; istek başına
+tek yetki sorgusundan sonra okumalar süreç içi tampona eklenir ve 202 döner. Tampon okumaları
+(VIN, saniye) anahtarıyla birleştirir: aynı saniyedeki tekrarlar ve yeniden gönderimler tek
+satırdır.
+
+Flush (`flush`), tamponu tek transaction'da yazar:
+- okumalar odometer_readings'e çok satırlı INSERT ... ON CONFLICT DO NOTHING ile eklenir;
+- her VIN için flush'taki en son okuma Vehicle.mileage'a tek executemany UPDATE ile yazılır
+  (okuma başına değil). Kilometre sadece artar; geç gelen eski okuma değeri düşürmez;
+- değişen araçlar için change feed olayı ve yanıt cache'i düşürme, araç başına bir kez.
+Flush'ı süreç içi bir asyncio görevi (`flusher`) her TELEMETRY_FLUSH_INTERVAL saniyede ya da
+tampon TELEMETRY_FLUSH_SIZE okumaya ulaşınca çalıştırır; kapanışta kalan okumalar yazılır.
+Tampon TELEMETRY_MAX_BUFFER okumayı aşarsa ingest 503 + Retry-After ile geri iter. Tampon
+bellektedir: süreç çökerse son flush'tan sonraki okumalar kaybolur (istemciler tekrar
+gönderebilir, PK tekrarları yutar).
+
+GET /telemetry/{vin}/odometer aralığı zaman kovalarına böler ve kova başına min / max / sayı döner;
+gruplama veritabanında yapılır, satırlar Python'a gelmez.
+"""
+import asyncio
+import logging
+import math
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from uuid import UUID
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app import crud, events, models
+from app.cache import response_cache
+from app.database import SessionLocal
+
+TELEMETRY_FLUSH_INTERVAL = float(os.getenv("TELEMETRY_FLUSH_INTERVAL", "1"))
+TELEMETRY_FLUSH_SIZE = int(os.getenv("TELEMETRY_FLUSH_SIZE", "20000"))
+TELEMETRY_MAX_BUFFER = int(os.getenv("TELEMETRY_MAX_BUFFER", "500000"))
+# Örneklenmiş okumada en fazla bu kadar kova (bucket verilmezse kova süresi buna göre seçilir)
+TELEMETRY_MAX_POINTS = 500
+
+# Okuma gönderebilen roller (sahip her zaman)
+WRITE_PERMISSIONS = ("driver", "editor")
+# Tek IN listesindeki VIN sayısı (SQLite bind parametresi sınırının altında)
+VIN_CHUNK = 5000
+
+logger = logging.getLogger(__name__)
+
+def _utc_second(value: datetime) -> datetime:
+    # Saatsiz zaman damgaları UTC kabul edilir; Timestamp saniye hassasiyetindedir
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).replace(microsecond=0)
+
+class TelemetryBuffer:
+    """Thread-safe okuma tamponu: (vin, saniye) -> kilometre."""
+    def __init__(self, max_readings: int = TELEMETRY_MAX_BUFFER):
+        self.max_readings = max_readings
+        self._readings: dict = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._readings)
+
+    def add(self, readings: list) -> Optional[int]:
+        """(vin, datetime, odometer) listesini ekler; tampon doluysa hiçbirini eklemez ve None,
+        aksi halde tampondaki okuma sayısını döner."""
+        with self._lock:
+            if len(self._readings) + len(readings) > self.max_readings:
+                return None
+            for vin, recorded_at, odometer in readings:
+                self._readings[(vin, _utc_second(recorded_at))] = odometer
+            return len(self._readings)
+
+    def take(self) -> dict:
+        with self._lock:
+            readings, self._readings = self._readings, {}
+        return readings
+
+    def put_back(self, readings: dict):
+        """Yazılamayan okumalar; o arada gelen daha yeni değerler korunur."""
+        with self._lock:
+            for key, odometer in readings.items():
+                self._readings.setdefault(key, odometer)
+
+    def clear(self):
+        with self._lock:
+            self._readings.clear()
+
+buffer = TelemetryBuffer()
+
+def _chunks(items: list, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+# --- INGEST ---
+
+def writable_vins(db: Session, vins: list, user_id: UUID) -> set:
+    """Kullanıcının okuma gönderebileceği VIN'ler (sahip, driver, editor); tek sorgu."""
+    roles = crud.get_vehicle_roles(db, vins, user_id)
+    return {vin for vin, role in roles.items() if role == "owner" or role in WRITE_PERMISSIONS}
+
+def ingest(db: Session, readings: list, user_id: UUID) -> Optional[dict]:
+    """Yetkili VIN'lerin okumalarını tampona ekler; tampon doluysa None."""
+    allowed = writable_vins(db, sorted({reading.vin for reading in readings}), user_id)
+    accepted = [(r.vin, r.timestamp, r.odometer) for r in readings if r.vin in allowed]
+    if accepted:
+        size = buffer.add(accepted)
+        if size is None:
+            return None
+        if size >= TELEMETRY_FLUSH_SIZE:
+            flusher.wake()
+    return {
+        "accepted": len(accepted),
+        "rejected": sorted({reading.vin for reading in readings} - allowed),
+    }
+
+# --- FLUSH ---
+
+def _insert_readings(db: Session, rows: list):
+    dialect = db.get_bind().dialect.name
+    dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    db.execute(dialect_insert(models.OdometerReading.__table__).on_conflict_do_nothing(), rows)
+
+def _apply_mileage(db: Session, latest: dict) -> dict:
+    """Her VIN'in son okumasını mevcut kilometreden büyükse yazar; {vin: yeni kilometre} döner."""
+    v = models.Vehicle
+    changed = {}
+    for vins in _chunks(sorted(latest), VIN_CHUNK):
+        current = db.execute(select(v.vin, v.mileage).where(v.vin.in_(vins), v.is_deleted == False))
+        changed.update({vin: latest[vin] for vin, mileage in current if latest[vin] > mileage})
+    if changed:
+        table = v.__table__
+        db.execute(
+            update(table)
+            .where(table.c.vin == bindparam("b_vin"), table.c.mileage < bindparam("b_mileage"))
+            .values(mileage=bindparam("b_mileage")),
+            [{"b_vin": vin, "b_mileage": mileage} for vin, mileage in changed.items()],
+        )
+    return changed
+
+def flush(session_factory=None) -> int:
+    """Tampondaki okumaları yazar; yazılan (birleştirilmiş) okuma sayısını döner. Hata olursa
+    okumalar tampona geri konur."""
+    readings = buffer.take()
+    if not readings:
+        return 0
+    latest = {}
+    for (vin, recorded_at), odometer in readings.items():
+        if vin not in latest or recorded_at > latest[vin][0]:
+            latest[vin] = (recorded_at, odometer)
+    rows = [
+        {"vehicle_vin": vin, "recorded_at": recorded_at, "odometer": odometer}
+        for (vin, recorded_at), odometer in readings.items()
+    ]
+    try:
+        with (session_factory or SessionLocal)() as db:
+            _insert_readings(db, rows)
+            changed = _apply_mileage(db, {vin: odometer for vin, (_, odometer) in latest.items()})
+            audiences = {}
+            for vins in _chunks(sorted(changed), VIN_CHUNK):
+                audiences.update(events.audiences(db, vins))
+            for vin, mileage in changed.items():
+                events.publish(db, vin, "vehicle.updated", {"changes": {"mileage": mileage}}, recipients=audiences[vin])
+            db.commit()
+    except Exception:
+        buffer.put_back(readings)
+        raise
+    if changed:
+        response_cache.bump(*{user_id for users in audiences.values() for user_id in users})
+    return len(rows)
+
+class Flusher:
+    """Süreç içi asyncio görevi: TELEMETRY_FLUSH_INTERVAL'da bir ya da tampon dolunca flush."""
+    def __init__(self, session_factory=None):
+        self.session_factory = session_factory
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def start(self) -> asyncio.Task:
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="telemetry-flusher")
+        return self._task
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = self._loop = self._wakeup = None
+        # Kapanış: tamponda kalanlar yazılır
+        await run_in_threadpool(flush, self.session_factory)
+
+    def wake(self):
+        """Herhangi bir thread'den çağrılabilir; flusher çalışmıyorsa bir şey yapmaz."""
+        loop, wakeup = self._loop, self._wakeup
+        if loop is not None and wakeup is not None:
+            try:
+                loop.call_soon_threadsafe(wakeup.set)
+            except RuntimeError:  # loop kapanmış
+                pass
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=TELEMETRY_FLUSH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await run_in_threadpool(flush, self.session_factory)
+            except Exception:
+                logger.exception("telemetri flush başarısız, okumalar tamponda bekliyor")
+
+flusher = Flusher()
+
+# --- OKUMA ---
+
+def bucket_seconds(start: datetime, end: datetime, bucket: Optional[int] = None) -> int:
+    """Verilmezse aralığı en fazla TELEMETRY_MAX_POINTS kovaya bölen süre (en az 60 sn)."""
+    if bucket:
+        return bucket
+    return max(60, math.ceil((end - start).total_seconds() / TELEMETRY_MAX_POINTS))
+
+def odometer_series(db: Session, vehicle_vin: str, start: datetime, end: datetime, bucket: int) -> list:
+    """[start, end) aralığında kova başına min / max kilometre ve okuma sayısı (PK aralık taraması)."""
+    r = models.OdometerReading
+    slot = (crud.epoch_seconds(db, r.recorded_at) // bucket).label("slot")
+    rows = db.execute(
+        select(slot, func.min(r.odometer), func.max(r.odometer), func.count())
+        .where(r.vehicle_vin == vehicle_vin, r.recorded_at >= _utc_second(start), r.recorded_at < _utc_second(end))
+        .group_by(slot)
+        .order_by(slot)
+    )
+    return [
+        {
+            "bucket_start": datetime.fromtimestamp(int(slot) * bucket, tz=timezone.utc),
+            "min_odometer": low,
+            "max_odometer": high,
+            "readings": count,
+        }
+        for slot, low, high, count in rows
+    ]
+
+def default_range(start: Optional[datetime], end: Optional[datetime]) -> tuple:
+    """Varsayılan son 7 gün; saatsiz değerler UTC kabul edilir (karşılaştırılabilir olsunlar)."""
+    end = _utc_second(end) if end else datetime.now(timezone.utc)
+    return _utc_second(start) if start else end - timedelta(days=7), end
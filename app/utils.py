@@ -10,9 +10,19 @@ load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY", "fallback-dev-key-change-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+# bcrypt cost faktörü; değişirse eski hash'ler login sırasında yeniden hash'lenir
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
 
-def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+def hash_password(password: str, rounds: Optional[int] = None) -> str:
+    salt = bcrypt.gensalt(rounds or BCRYPT_ROUNDS)
+    return bcrypt.hashpw(password.encode("utf-8"), salt).decode("utf-8")
+
+def hash_rounds(hashed_password: str) -> int:
+    # Format: $2b$<cost>$<salt+hash>
+    return int(hashed_password.split("$")[2])
+
+def needs_rehash(hashed_password: str) -> bool:
+    return hash_rounds(hashed_password) != BCRYPT_ROUNDS
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(plain_password.encode("utf-8"), hashed_password.encode("utf-8"))
@@ -22,4 +32,14 @@ def create_access_token(data: dict):
     expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
\ No newline at end of file
+    return encoded_jwt
+
+def user_token_claims(user) -> dict:
+    # get_current_user bu alanlarla DB'ye gitmeden doğrulama yapar (bkz. app.auth_cache)
+    return {
+        "sub": user.email,
+        "uid": str(user.id),
+        "role": user.role or "driver",
+        "banned": bool(user.is_banned),
+        "ver": user.token_version or 0,
+    }
@@ -0,0 +1 @@
+"""Vastarion Garage benchmark'ları — `python -m benchmarks.<modül>` ile çalıştırılır."""
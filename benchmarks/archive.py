@@ -0,0 +1,94 @@
+"""Silinmiş araçlar sıcak tablolarda kalırken ve arşive taşındıktan sonra sık sorgular.
+
+    python -m benchmarks.archive --live 2000 --deleted 20000 --records 5
+
+Canlı araçların yanında (silinmiş oranı yüksek bir garajda) --deleted kadar silinmiş araç ve
+servis kayıtları tohumlanır; garaj listesi, servis geçmişi ve garaj istatistiği arşivlemeden önce
+ve sonra ölçülür. Arşivleme süresi ve taşınan satır sayısı da raporlanır.
+"""
+import argparse
+import json
+import os
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+
+from sqlalchemy import insert
+
+from app import archive, crud, models, stats
+from app.database import Base, engine, SessionLocal
+from benchmarks.common import percentile
+
+def seed(live: int, deleted: int, records: int) -> tuple:
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    owner_id = uuid.uuid4()
+    expired = datetime.now(timezone.utc) - timedelta(days=archive.ARCHIVE_RETENTION_DAYS + 1)
+    vins = [f"ARCH{i:013d}" for i in range(live + deleted)]
+    with engine.begin() as conn:
+        conn.execute(insert(models.User), [{"id": owner_id, "email": "owner@vastarion.com", "hashed_password": "x"}])
+        conn.execute(insert(models.Vehicle), [
+            {"vin": vin, "brand": "Ford", "model": "Transit", "year": 2000 + i % 25, "mileage": 0,
+             "owner_id": owner_id, "is_deleted": i >= live, "deleted_at": expired if i >= live else None}
+            for i, vin in enumerate(vins)
+        ])
+        conn.execute(insert(models.ServiceRecord), [
+            {"vehicle_vin": vin, "description": "Periyodik bakım", "mileage": 1000 * (n + 1), "cost": 100}
+            for vin in vins for n in range(records)
+        ])
+        conn.exec_driver_sql("ANALYZE")
+    return owner_id, vins[:live]
+
+def timed(fn, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return {"p50_ms": round(percentile(samples, 50) * 1000, 3), "p95_ms": round(percentile(samples, 95) * 1000, 3)}
+
+def measure(owner_id, live_vins: list, repeat: int) -> dict:
+    rng = random.Random(7)
+    db = SessionLocal()
+    try:
+        return {
+            "my_vehicles": timed(lambda: crud.get_user_vehicles(db, owner_id), max(5, repeat // 20)),
+            "service_records": timed(lambda: crud.get_service_records(db, rng.choice(live_vins)), repeat),
+            "garage_stats": timed(lambda: stats.get_garage_stats(db, owner_id), max(5, repeat // 20)),
+        }
+    finally:
+        db.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--live", type=int, default=2000)
+    parser.add_argument("--deleted", type=int, default=20000)
+    parser.add_argument("--records", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    owner_id, live_vins = seed(args.live, args.deleted, args.records)
+    results = {"before": measure(owner_id, live_vins, args.repeat)}
+    started = time.perf_counter()
+    moved = archive.archive_deleted()
+    results["archive"] = {"vehicles": moved, "seconds": round(time.perf_counter() - started, 2)}
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ANALYZE")
+    results["after"] = measure(owner_id, live_vins, args.repeat)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for phase, values in results.items():
+        print(phase)
+        for name, value in values.items():
+            if isinstance(value, dict):
+                value = "  ".join(f"{k}={v}" for k, v in value.items())
+            print(f"{name:>18}  {value}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""/vehicles/my-vehicles için senkron ve async (DB_ASYNC) yolların yük karşılaştırması.
+
+    python -m benchmarks.async_vs_sync --requests 2000 --concurrency 64
+    DATABASE_URL=postgresql://... python -m benchmarks.async_vs_sync
+
+DATABASE_URL verilmezse ./bench.db (SQLite) kullanılır. İstekler ASGI uygulamasına
+in-process (httpx ASGITransport) gönderilir; senkron handler'lar Starlette threadpool'unda koşar.
+"""
+import argparse
+import asyncio
+import json
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+os.environ["DB_ASYNC"] = "true"
+
+import httpx
+
+from app import models, utils
+from app.database import Base, engine, SessionLocal, async_engine
+from main import create_app
+from benchmarks.common import run_load
+
+def seed(vehicle_count: int) -> str:
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        user = models.User(email="bench@vastarion.com", hashed_password=utils.hash_password("Bench123"))
+        db.add(user)
+        db.flush()
+        db.add_all([
+            models.Vehicle(
+                vin=f"BENCH{i:012d}", brand="BMW", model="M5", year=1990 + i % 35,
+                mileage=i * 10, owner_id=user.id, is_deleted=False,
+            )
+            for i in range(vehicle_count)
+        ])
+        db.commit()
+        return utils.create_access_token(data={"sub": user.email})
+    finally:
+        db.close()
+
+async def bench(db_async: bool, token: str, requests: int, concurrency: int) -> dict:
+    app = create_app(db_async=db_async)
+    transport = httpx.ASGITransport(app=app)
+    headers = {"Authorization": f"Bearer {token}"}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Isınma: bağlantı havuzu ve import maliyetleri ölçüme girmesin
+        await run_load(client, "GET", "/vehicles/my-vehicles", requests=concurrency, concurrency=concurrency, headers=headers)
+        return await run_load(client, "GET", "/vehicles/my-vehicles", requests=requests,
+                              concurrency=concurrency, headers=headers)
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--vehicles", type=int, default=200)
+    parser.add_argument("--json", action="store_true", help="Sonucu JSON olarak yaz")
+    args = parser.parse_args()
+
+    token = seed(args.vehicles)
+    results = {
+        "sync": await bench(False, token, args.requests, args.concurrency),
+        "async": await bench(True, token, args.requests, args.concurrency),
+    }
+    await async_engine.dispose()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'path':<6} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for name, r in results.items():
+        print(f"{name:<6} {r['req_per_sec']:>9} {r['p50_ms']:>9} {r['p99_ms']:>9} {r['errors']:>7}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,82 @@
+"""get_current_user'ın istek başına ürettiği DB sorgusu sayısı: eski (email lookup) ve cache'li token.
+
+    python -m benchmarks.auth_queries --requests 1000
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+
+import httpx
+from sqlalchemy import event
+
+from app import models, utils
+from app.auth_cache import user_cache
+from app.database import Base, engine, SessionLocal
+from main import create_app
+
+def seed():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        user = models.User(email="bench@vastarion.com", hashed_password=utils.hash_password("Bench123", 4))
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+        return {
+            # Önceki davranış: sadece sub (email) → her istekte users tablosunda email araması
+            "legacy_email_lookup": utils.create_access_token(data={"sub": user.email}),
+            "cached_uid_token": utils.create_access_token(data=utils.user_token_claims(user)),
+        }
+    finally:
+        db.close()
+
+async def measure(client, token: str, requests: int) -> dict:
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    headers = {"Authorization": f"Bearer {token}"}
+    user_cache.clear()
+
+    event.listen(engine, "before_cursor_execute", listener)
+    started = time.perf_counter()
+    try:
+        for _ in range(requests):
+            resp = await client.get("/users/me", headers=headers)
+            assert resp.status_code == 200, resp.text
+    finally:
+        elapsed = time.perf_counter() - started
+        event.remove(engine, "before_cursor_execute", listener)
+    return {
+        "requests": requests,
+        "queries": len(statements),
+        "queries_per_request": round(len(statements) / requests, 4),
+        "req_per_sec": round(requests / elapsed, 1),
+    }
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    tokens = seed()
+    transport = httpx.ASGITransport(app=create_app(db_async=False))
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        results = {name: await measure(client, token, args.requests) for name, token in tokens.items()}
+    saved = results["legacy_email_lookup"]["queries"] - results["cached_uid_token"]["queries"]
+    results["queries_saved_per_request"] = round(saved / args.requests, 4)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for name in tokens:
+        r = results[name]
+        print(f"{name:<20} queries/request={r['queries_per_request']:<7} req/s={r['req_per_sec']}")
+    print(f"queries saved per request: {results['queries_saved_per_request']}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
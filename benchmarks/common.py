@@ -0,0 +1,43 @@
+"""Benchmark'lar için ortak yardımcılar: gecikme istatistikleri ve in-process yük üretici."""
+import asyncio
+import time
+from typing import Optional
+
+def percentile(samples: list, pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def summarize(latencies: list, elapsed: float) -> dict:
+    """Saniye cinsinden gecikme listesinden req/s ve ms cinsinden p50/p95/p99 üretir."""
+    return {
+        "requests": len(latencies),
+        "req_per_sec": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+async def run_load(client, method: str, url: str, *, requests: int, concurrency: int,
+                   headers: Optional[dict] = None, **request_kwargs) -> dict:
+    """`requests` adet isteği en fazla `concurrency` eşzamanlı olacak şekilde gönderir."""
+    latencies = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            resp = await client.request(method, url, headers=headers, **request_kwargs)
+            latencies.append(time.perf_counter() - start)
+            if resp.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    result = summarize(latencies, time.perf_counter() - started)
+    result["errors"] = errors
+    return result
@@ -0,0 +1,108 @@
+"""Bir filoyu ekiple paylaşmak: araç başına VehicleAccess satırları ve tek FleetGrant.
+
+    python -m benchmarks.fleets --vehicles 5000 --team 50
+
+flat: her araç × her ekip üyesi için bir VehicleAccess satırı (eski yol).
+fleet: araçlar bir filoda, filo ekibin organizasyonuna tek satırla verilmiş.
+Her iki durumda da ekip üyesinin araç yetki kontrolü ve shared-with-me sorgusu ölçülür.
+"""
+import argparse
+import json
+import os
+import random
+import time
+import uuid
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+
+from sqlalchemy import func, insert, select
+
+from app import crud, models
+from app.database import Base, engine, SessionLocal
+from benchmarks.common import percentile
+
+def seed(vehicle_count: int, team: int, mode: str) -> tuple:
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    owner_id = uuid.uuid4()
+    member_ids = [uuid.uuid4() for _ in range(team)]
+    vins = [f"FLEET{i:012d}" for i in range(vehicle_count)]
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        conn.execute(insert(models.User), [
+            {"id": user_id, "email": f"user{i}@vastarion.com", "hashed_password": "x"}
+            for i, user_id in enumerate([owner_id, *member_ids])
+        ])
+        fleet_id = None
+        if mode == "fleet":
+            organization_id = uuid.uuid4()
+            conn.execute(insert(models.Organization), [{"id": organization_id, "name": "Ekip"}])
+            conn.execute(insert(models.OrganizationMember), [
+                {"organization_id": organization_id, "user_id": user_id, "role": "member"} for user_id in member_ids
+            ])
+            fleet_id = conn.execute(
+                insert(models.Fleet).values(name="Filo", owner_id=owner_id).returning(models.Fleet.id)
+            ).scalar()
+            conn.execute(insert(models.FleetGrant), [
+                {"fleet_id": fleet_id, "organization_id": organization_id, "permission": "driver"}
+            ])
+        conn.execute(insert(models.Vehicle), [
+            {"vin": vin, "brand": "Ford", "model": "Transit", "year": 2020, "mileage": 0,
+             "owner_id": owner_id, "is_deleted": False, "fleet_id": fleet_id}
+            for vin in vins
+        ])
+        if mode == "flat":
+            for user_id in member_ids:
+                conn.execute(insert(models.VehicleAccess), [
+                    {"vehicle_vin": vin, "user_id": user_id, "permission": "driver"} for vin in vins
+                ])
+        grant_rows = conn.scalar(select(func.count()).select_from(models.VehicleAccess)) + conn.scalar(
+            select(func.count()).select_from(models.FleetGrant)
+        )
+        conn.exec_driver_sql("ANALYZE")
+    return member_ids, vins, grant_rows, time.perf_counter() - started
+
+def timed(fn, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return {"p50_ms": round(percentile(samples, 50) * 1000, 3), "p95_ms": round(percentile(samples, 95) * 1000, 3)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vehicles", type=int, default=5000)
+    parser.add_argument("--team", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    results = {}
+    rng = random.Random(7)
+    for mode in ("flat", "fleet"):
+        member_ids, vins, grant_rows, seed_s = seed(args.vehicles, args.team, mode)
+        member_id = member_ids[0]
+        db = SessionLocal()
+        try:
+            results[mode] = {
+                "grant_rows": grant_rows,
+                "seed_s": round(seed_s, 2),
+                "role_check": timed(lambda: crud.get_vehicle_role(db, rng.choice(vins), member_id), args.repeat),
+                "shared_with_me": timed(lambda: crud.get_shared_vehicles(db, member_id), max(5, args.repeat // 20)),
+            }
+        finally:
+            db.close()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for mode, values in results.items():
+        print(mode)
+        for name, value in values.items():
+            if isinstance(value, dict):
+                value = "  ".join(f"{k}={v}" for k, v in value.items())
+            print(f"{name:>18}  {value}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,10 @@
+"""Filo ölçeğinde yük testi: veri üretici, senaryolar ve endpoint başına gecikme raporu.
+
+    python -m benchmarks.load --users 200 --vehicles 2000 --records 20000
+    python -m benchmarks.load --mode uvicorn --workers 2 --out report.json
+    python -m benchmarks.load --compare baseline.json   # p95 / req/s gerilemesinde çıkış kodu 1
+
+Senaryolar (--scenarios ile seçilir): login_storm, dashboard_refresh, service_record_writes,
+sharing_churn. İstekler ASGI uygulamasına in-process (httpx ASGITransport) ya da alt süreçte
+başlatılan uvicorn'a HTTP ile gönderilir.
+"""
@@ -0,0 +1,143 @@
+"""Yük testini çalıştırır: veri üretir, senaryoları sırayla koşar ve raporu yazar."""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+
+import httpx
+
+from app.database import engine
+from benchmarks.load import __doc__ as package_doc
+from benchmarks.load.report import compare, metadata, print_table, scenario_summary
+from benchmarks.load.scenarios import SCENARIOS, Recorder
+from benchmarks.load.seed import seed
+
+async def run_scenario(client, scenario, iterations: int, concurrency: int) -> dict:
+    recorder = Recorder()
+    remaining = iter(range(iterations))
+
+    async def worker():
+        # Ortak iterator: her worker sıradaki iterasyonu alır, toplam `iterations` kez koşulur
+        for _ in remaining:
+            await scenario.run(client, recorder)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return scenario_summary(recorder, iterations, time.perf_counter() - started)
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_uvicorn(workers: int, db_async: bool) -> tuple:
+    port = _free_port()
+    env = {**os.environ, "DB_ASYNC": "true" if db_async else "false"}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        env=env,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("uvicorn başlatılamadı")
+        try:
+            if httpx.get(url + "/").status_code == 200:
+                return process, url
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("uvicorn 30 saniyede hazır olmadı")
+
+async def run(args, fleet) -> dict:
+    process = None
+    if args.mode == "uvicorn":
+        process, url = start_uvicorn(args.workers, args.db_async)
+        client = httpx.AsyncClient(base_url=url, timeout=60, limits=httpx.Limits(max_connections=args.concurrency))
+    else:
+        from main import create_app
+        client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=create_app(db_async=args.db_async)), base_url="http://load", timeout=60
+        )
+
+    results = {}
+    try:
+        async with client:
+            for name in args.scenarios:
+                rng = random.Random(f"{args.seed}:{name}")
+                scenario = SCENARIOS[name](fleet, rng)
+                # Isınma: bağlantı havuzu, import ve cache ilk doldurma maliyeti ölçüme girmesin
+                await run_scenario(client, scenario, args.warmup, min(args.warmup, args.concurrency) or 1)
+                results[name] = await run_scenario(client, scenario, args.iterations, args.concurrency)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=package_doc.splitlines()[0])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--vehicles", type=int, default=2000)
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--shares-per-vehicle", type=float, default=1.5)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help="virgülle ayrılmış senaryo listesi: " + ", ".join(SCENARIOS))
+    parser.add_argument("--iterations", type=int, default=500, help="senaryo başına")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--mode", choices=("inprocess", "uvicorn"), default="inprocess")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn modu: worker sayısı")
+    parser.add_argument("--db-async", action="store_true", help="DB_ASYNC handler'ları")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", help="raporu bu dosyaya JSON olarak yaz")
+    parser.add_argument("--json", action="store_true", help="raporu stdout'a JSON olarak yaz")
+    parser.add_argument("--compare", help="önceki rapor: gerileme varsa çıkış kodu 1")
+    parser.add_argument("--threshold", type=float, default=0.2, help="gerileme eşiği (0.2 = %%20)")
+    args = parser.parse_args()
+    args.scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"bilinmeyen senaryo: {', '.join(sorted(unknown))}")
+
+    started = time.perf_counter()
+    fleet = seed(args.users, args.vehicles, args.records, args.shares_per_vehicle, seed=args.seed)
+    report = {"meta": metadata(args, engine.dialect.name)}
+    report["meta"]["seed_s"] = round(time.perf_counter() - started, 1)
+    report["scenarios"] = asyncio.run(run(args, fleet))
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_table(report)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        before, now = baseline.get("meta", {}), report["meta"]
+        for key in ("mode", "workers", "db_async", "users", "vehicles", "records", "concurrency"):
+            if before.get("config", {}).get(key) != now["config"][key]:
+                print(f"UYARI: {key} farklı ({before.get('config', {}).get(key)} -> {now['config'][key]})", file=sys.stderr)
+        if before.get("dialect") != now["dialect"]:
+            print(f"UYARI: veritabanı farklı ({before.get('dialect')} -> {now['dialect']})", file=sys.stderr)
+        regressions = compare(report, baseline, args.threshold)
+        for line in regressions:
+            print("REGRESSION", line, file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
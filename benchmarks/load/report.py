@@ -0,0 +1,72 @@
+"""Yük testi raporu (JSON) ve iki rapor arasında gerileme karşılaştırması."""
+import platform
+import subprocess
+from datetime import datetime, timezone
+
+from benchmarks.common import percentile
+
+def endpoint_summary(stats, elapsed: float) -> dict:
+    latencies = stats.latencies
+    return {
+        "requests": len(latencies),
+        "req_per_sec": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "errors": stats.errors,
+        "statuses": {str(code): count for code, count in sorted(stats.statuses.items())},
+    }
+
+def scenario_summary(recorder, iterations: int, elapsed: float) -> dict:
+    requests = sum(len(stats.latencies) for stats in recorder.endpoints.values())
+    return {
+        "iterations": iterations,
+        "elapsed_s": round(elapsed, 3),
+        "iter_per_sec": round(iterations / elapsed, 1) if elapsed else 0.0,
+        "req_per_sec": round(requests / elapsed, 1) if elapsed else 0.0,
+        "errors": sum(stats.errors for stats in recorder.endpoints.values()),
+        "endpoints": {
+            label: endpoint_summary(stats, elapsed) for label, stats in sorted(recorder.endpoints.items())
+        },
+    }
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+def metadata(args, dialect: str) -> dict:
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "dialect": dialect,
+        "config": vars(args),
+    }
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """p95 `threshold` oranından fazla arttıysa ya da req/s o kadar düştüyse gerileme satırları."""
+    regressions = []
+    for scenario, result in current["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(scenario)
+        if not before:
+            continue
+        for label, now in result["endpoints"].items():
+            was = before["endpoints"].get(label)
+            if not was:
+                continue
+            if was["p95_ms"] and now["p95_ms"] > was["p95_ms"] * (1 + threshold):
+                regressions.append(f"{scenario} {label}: p95 {was['p95_ms']} -> {now['p95_ms']} ms")
+            if was["req_per_sec"] and now["req_per_sec"] < was["req_per_sec"] * (1 - threshold):
+                regressions.append(f"{scenario} {label}: req/s {was['req_per_sec']} -> {now['req_per_sec']}")
+    return regressions
+
+def print_table(report: dict):
+    print(f"{'scenario / endpoint':<58} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>6}")
+    for scenario, result in report["scenarios"].items():
+        print(f"{scenario:<58} {result['req_per_sec']:>8} {'':>8} {'':>8} {'':>8} {result['errors']:>6}")
+        for label, r in result["endpoints"].items():
+            print(f"  {label:<56} {r['req_per_sec']:>8} {r['p50_ms']:>8} {r['p95_ms']:>8} {r['p99_ms']:>8} {r['errors']:>6}")
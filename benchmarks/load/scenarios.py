@@ -0,0 +1,129 @@
+"""Senaryolar: her biri tek bir kullanıcı etkileşimini (bir iterasyon) birkaç istekle oynatır.
+
+İstekler route şablonu etiketiyle kaydedilir (ör. "GET /vehicles/{vin}/service-records"), böylece
+rapor VIN'den bağımsız endpoint başına gecikme verir.
+"""
+import random
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+
+from benchmarks.load.seed import PASSWORD, PERMISSIONS, Fleet
+
+OK_STATUSES = frozenset({200, 201, 204, 304})
+
+@dataclass
+class EndpointStats:
+    latencies: list = field(default_factory=list)
+    statuses: Counter = field(default_factory=Counter)
+    errors: int = 0
+
+class Recorder:
+    def __init__(self):
+        self.endpoints = defaultdict(EndpointStats)
+
+    async def request(self, client, label: str, method: str, url: str, *, token: str = None,
+                      expected=OK_STATUSES, headers: dict = None, **kwargs):
+        headers = dict(headers or {})
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        start = time.perf_counter()
+        resp = await client.request(method, url, headers=headers, **kwargs)
+        stats = self.endpoints[label]
+        stats.latencies.append(time.perf_counter() - start)
+        stats.statuses[resp.status_code] += 1
+        if resp.status_code not in expected:
+            stats.errors += 1
+        return resp
+
+class Scenario:
+    name = ""
+
+    def __init__(self, fleet: Fleet, rng: random.Random):
+        self.fleet = fleet
+        self.rng = rng
+
+    async def run(self, client, recorder: Recorder):
+        raise NotImplementedError
+
+class LoginStorm(Scenario):
+    """Vardiya başı: çok sayıda kullanıcı aynı anda giriş yapar (bcrypt havuzu + 503 geri basıncı)."""
+    name = "login_storm"
+
+    async def run(self, client, recorder):
+        user = self.rng.randrange(len(self.fleet.emails))
+        await recorder.request(
+            client, "POST /auth/login", "POST", "/auth/login",
+            data={"username": self.fleet.emails[user], "password": PASSWORD},
+            # 429: rate limit (RATE_LIMIT_ENABLED=false ile ham bcrypt kapasitesi ölçülür), 503: bcrypt kuyruğu dolu
+            expected=OK_STATUSES | {429, 503},
+        )
+
+class DashboardRefresh(Scenario):
+    """Panel yenileme: profil, araçlar, paylaşılanlar ve istatistik; istemci ETag'leri saklar."""
+    name = "dashboard_refresh"
+    PAGES = [
+        ("GET /users/me", "/users/me"),
+        ("GET /vehicles/my-vehicles", "/vehicles/my-vehicles"),
+        ("GET /vehicles/shared-with-me", "/vehicles/shared-with-me"),
+        ("GET /vehicles/stats", "/vehicles/stats"),
+    ]
+
+    def __init__(self, fleet, rng):
+        super().__init__(fleet, rng)
+        self.etags = {}
+
+    async def run(self, client, recorder):
+        user = self.rng.randrange(len(self.fleet.tokens))
+        for label, url in self.PAGES:
+            etag = self.etags.get((user, url))
+            resp = await recorder.request(
+                client, label, "GET", url, token=self.fleet.tokens[user],
+                headers={"If-None-Match": etag} if etag else None,
+            )
+            if "etag" in resp.headers:
+                self.etags[(user, url)] = resp.headers["etag"]
+
+class ServiceRecordWrites(Scenario):
+    """Atölye: araca servis kaydı ekler ve geçmişin ilk sayfasını okur."""
+    name = "service_record_writes"
+
+    async def run(self, client, recorder):
+        owner = self.rng.choice(self.fleet.owners)
+        vin = self.rng.choice(self.fleet.owned[owner])
+        token = self.fleet.tokens[owner]
+        await recorder.request(
+            client, "POST /vehicles/{vin}/service-records", "POST", f"/vehicles/{vin}/service-records",
+            token=token, json={"description": "Yağ değişimi", "mileage": self.rng.randrange(200000), "cost": 1500},
+        )
+        await recorder.request(
+            client, "GET /vehicles/{vin}/service-records", "GET", f"/vehicles/{vin}/service-records",
+            token=token, params={"limit": 20},
+        )
+
+class SharingChurn(Scenario):
+    """Paylaşım döngüsü: sahip aracı birine açar, yetki listesine bakar ve yetkiyi geri alır."""
+    name = "sharing_churn"
+
+    async def run(self, client, recorder):
+        owner = self.rng.choice(self.fleet.owners)
+        vin = self.rng.choice(self.fleet.owned[owner])
+        # Seed'deki paylaşımlara dokunmamak için araçta yetkisi olmayan bir kullanıcı seçilir
+        taken = self.fleet.shared.get(vin, set()) | {owner}
+        target = next((t for t in (self.rng.randrange(len(self.fleet.emails)) for _ in range(10)) if t not in taken), None)
+        if target is None:
+            return
+        token = self.fleet.tokens[owner]
+        await recorder.request(
+            client, "POST /vehicles/{vin}/share", "POST", f"/vehicles/{vin}/share", token=token,
+            json={"email": self.fleet.emails[target], "permission": self.rng.choice(PERMISSIONS)},
+        )
+        await recorder.request(client, "GET /vehicles/{vin}/access", "GET", f"/vehicles/{vin}/access", token=token)
+        # Eşzamanlı iki iterasyon aynı çifti seçebilir: ikinci geri alma 404 alır
+        await recorder.request(
+            client, "DELETE /vehicles/{vin}/access/{target_user_id}", "DELETE",
+            f"/vehicles/{vin}/access/{self.fleet.user_ids[target]}", token=token,
+            expected=OK_STATUSES | {404},
+        )
+
+SCENARIOS = {cls.name: cls for cls in (LoginStorm, DashboardRefresh, ServiceRecordWrites, SharingChurn)}
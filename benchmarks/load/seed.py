@@ -0,0 +1,104 @@
+"""Yük testi verisi: kullanıcılar, araçlar, servis kayıtları ve paylaşım grafiği."""
+import random
+import uuid
+from dataclasses import dataclass, field
+from functools import cached_property
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from app import models, stats, utils
+from app.database import Base, engine, SessionLocal
+
+PASSWORD = "Load1234"
+BATCH_SIZE = 10000
+BRANDS = [("Toyota", "Corolla"), ("Ford", "Transit"), ("Renault", "Clio"), ("Fiat", "Egea"), ("BMW", "320i")]
+PERMISSIONS = ["viewer", "editor", "driver"]
+
+@dataclass
+class Fleet:
+    user_ids: list
+    emails: list
+    tokens: list
+    owned: dict = field(default_factory=dict)   # kullanıcı sırası -> [vin]
+    shared: dict = field(default_factory=dict)  # vin -> {kullanıcı sırası}
+
+    @cached_property
+    def owners(self) -> list:
+        return [index for index, vins in self.owned.items() if vins]
+
+def _insert(conn, table, rows: list):
+    for start in range(0, len(rows), BATCH_SIZE):
+        conn.execute(insert(table), rows[start:start + BATCH_SIZE])
+
+def seed(users: int, vehicles: int, records: int, shares_per_vehicle: float, seed: int = 42) -> Fleet:
+    """Şemayı sıfırlayıp veriyi toplu INSERT'lerle yazar; token'lar login'siz üretilir."""
+    rng = random.Random(seed)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    # bcrypt bir kez: tüm kullanıcılar aynı şifreyi paylaşır
+    hashed = utils.hash_password(PASSWORD)
+    user_ids = [uuid.uuid4() for _ in range(users)]
+    emails = [f"load{i}@vastarion.com" for i in range(users)]
+    fleet = Fleet(user_ids=user_ids, emails=emails, tokens=[], owned={i: [] for i in range(users)})
+
+    vehicle_rows = []
+    for i in range(vehicles):
+        # Araçların yarısı Pareto dağılımıyla birkaç büyük filoya, yarısı rastgele kullanıcılara
+        if rng.random() < 0.5:
+            owner = min(int(rng.paretovariate(1.2)) - 1, users - 1)
+        else:
+            owner = rng.randrange(users)
+        brand, model = rng.choice(BRANDS)
+        vin = f"LOAD{i:013d}"
+        fleet.owned[owner].append(vin)
+        vehicle_rows.append({
+            "vin": vin, "brand": brand, "model": model, "year": 2005 + i % 20, "mileage": rng.randrange(200000),
+            "color": rng.choice(["Black", "White", "Grey", None]), "owner_id": user_ids[owner], "is_deleted": False,
+        })
+
+    owner_of = {vin: owner for owner, vins in fleet.owned.items() for vin in vins}
+    access_rows = []
+    for vin, owner in owner_of.items():
+        count = int(shares_per_vehicle) + (rng.random() < shares_per_vehicle % 1)
+        targets = {rng.randrange(users) for _ in range(count)} - {owner}
+        fleet.shared[vin] = targets
+        access_rows += [
+            {"vehicle_vin": vin, "user_id": user_ids[target], "permission": rng.choice(PERMISSIONS)}
+            for target in targets
+        ]
+
+    start_date = datetime(2018, 1, 1)
+    vins = list(owner_of)
+    record_rows = [
+        {"vehicle_vin": rng.choice(vins), "description": "Periyodik bakım", "mileage": rng.randrange(200000),
+         "cost": rng.choice([None, 500, 1500, 4000]), "date": start_date + timedelta(days=rng.randrange(2500))}
+        for _ in range(records if vins else 0)
+    ]
+
+    with engine.begin() as conn:
+        _insert(conn, models.User, [
+            {"id": user_id, "email": email, "hashed_password": hashed}
+            for user_id, email in zip(user_ids, emails)
+        ])
+        _insert(conn, models.Vehicle, vehicle_rows)
+        _insert(conn, models.VehicleAccess, access_rows)
+        _insert(conn, models.ServiceRecord, record_rows)
+
+    if stats.STATS_SUMMARY:
+        db = SessionLocal()
+        try:
+            for start in range(0, len(vins), BATCH_SIZE):
+                stats.refresh_summary(db, vins[start:start + BATCH_SIZE])
+            db.commit()
+        finally:
+            db.close()
+
+    fleet.tokens = [
+        utils.create_access_token(data=utils.user_token_claims(
+            models.User(id=user_id, email=email, role="driver", is_banned=False, token_version=0)
+        ))
+        for user_id, email in zip(user_ids, emails)
+    ]
+    return fleet
@@ -0,0 +1,109 @@
+"""Garaj genelinde bakım tahmini: araç başına Python döngüsü, toplu SQL ve cache.
+
+    python -m benchmarks.maintenance --vehicles 2000 --services 4 --records 6
+
+per_vehicle: her araç için servis kayıtları okunur, aralık regresyonu Python'da hesaplanır.
+batch_sql: maintenance.get_due_soon, cache boşken (tüm tahminler tek sorguda).
+cached: aynı çağrı cache doluyken (sadece araç listesi + Python projeksiyonu).
+"""
+import argparse
+import json
+import os
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+
+from sqlalchemy import insert, select
+
+from app import maintenance, models
+from app.database import Base, engine, SessionLocal
+from benchmarks.common import percentile
+
+SERVICES = ["Yağ Değişimi", "Fren Balatası", "Lastik Rotasyonu", "Triger Kayışı", "Klima Bakımı", "Akü"]
+
+def seed(vehicle_count: int, services: int, records: int):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(7)
+    owner_id = uuid.uuid4()
+    start = datetime.now(timezone.utc) - timedelta(days=365 * 3)
+    vins = [f"MAIN{i:013d}" for i in range(vehicle_count)]
+    with engine.begin() as conn:
+        conn.execute(insert(models.User), [{"id": owner_id, "email": "owner@vastarion.com", "hashed_password": "x"}])
+        conn.execute(insert(models.Vehicle), [
+            {"vin": vin, "brand": "Ford", "model": "Transit", "year": 2020, "mileage": 10000 * records,
+             "owner_id": owner_id, "is_deleted": False}
+            for vin in vins
+        ])
+        conn.execute(insert(models.ServiceRecord), [
+            {"vehicle_vin": vin, "description": name, "service_name": name, "cost": 100,
+             "mileage": n * rng.randint(8000, 12000), "date": start + timedelta(days=n * rng.randint(150, 210))}
+            for vin in vins for name in SERVICES[:services] for n in range(1, records + 1)
+        ])
+        conn.exec_driver_sql("ANALYZE")
+    return owner_id
+
+def _slope(points: list) -> float:
+    n = len(points)
+    sx = sum(x for x, _ in points)
+    sy = sum(y for _, y in points)
+    sxy = sum(x * y for x, y in points)
+    sxx = sum(x * x for x, _ in points)
+    return (n * sxy - sx * sy) / (n * sxx - sx * sx)
+
+def per_vehicle(db, owner_id) -> int:
+    """Karşılaştırma: araç başına bir sorgu ve Python'da regresyon."""
+    v, r = models.Vehicle, models.ServiceRecord
+    estimates = 0
+    for vin, _ in db.execute(select(v.vin, v.mileage).where(v.owner_id == owner_id, v.is_deleted == False)).all():
+        by_service = {}
+        for name, mileage, date in db.execute(
+            select(r.service_name, r.mileage, r.date).where(r.vehicle_vin == vin).order_by(r.date, r.id)
+        ):
+            by_service.setdefault(name, []).append((mileage, date.timestamp() / 86400))
+        for rows in by_service.values():
+            if len(rows) >= 2:
+                _slope([(i + 1, km) for i, (km, _) in enumerate(rows)])
+                _slope([(i + 1, day) for i, (_, day) in enumerate(rows)])
+                estimates += 1
+    return estimates
+
+def timed(fn, repeat: int, before=None) -> dict:
+    samples = []
+    for _ in range(repeat):
+        if before:
+            before()
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return {"p50_ms": round(percentile(samples, 50) * 1000, 3), "p95_ms": round(percentile(samples, 95) * 1000, 3)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vehicles", type=int, default=2000)
+    parser.add_argument("--services", type=int, default=4)
+    parser.add_argument("--records", type=int, default=6, help="servis türü başına kayıt")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    owner_id = seed(args.vehicles, min(args.services, len(SERVICES)), args.records)
+    with SessionLocal() as db:
+        results = {
+            "per_vehicle": timed(lambda: per_vehicle(db, owner_id), args.repeat),
+            "batch_sql": timed(lambda: maintenance.get_due_soon(db, owner_id), args.repeat,
+                               before=maintenance.estimate_cache.clear),
+            "cached": timed(lambda: maintenance.get_due_soon(db, owner_id), args.repeat),
+        }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for name, values in results.items():
+        print(f"{name:>12}  " + "  ".join(f"{k}={v}" for k, v in values.items()))
+
+if __name__ == "__main__":
+    main()
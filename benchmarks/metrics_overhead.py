@@ -0,0 +1,109 @@
+"""MetricsMiddleware'in istek başına maliyeti: aynı ASGI uygulaması ölçümlü ve ölçümsüz.
+
+HTTP sunucusu ve ağ olmadan ASGI çağrısı doğrudan yapılır; fark sadece middleware'dir.
+`bare` modu route eşleşmesini taklit eden boş bir ASGI uygulaması kullanır ve middleware
+maliyetini gürültüsüz ölçer; `fastapi` modu aynı FastAPI uygulamasını sarılı ve sarısız çağırır.
+
+    python -m benchmarks.metrics_overhead --requests 200000
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import statistics
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+
+from fastapi import FastAPI
+
+from app.metrics import HttpMetrics, MetricsMiddleware
+
+PATH = "/vehicles/WBA00000000000001/service-records"
+
+def build_fastapi() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/vehicles/{vin}/service-records")
+    async def records(vin: str):
+        return []
+
+    return app
+
+def build_bare():
+    route = build_fastapi().router.routes[-1]
+
+    async def app(scope, receive, send):
+        scope["route"] = route
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"[]"})
+
+    return app
+
+async def drive(app, requests: int) -> float:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": PATH, "raw_path": PATH.encode(), "root_path": "",
+        "query_string": b"", "headers": [], "server": ("bench", 80), "client": ("bench", 1),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    started = time.perf_counter()
+    for _ in range(requests):
+        # Router scope'u değiştirir: her istek kendi kopyasıyla çalışır
+        await app(dict(scope), receive, send)
+    return time.perf_counter() - started
+
+async def interleave(app, requests: int, batch: int) -> tuple:
+    """Sarılı / sarısız küçük partiler dönüşümlü koşar; CPU frekansı ve cache kayması iki tarafa
+    eşit dağılır. Parti başına µs/istek'in medyanı döner."""
+    instrumented = MetricsMiddleware(app, metrics=HttpMetrics())
+    await drive(app, batch)
+    await drive(instrumented, batch)
+    plain, wrapped = [], []
+    for i in range(max(1, requests // batch)):
+        order = ((plain, app), (wrapped, instrumented)) if i % 2 else ((wrapped, instrumented), (plain, app))
+        for samples, target in order:
+            samples.append(await drive(target, batch) / batch * 1e6)
+    return statistics.median(plain), statistics.median(wrapped)
+
+def compare(app, requests: int, batch: int) -> dict:
+    gc.disable()
+    try:
+        plain_us, instrumented_us = asyncio.run(interleave(app, requests, batch))
+    finally:
+        gc.enable()
+    return {
+        "plain_us": round(plain_us, 2),
+        "instrumented_us": round(instrumented_us, 2),
+        "overhead_us": round(instrumented_us - plain_us, 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200000)
+    parser.add_argument("--batch", type=int, default=200)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    results = {
+        "bare": compare(build_bare(), args.requests, args.batch),
+        # FastAPI tam yığını çok daha yavaş; aynı sayıda istek gereksiz uzun sürer
+        "fastapi": compare(build_fastapi(), max(args.batch, args.requests // 10), args.batch),
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'mode':>8} {'plain µs':>10} {'metrics µs':>11} {'overhead µs':>12}")
+    for mode, r in results.items():
+        print(f"{mode:>8} {r['plain_us']:>10} {r['instrumented_us']:>11} {r['overhead_us']:>12}")
+
+if __name__ == "__main__":
+    main()
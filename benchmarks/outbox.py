@@ -0,0 +1,100 @@
+"""Servis kaydı silme gecikmesi: özetin istek içinde yeniden hesaplanması ve outbox'a bırakılması.
+
+    python -m benchmarks.outbox --vehicles 20 --records-per-vehicle 20000 --deletes 50
+
+STATS_SUMMARY açıkken silme VIN'in özetini baştan hesaplatır; maliyet aracın kayıt sayısıyla
+büyür. inline_* eski yolu (aynı transaction'da refresh_summary), outbox_* crud.delete_service_record'ı
+ölçer; drain_ms kuyruğa düşen işlerin worker'daki toplam süresidir.
+"""
+import argparse
+import json
+import os
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+
+from sqlalchemy import select
+
+from app import crud, models, outbox, stats
+from app.database import SessionLocal
+from benchmarks.common import percentile
+from benchmarks.stats import seed
+
+def record_ids(db, vins: list, count: int) -> list:
+    """Her VIN'den sırayla birer kayıt: silmeler araçlara eşit dağılır."""
+    per_vin = -(-count // len(vins))
+    ids = []
+    for vin in vins:
+        ids.extend(db.scalars(
+            select(models.ServiceRecord.id).where(models.ServiceRecord.vehicle_vin == vin).limit(per_vin)
+        ))
+    return ids[:count]
+
+def latency(samples: list) -> dict:
+    return {
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p95_ms": round(percentile(samples, 95) * 1000, 3),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vehicles", type=int, default=20)
+    parser.add_argument("--records-per-vehicle", type=int, default=20000)
+    parser.add_argument("--deletes", type=int, default=50, help="her yol için silinecek kayıt sayısı")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    seed(args.vehicles, args.records_per_vehicle)
+    vins = [f"STATS{i:012d}" for i in range(args.vehicles)]
+    stats.STATS_SUMMARY = True
+    db = SessionLocal()
+    try:
+        stats.refresh_summary(db, vins)
+        db.commit()
+        ids = record_ids(db, vins, args.deletes * 2)
+        inline_ids, outbox_ids = ids[0::2], ids[1::2]
+
+        inline = []
+        for record_id in inline_ids:
+            record = db.get(models.ServiceRecord, record_id)
+            started = time.perf_counter()
+            db.delete(record)
+            db.flush()
+            stats.refresh_summary(db, [record.vehicle_vin])
+            db.commit()
+            inline.append(time.perf_counter() - started)
+
+        deferred = []
+        for record_id in outbox_ids:
+            vin = db.scalar(select(models.ServiceRecord.vehicle_vin).where(models.ServiceRecord.id == record_id))
+            started = time.perf_counter()
+            crud.delete_service_record(db, record_id, vin)
+            deferred.append(time.perf_counter() - started)
+    finally:
+        db.close()
+
+    started = time.perf_counter()
+    drained = 0
+    while True:
+        processed = outbox.drain()
+        drained += processed
+        if processed < outbox.OUTBOX_BATCH_SIZE:
+            break
+    results = {
+        "records_per_vehicle": args.records_per_vehicle,
+        "inline": latency(inline),
+        "outbox": latency(deferred),
+        "drained_messages": drained,
+        "drain_ms": round((time.perf_counter() - started) * 1000, 3),
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for name, value in results.items():
+        if isinstance(value, dict):
+            value = "  ".join(f"{k}={v}" for k, v in value.items())
+        print(f"{name:>20}  {value}")
+
+if __name__ == "__main__":
+    main()
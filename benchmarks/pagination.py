@@ -0,0 +1,76 @@
+"""Derin sayfalarda offset ve keyset (cursor) sayfalama gecikmesi: /vehicles/my-vehicles sorgusu.
+
+    python -m benchmarks.pagination --vehicles 50000 --depths 0 1000 10000 45000
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+import uuid
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+
+from sqlalchemy import insert
+
+from app import crud, models
+from app.database import Base, engine, SessionLocal
+from app.pagination import encode_cursor
+
+def seed(vehicle_count: int) -> uuid.UUID:
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    owner_id = uuid.uuid4()
+    with engine.begin() as conn:
+        conn.execute(insert(models.User), [{"id": owner_id, "email": "fleet@vastarion.com", "hashed_password": "x"}])
+        for start in range(0, vehicle_count, 5000):
+            conn.execute(insert(models.Vehicle), [
+                {"vin": f"FLEET{i:012d}", "brand": "Ford", "model": "Transit", "year": 1990 + i % 35,
+                 "mileage": i, "owner_id": owner_id, "is_deleted": False}
+                for i in range(start, min(start + 5000, vehicle_count))
+            ])
+    return owner_id
+
+def timed(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return round(statistics.median(samples) * 1000, 3)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vehicles", type=int, default=50000)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--depths", type=int, nargs="+", default=[0, 1000, 10000, 45000])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    owner_id = seed(args.vehicles)
+    db = SessionLocal()
+    results = []
+    try:
+        for depth in args.depths:
+            cursor = None
+            if depth:
+                # Derinlikteki sayfanın bir önceki satırından cursor üret
+                prev = crud.get_user_vehicles(db, owner_id, skip=depth - 1, limit=1)[0]
+                cursor = encode_cursor(prev.year, prev.vin)
+            offset_ms = timed(lambda: crud.get_user_vehicles(db, owner_id, skip=depth, limit=args.page_size), args.repeat)
+            cursor_ms = timed(lambda: crud.get_user_vehicles(db, owner_id, limit=args.page_size, cursor=cursor), args.repeat)
+            results.append({"depth": depth, "offset_ms": offset_ms, "cursor_ms": cursor_ms})
+            db.expunge_all()
+    finally:
+        db.close()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'depth':>8} {'offset ms':>10} {'cursor ms':>10}")
+    for r in results:
+        print(f"{r['depth']:>8} {r['offset_ms']:>10} {r['cursor_ms']:>10}")
+
+if __name__ == "__main__":
+    main()
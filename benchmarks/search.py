@@ -0,0 +1,120 @@
+"""Araç araması gecikmesi: eski `brand ILIKE '%x%'` filtresi ve /vehicles/search (app.search).
+
+    python -m benchmarks.search --vehicles 1000000 --owners 10
+    DATABASE_URL=postgresql://... python -m benchmarks.search   # pg_trgm / tsvector GIN indeksleri
+
+SQLite'ta app.search süreç içi indeksi kullanır; ilk sorgu indeksi kurar (index_build_ms),
+sonraki sorgular cache'ten gelir. PostgreSQL'de GIN indeksleri create_all ile kurulur (pg_trgm
+eklentisini oluşturma yetkisi gerekir).
+"""
+import argparse
+import json
+import os
+import random
+import time
+import uuid
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+
+from sqlalchemy import insert
+
+from app import crud, models, search
+from app.database import Base, engine, SessionLocal
+from benchmarks.common import percentile
+
+CATALOG = [
+    ("Toyota", "Corolla"), ("Toyota", "Hilux"), ("Ford", "Transit"), ("Ford", "Focus"),
+    ("Renault", "Clio"), ("Fiat", "Egea"), ("Volkswagen", "Passat"), ("BMW", "320i"),
+    ("Mercedes-Benz", "Sprinter"), ("Hyundai", "i20"), ("Honda", "Civic"), ("Peugeot", "3008"),
+]
+COLORS = ["Black", "White", "Silver", "Red", "Blue", "Grey", None]
+DESCRIPTIONS = ["Periyodik bakım", "Ön balata değişimi", "Triger kayışı değişimi", "Lastik rotasyonu", "Yağ ve filtre"]
+
+QUERIES = {
+    "brand_typo": "Toyta",
+    "model": "corolla",
+    "vin_prefix": "SRCH00000",
+    "color": "silver",
+    "description": "triger kayışı",
+}
+
+def seed(vehicle_count: int, owners: int) -> list:
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    owner_ids = [uuid.uuid4() for _ in range(owners)]
+    rng = random.Random(42)
+    with engine.begin() as conn:
+        conn.execute(insert(models.User), [
+            {"id": owner_id, "email": f"owner{i}@vastarion.com", "hashed_password": "x"}
+            for i, owner_id in enumerate(owner_ids)
+        ])
+        for start in range(0, vehicle_count, 10000):
+            vehicles, records = [], []
+            for i in range(start, min(start + 10000, vehicle_count)):
+                brand, model = rng.choice(CATALOG)
+                vin = f"SRCH{i:013d}"
+                vehicles.append({
+                    "vin": vin, "brand": brand, "model": model, "year": 2000 + i % 25, "mileage": 0,
+                    "color": rng.choice(COLORS), "owner_id": owner_ids[i % owners], "is_deleted": False,
+                })
+                records.append({"vehicle_vin": vin, "description": rng.choice(DESCRIPTIONS), "mileage": 1000})
+            conn.execute(insert(models.Vehicle), vehicles)
+            conn.execute(insert(models.ServiceRecord), records)
+        conn.exec_driver_sql("ANALYZE")
+    return owner_ids
+
+def timed(fn, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return {"p50_ms": round(percentile(samples, 50) * 1000, 3), "p95_ms": round(percentile(samples, 95) * 1000, 3)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vehicles", type=int, default=1_000_000)
+    parser.add_argument("--owners", type=int, default=10, help="araçlar bu kadar kullanıcıya eşit dağılır")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    owner_ids = seed(args.vehicles, args.owners)
+    results = {
+        "vehicles": args.vehicles,
+        "vehicles_per_owner": args.vehicles // args.owners,
+        "dialect": engine.dialect.name,
+        "seed_s": round(time.perf_counter() - started, 1),
+    }
+    owner_id = owner_ids[0]
+    db = SessionLocal()
+    try:
+        # Eşleşme yoksa (ya da seyrekse) ILIKE kullanıcının tüm araçlarını tarar
+        for name, brand in (("ilike_brand", "toyota"), ("ilike_brand_miss", "lada")):
+            results[name] = timed(
+                lambda: crud.get_user_vehicle_rows(db, owner_id, limit=args.limit, brand=brand, sort=None), args.repeat
+            )
+        if engine.dialect.name != "postgresql":
+            search.index_cache.clear()
+            started = time.perf_counter()
+            search.search_vehicles(db, owner_id, "Toyota", limit=args.limit)
+            results["index_build_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        for name, q in QUERIES.items():
+            results[f"search_{name}"] = timed(
+                lambda: search.search_vehicles(db, owner_id, q, limit=args.limit), args.repeat
+            )
+    finally:
+        db.close()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for name, value in results.items():
+        if isinstance(value, dict):
+            value = "  ".join(f"{k}={v}" for k, v in value.items())
+        print(f"{name:>22}  {value}")
+
+if __name__ == "__main__":
+    main()
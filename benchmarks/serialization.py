@@ -0,0 +1,110 @@
+"""Liste endpoint'lerinde ORM + response_model yolu ile sütun projeksiyonu + hızlı JSON yolu (nesne/sn).
+
+    python -m benchmarks.serialization --sizes 20 500 5000
+"""
+import argparse
+import json
+import os
+import time
+import uuid
+from typing import List
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from sqlalchemy import insert
+
+from app import crud, models, schemas, serialization
+from app.database import Base, engine, SessionLocal
+
+def seed(count: int) -> tuple:
+    """count araçlık bir garaj; her araç aynı izleyiciye, ilk araç count kullanıcıya paylaşılır."""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    owner_id, viewer_id = uuid.uuid4(), uuid.uuid4()
+    users = [{"id": owner_id, "email": "owner@vastarion.com", "hashed_password": "x"},
+             {"id": viewer_id, "email": "viewer@vastarion.com", "hashed_password": "x"}]
+    extra = [{"id": uuid.uuid4(), "email": f"user{i}@vastarion.com", "hashed_password": "x"} for i in range(count - 1)]
+    vins = [f"SER{i:014d}" for i in range(count)]
+    with engine.begin() as conn:
+        conn.execute(insert(models.User), users + extra)
+        conn.execute(insert(models.Vehicle), [
+            {"vin": vin, "brand": "Renault", "model": "Clio", "year": 2000 + i % 25, "mileage": i * 10,
+             "color": "Beyaz", "owner_id": owner_id, "is_deleted": False}
+            for i, vin in enumerate(vins)
+        ])
+        conn.execute(insert(models.VehicleAccess), [
+            {"vehicle_vin": vin, "user_id": viewer_id, "permission": "viewer"} for vin in vins
+        ] + [
+            {"vehicle_vin": vins[0], "user_id": user["id"], "permission": "viewer"} for user in extra
+        ])
+    return owner_id, viewer_id, vins[0]
+
+def response_model_json(adapter: TypeAdapter, content) -> bytes:
+    """FastAPI'nin response_model yolu: doğrula → jsonable → json.dumps."""
+    validated = adapter.validate_python(content, from_attributes=True)
+    return json.dumps(jsonable_encoder(adapter.dump_python(validated, mode="json"))).encode("utf-8")
+
+def rate(fn, count: int, min_seconds: float) -> int:
+    runs, started = 0, time.perf_counter()
+    while True:
+        fn()
+        runs += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_seconds:
+            return int(runs * count / elapsed)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20, 500, 5000])
+    parser.add_argument("--seconds", type=float, default=1.0)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    vehicles = TypeAdapter(List[schemas.VehicleOut])
+    accesses = TypeAdapter(List[schemas.VehicleAccessOutWithEmail])
+    results = []
+    for size in args.sizes:
+        owner_id, viewer_id, vin = seed(size)
+        db = SessionLocal()
+        try:
+            def orm_vehicles():
+                response_model_json(vehicles, crud.get_user_vehicles(db, owner_id, limit=size))
+                db.expunge_all()
+
+            cases = {
+                "my-vehicles": (
+                    orm_vehicles,
+                    lambda: serialization.dumps(crud.get_user_vehicle_rows(db, owner_id, limit=size)),
+                ),
+                "shared-with-me": (
+                    lambda: response_model_json(vehicles, crud.get_shared_vehicles(db, viewer_id)),
+                    lambda: serialization.dumps(crud.get_shared_vehicles(db, viewer_id)),
+                ),
+                "access": (
+                    lambda: response_model_json(accesses, crud.get_vehicle_accesses(db, vin)),
+                    lambda: serialization.dumps(crud.get_vehicle_accesses(db, vin)),
+                ),
+            }
+            for name, (model_path, fast_path) in cases.items():
+                results.append({
+                    "endpoint": name,
+                    "rows": size,
+                    "response_model_per_sec": rate(model_path, size, args.seconds),
+                    "fast_path_per_sec": rate(fast_path, size, args.seconds),
+                })
+        finally:
+            db.close()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'endpoint':>15} {'rows':>6} {'model obj/s':>12} {'fast obj/s':>12} {'speedup':>8}")
+    for r in results:
+        speedup = r["fast_path_per_sec"] / r["response_model_per_sec"]
+        print(f"{r['endpoint']:>15} {r['rows']:>6} {r['response_model_per_sec']:>12} "
+              f"{r['fast_path_per_sec']:>12} {speedup:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
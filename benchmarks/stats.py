@@ -0,0 +1,93 @@
+"""Garaj istatistikleri: istemci tarafı hesaplama, canlı SQL aggregate ve vehicle_stats özet tablosu.
+
+    python -m benchmarks.stats --vehicles 1000 --records-per-vehicle 1000
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+
+from sqlalchemy import insert
+
+from app import crud, models, stats
+from app.database import Base, engine, SessionLocal
+
+def seed(vehicle_count: int, records_per_vehicle: int) -> uuid.UUID:
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    owner_id = uuid.uuid4()
+    start_date = datetime(2015, 1, 1)
+    vins = [f"STATS{i:012d}" for i in range(vehicle_count)]
+    with engine.begin() as conn:
+        conn.execute(insert(models.User), [{"id": owner_id, "email": "fleet@vastarion.com", "hashed_password": "x"}])
+        conn.execute(insert(models.Vehicle), [
+            {"vin": vin, "brand": "Ford", "model": "Transit", "year": 2015, "mileage": records_per_vehicle * 1000,
+             "owner_id": owner_id, "is_deleted": False}
+            for vin in vins
+        ])
+        batch = []
+        for vin in vins:
+            for n in range(records_per_vehicle):
+                batch.append({"vehicle_vin": vin, "description": "Bakım", "mileage": (n + 1) * 1000,
+                              "cost": 500 + n % 7 * 100, "date": start_date + timedelta(days=n * 3)})
+                if len(batch) >= 10000:
+                    conn.execute(insert(models.ServiceRecord), batch)
+                    batch = []
+        if batch:
+            conn.execute(insert(models.ServiceRecord), batch)
+    return owner_id
+
+def client_side(db, owner_id):
+    """Mevcut yol: tüm kayıtları çekip Python'da toplamak."""
+    result = []
+    for vehicle in crud.get_user_vehicles(db, owner_id, limit=None):
+        records = crud.get_service_records(db, vehicle.vin)
+        costs = [r.cost for r in records if r.cost is not None]
+        result.append({"vin": vehicle.vin, "service_count": len(records), "total_cost": sum(costs)})
+    db.expunge_all()
+    return result
+
+def timed(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return round(statistics.median(samples) * 1000, 3)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vehicles", type=int, default=1000)
+    parser.add_argument("--records-per-vehicle", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    owner_id = seed(args.vehicles, args.records_per_vehicle)
+    db = SessionLocal()
+    try:
+        results = {"client_side_ms": timed(lambda: client_side(db, owner_id), args.repeat)}
+        stats.STATS_SUMMARY = False
+        results["sql_aggregate_ms"] = timed(lambda: stats.get_garage_stats(db, owner_id), args.repeat)
+        stats.STATS_SUMMARY = True
+        started = time.perf_counter()
+        stats.refresh_summary(db, [f"STATS{i:012d}" for i in range(args.vehicles)])
+        db.commit()
+        results["summary_backfill_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        results["summary_table_ms"] = timed(lambda: stats.get_garage_stats(db, owner_id), args.repeat)
+    finally:
+        db.close()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for name, value in results.items():
+        print(f"{name:>22} {value:>12}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Kilometre telemetrisi yazma hızı: okuma başına yazma ve tampon + toplu flush.
+
+    python -m benchmarks.telemetry --vehicles 1000 --readings 200000
+
+per_reading: her okuma için INSERT + Vehicle.mileage UPDATE, istek (batch) başına commit.
+buffered: okumalar telemetry.buffer'a eklenir, TELEMETRY_FLUSH_SIZE'da bir telemetry.flush.
+endpoint: aynı okumalar POST /telemetry/odometer'a (in-process ASGI, doğrulama + yetki dahil)
+--batch'lik gövdelerle gönderilir ve sonda flush edilir. Hepsi okuma/saniye raporlar.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+
+import httpx
+from sqlalchemy import insert, update
+
+from app import models, telemetry, utils
+from app.database import Base, engine, SessionLocal
+
+def seed(vehicle_count: int) -> list:
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    owner_id = uuid.uuid4()
+    vins = [f"TELE{i:013d}" for i in range(vehicle_count)]
+    with engine.begin() as conn:
+        conn.execute(insert(models.User), [{"id": owner_id, "email": "owner@vastarion.com", "hashed_password": "x"}])
+        conn.execute(insert(models.Vehicle), [
+            {"vin": vin, "brand": "Ford", "model": "Transit", "year": 2020, "mileage": 0, "owner_id": owner_id, "is_deleted": False}
+            for vin in vins
+        ])
+    return vins
+
+def readings(vins: list, count: int, offset: int = 0) -> list:
+    """Araçlar arasında dönen, saniyede bir ilerleyen okumalar."""
+    start = datetime(2026, 10, 1, tzinfo=timezone.utc) + timedelta(days=offset)
+    return [
+        (vins[i % len(vins)], start + timedelta(seconds=i // len(vins)), 1000 + i // len(vins))
+        for i in range(count)
+    ]
+
+def clear_readings():
+    with engine.begin() as conn:
+        conn.execute(models.OdometerReading.__table__.delete())
+
+def per_reading(rows: list, batch: int) -> float:
+    started = time.perf_counter()
+    with SessionLocal() as db:
+        for index in range(0, len(rows), batch):
+            for vin, recorded_at, odometer in rows[index:index + batch]:
+                db.execute(insert(models.OdometerReading).values(vehicle_vin=vin, recorded_at=recorded_at, odometer=odometer))
+                db.execute(update(models.Vehicle).where(models.Vehicle.vin == vin).values(mileage=odometer))
+            db.commit()
+    return time.perf_counter() - started
+
+def buffered(rows: list, batch: int) -> float:
+    started = time.perf_counter()
+    for index in range(0, len(rows), batch):
+        telemetry.buffer.add(rows[index:index + batch])
+        if len(telemetry.buffer) >= telemetry.TELEMETRY_FLUSH_SIZE:
+            telemetry.flush()
+    telemetry.flush()
+    return time.perf_counter() - started
+
+async def endpoint(rows: list, batch: int) -> float:
+    from main import app
+
+    token = utils.create_access_token({"sub": "owner@vastarion.com"})
+    headers = {"Authorization": f"Bearer {token}"}
+    bodies = [
+        json.dumps({"readings": [
+            {"vin": vin, "timestamp": recorded_at.isoformat(), "odometer": odometer}
+            for vin, recorded_at, odometer in rows[index:index + batch]
+        ]})
+        for index in range(0, len(rows), batch)
+    ]
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        started = time.perf_counter()
+        for body in bodies:
+            resp = await client.post("/telemetry/odometer", content=body, headers={**headers, "Content-Type": "application/json"})
+            resp.raise_for_status()
+            if len(telemetry.buffer) >= telemetry.TELEMETRY_FLUSH_SIZE:
+                telemetry.flush()
+        telemetry.flush()
+        return time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vehicles", type=int, default=1000)
+    parser.add_argument("--readings", type=int, default=200000)
+    parser.add_argument("--batch", type=int, default=5000, help="istek başına okuma")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    vins = seed(args.vehicles)
+    results = {}
+    # Okuma başına yol çok yavaş: örnek küçük tutulur, hız okuma/saniye olarak karşılaştırılır
+    sample = readings(vins, min(args.readings, 20000), offset=0)
+    results["per_reading"] = len(sample) / per_reading(sample, args.batch)
+    clear_readings()
+    results["buffered"] = args.readings / buffered(readings(vins, args.readings, offset=1), args.batch)
+    results["endpoint"] = args.readings / asyncio.run(endpoint(readings(vins, args.readings, offset=2), args.batch))
+    results = {name: {"readings_per_sec": round(value)} for name, value in results.items()}
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for name, values in results.items():
+        print(f"{name:>12}  readings/s={values['readings_per_sec']}")
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,85 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from app import models
-from app.database import engine
-from routers import auth, vehicles, users
+from app import models, outbox
+from app.database import engine, DB_ASYNC, LAST_WRITE_HEADER, LastWriteMiddleware
+from app.metrics import METRICS_ENABLED, MetricsMiddleware, install_query_hooks
+from app.pagination import NEXT_CURSOR_HEADER
+from app.querylog import QUERY_COUNT_HEADER, QUERY_DEBUG, QueryBudgetMiddleware, install_recorder_hooks
+from app.ratelimit import RATE_LIMIT_ENABLED, RateLimitMiddleware
+from app.telemetry import flusher
+from routers import auth, vehicles, users, organizations, fleets, telemetry, metrics
 
 models.Base.metadata.create_all(bind=engine)
 
-app = FastAPI(title="Vastarion Garage API")
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=[
-        "http://127.0.0.1:5500",
-        "http://localhost:5500",
-        "http://127.0.0.1:8000",
-        "http://localhost:8000",
-    ],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-app.mount("/static", StaticFiles(directory="static"), name="static")
-
-app.include_router(auth.router)
-app.include_router(vehicles.router)
-app.include_router(users.router)
-
-@app.get("/")
-def read_root():
-    return {"message": "Vastarion System Online!"}
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # OUTBOX_WORKER=off: mesajları ayrı bir süreç işler (python -m app.outbox)
+    if outbox.OUTBOX_WORKER == "inprocess":
+        outbox.worker.start()
+    flusher.start()
+    yield
+    # Tamponda kalan telemetri okumaları kapanışta yazılır
+    await flusher.stop()
+    await outbox.worker.stop()
+
+def create_app(db_async: bool = DB_ASYNC) -> FastAPI:
+    app = FastAPI(title="Vastarion Garage API", lifespan=lifespan)
+
+    if RATE_LIMIT_ENABLED:
+        # CORS'un içinde: 429 yanıtları da CORS header'larını taşır; route / DB / bcrypt'ten önce döner
+        app.add_middleware(RateLimitMiddleware)
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=[
+            "http://127.0.0.1:5500",
+            "http://localhost:5500",
+            "http://127.0.0.1:8000",
+            "http://localhost:8000",
+        ],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER, "ETag", QUERY_COUNT_HEADER, LAST_WRITE_HEADER],
+    )
+
+    # Read replica: yazan isteğin yanıtına imzalı son yazma zamanı (replica yoksa bir şey eklemez)
+    app.add_middleware(LastWriteMiddleware)
+
+    if QUERY_DEBUG:
+        # Geliştirme / test: istek başına SQL kaydı, N+1 ve sorgu bütçesi kontrolü
+        install_recorder_hooks()
+        app.add_middleware(QueryBudgetMiddleware)
+
+    if METRICS_ENABLED:
+        # En dışta: CORS dahil tüm istek süresini ölçer
+        install_query_hooks()
+        app.add_middleware(MetricsMiddleware)
+
+    app.mount("/static", StaticFiles(directory="static"), name="static")
+
+    if db_async:
+        # Async router'lar önce eklenir: aynı path'ler ilk eşleşen async handler'a gider
+        from routers import auth_async, vehicles_async, users_async
+        app.include_router(auth_async.router)
+        app.include_router(vehicles_async.router)
+        app.include_router(users_async.router)
+
+    app.include_router(auth.router)
+    app.include_router(vehicles.router)
+    app.include_router(users.router)
+    app.include_router(organizations.router)
+    app.include_router(fleets.router)
+    app.include_router(telemetry.router)
+    if METRICS_ENABLED:
+        app.include_router(metrics.router)
+
+    @app.get("/")
+    def read_root():
+        return {"message": "Vastarion System Online!"}
+
+    return app
+
+app = create_app()
@@ -1,28 +1,42 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from app import schemas, crud, utils
 from app.database import get_db
 from app.dependencies import get_current_user
+from app.hashing import hasher
 
 router = APIRouter(
     prefix="/auth",
     tags=["Authentication"]
 )
 
+# bcrypt işi app.hashing havuzunda; DB çağrıları threadpool'da, handler event loop'u bloklamaz
+
 @router.post("/signup")
-def signup(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    db_user = crud.get_user_by_email(db, email=user.email)
+async def signup(user: schemas.UserCreate, db: Session = Depends(get_db)):
+    db_user = await run_in_threadpool(crud.get_user_by_email, db, email=user.email)
     if db_user:
         raise HTTPException(status_code=400, detail="Email zaten kayıtlı")
-    return crud.create_user(db=db, user=user)
+    hashed_pwd = await hasher.hash(user.password)
+    return await run_in_threadpool(crud.create_user, db=db, user=user, hashed_password=hashed_pwd)
 
 @router.post("/login")
-def login(db: Session = Depends(get_db), form_data: OAuth2PasswordRequestForm = Depends()):
-    user = crud.get_user_by_email(db, email=form_data.username)
+async def login(db: Session = Depends(get_db), form_data: OAuth2PasswordRequestForm = Depends()):
+    user = await run_in_threadpool(crud.get_user_by_email, db, email=form_data.username)
 
-    if not user or not utils.verify_password(form_data.password, user.hashed_password):
+    if not user or not await hasher.verify(form_data.password, user.hashed_password):
         raise HTTPException(status_code=400, detail="Hatalı e-posta veya şifre")
-    
-    access_token = utils.create_access_token(data={"sub": user.email})
-    return {"access_token": access_token, "token_type": "bearer"}
\ No newline at end of file
+
+    # Askıya alınmış hesap için rehash (bcrypt + yazma) yapılmaz
+    if user.is_banned:
+        raise HTTPException(status_code=403, detail="Hesabınız askıya alınmış.")
+
+    # Cost faktörü değiştiyse şifreyi yeni ayarla sessizce yeniden hash'le
+    if utils.needs_rehash(user.hashed_password):
+        new_hash = await hasher.hash(form_data.password)
+        await run_in_threadpool(crud.update_password_hash, db, user, new_hash)
+
+    access_token = utils.create_access_token(data=utils.user_token_claims(user))
+    return {"access_token": access_token, "token_type": "bearer"}
@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import schemas, async_crud, utils
+from app.database import get_async_db
+from app.hashing import hasher
+
+# DB_ASYNC modunda routers/auth.py'deki endpoint'lerin önüne eklenir (aynı path'ler)
+router = APIRouter(
+    prefix="/auth",
+    tags=["Authentication"],
+    include_in_schema=False
+)
+
+@router.post("/signup")
+async def signup(user: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
+    db_user = await async_crud.get_user_by_email(db, email=user.email)
+    if db_user:
+        raise HTTPException(status_code=400, detail="Email zaten kayıtlı")
+    hashed_pwd = await hasher.hash(user.password)
+    return await async_crud.create_user(db=db, user=user, hashed_password=hashed_pwd)
+
+@router.post("/login")
+async def login(db: AsyncSession = Depends(get_async_db), form_data: OAuth2PasswordRequestForm = Depends()):
+    user = await async_crud.get_user_by_email(db, email=form_data.username)
+
+    if not user or not await hasher.verify(form_data.password, user.hashed_password):
+        raise HTTPException(status_code=400, detail="Hatalı e-posta veya şifre")
+
+    # Askıya alınmış hesap için rehash (bcrypt + yazma) yapılmaz
+    if user.is_banned:
+        raise HTTPException(status_code=403, detail="Hesabınız askıya alınmış.")
+
+    if utils.needs_rehash(user.hashed_password):
+        new_hash = await hasher.hash(form_data.password)
+        await async_crud.update_password_hash(db, user, new_hash)
+
+    access_token = utils.create_access_token(data=utils.user_token_claims(user))
+    return {"access_token": access_token, "token_type": "bearer"}
@@ -0,0 +1,81 @@
+from typing import List
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from app import fleets, models, schemas
+from app.database import get_db
+from app.dependencies import get_current_user
+
+router = APIRouter(prefix="/fleets", tags=["Fleets"])
+
+def _owned_fleet(fleet_id: int, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+    fleet = fleets.get_owned_fleet(db, fleet_id, current_user.id)
+    if fleet is None:
+        raise HTTPException(status_code=404, detail="Filo bulunamadı veya sahibi değilsiniz.")
+    return fleet
+
+@router.post("/", response_model=schemas.FleetOut)
+def create_fleet(
+    data: schemas.FleetCreate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    return fleets.create_fleet(db, data.name, current_user.id)
+
+@router.get("/", response_model=List[schemas.FleetOut])
+def my_fleets(
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    return fleets.get_user_fleets(db, current_user.id)
+
+@router.post("/{fleet_id}/vehicles", response_model=schemas.FleetVehiclesResult)
+def add_fleet_vehicles(
+    data: schemas.FleetVehiclesAdd,
+    db: Session = Depends(get_db),
+    fleet: models.Fleet = Depends(_owned_fleet)
+):
+    """Araçları filoya ekler (başka bir filodaysa taşır); sadece kendi araçlarınız."""
+    vins = list(dict.fromkeys(data.vins))
+    moved = set(fleets.add_vehicles(db, fleet, vins))
+    return {"added": len(moved), "not_found": [vin for vin in vins if vin not in moved]}
+
+@router.delete("/{fleet_id}/vehicles/{vin}")
+def remove_fleet_vehicle(
+    vin: str,
+    db: Session = Depends(get_db),
+    fleet: models.Fleet = Depends(_owned_fleet)
+):
+    if not fleets.remove_vehicle(db, fleet, vin):
+        raise HTTPException(status_code=404, detail="Araç bu filoda değil.")
+    return {"message": "Araç filodan çıkarıldı."}
+
+@router.get("/{fleet_id}/grants", response_model=List[schemas.FleetGrantOut])
+def fleet_grants(
+    db: Session = Depends(get_db),
+    fleet: models.Fleet = Depends(_owned_fleet)
+):
+    return fleets.get_grants(db, fleet.id)
+
+@router.post("/{fleet_id}/grants")
+def grant_fleet(
+    data: schemas.FleetGrantCreate,
+    db: Session = Depends(get_db),
+    fleet: models.Fleet = Depends(_owned_fleet)
+):
+    """Filodaki tüm araçları bir organizasyonun üyeleriyle paylaşır (tek satır). Filo sahibi
+    organizasyonun üyesi olmalıdır: tanımadığı bir ekibe araç açamaz."""
+    if fleets.get_membership_role(db, data.organization_id, fleet.owner_id) is None:
+        raise HTTPException(status_code=404, detail="Organizasyon bulunamadı.")
+    fleets.grant(db, fleet, data.organization_id, data.permission)
+    return {"message": f"Filo organizasyonla '{data.permission}' yetkisiyle paylaşıldı."}
+
+@router.delete("/{fleet_id}/grants/{organization_id}")
+def revoke_fleet_grant(
+    organization_id: UUID,
+    db: Session = Depends(get_db),
+    fleet: models.Fleet = Depends(_owned_fleet)
+):
+    if not fleets.revoke(db, fleet, organization_id):
+        raise HTTPException(status_code=404, detail="Bu organizasyonun filoda bir yetkisi yok.")
+    return {"message": "Organizasyonun filo üzerindeki yetkisi kaldırıldı."}
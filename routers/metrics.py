@@ -0,0 +1,16 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app import database, metrics
+
+router = APIRouter(tags=["Metrics"], include_in_schema=False)
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def read_metrics():
+    """Prometheus scrape endpoint'i (worker süreci başına).
+
+    async: route istatistiklerini güncelleyen middleware ile aynı (event loop) thread'inde okur.
+    """
+    pools = {"primary": database.engine.pool}
+    if database.async_engine is not None:
+        pools["async"] = database.async_engine.pool
+    return metrics.render(pools)
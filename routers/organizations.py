@@ -0,0 +1,77 @@
+from typing import List
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from app import crud, fleets, models, schemas
+from app.database import get_db
+from app.dependencies import get_current_user
+
+router = APIRouter(prefix="/organizations", tags=["Organizations"])
+
+def _require_role(db: Session, organization_id: UUID, user_id: UUID, admin: bool = False) -> str:
+    role = fleets.get_membership_role(db, organization_id, user_id)
+    if role is None:
+        raise HTTPException(status_code=404, detail="Organizasyon bulunamadı.")
+    if admin and role != "admin":
+        raise HTTPException(status_code=403, detail="Bu işlem için organizasyon yöneticisi olmalısınız.")
+    return role
+
+def _require_other_admin(db: Session, organization_id: UUID, user_id: UUID):
+    """Son yönetici çıkarılamaz ya da üyeliğe düşürülemez; organizasyon yönetilemez kalır."""
+    if fleets.is_last_admin(db, organization_id, user_id):
+        raise HTTPException(status_code=400, detail="Organizasyonun son yöneticisi çıkarılamaz; önce başka bir yönetici ekleyin.")
+
+@router.post("/", response_model=schemas.OrganizationOut)
+def create_organization(
+    data: schemas.OrganizationCreate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Yeni bir organizasyon (ekip); kuran kullanıcı yönetici olur."""
+    return fleets.create_organization(db, data.name, current_user.id)
+
+@router.get("/", response_model=List[schemas.OrganizationOut])
+def my_organizations(
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    return fleets.get_user_organizations(db, current_user.id)
+
+@router.get("/{organization_id}/members", response_model=List[schemas.OrganizationMemberOut])
+def organization_members(
+    organization_id: UUID,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    _require_role(db, organization_id, current_user.id)
+    return fleets.get_members(db, organization_id)
+
+@router.post("/{organization_id}/members")
+def add_organization_member(
+    organization_id: UUID,
+    data: schemas.OrganizationMemberCreate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    _require_role(db, organization_id, current_user.id, admin=True)
+    user = crud.get_user_by_email(db, email=data.email)
+    if not user:
+        raise HTTPException(status_code=404, detail="Bu email adresiyle kayıtlı bir kullanıcı bulunamadı.")
+    if data.role != "admin":
+        _require_other_admin(db, organization_id, user.id)
+    fleets.add_member(db, organization_id, user.id, data.role)
+    return {"message": f"{data.email} organizasyona '{data.role}' olarak eklendi."}
+
+@router.delete("/{organization_id}/members/{user_id}")
+def remove_organization_member(
+    organization_id: UUID,
+    user_id: UUID,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    # Üye kendi üyeliğinden çıkabilir; başkasını sadece yönetici çıkarır
+    _require_role(db, organization_id, current_user.id, admin=user_id != current_user.id)
+    _require_other_admin(db, organization_id, user_id)
+    if not fleets.remove_member(db, organization_id, user_id):
+        raise HTTPException(status_code=404, detail="Bu kullanıcı organizasyonun üyesi değil.")
+    return {"message": "Kullanıcı organizasyondan çıkarıldı."}
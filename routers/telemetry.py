@@ -0,0 +1,41 @@
+from datetime import datetime
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from app import models, schemas, telemetry
+from app.database import get_db
+from app.dependencies import get_current_user, get_read_db, require_vehicle_access
+
+router = APIRouter(prefix="/telemetry", tags=["Telemetry"])
+
+@router.post("/odometer", response_model=schemas.OdometerIngestResult, status_code=status.HTTP_202_ACCEPTED)
+def ingest_odometer(
+    batch: schemas.OdometerBatch,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Kilometre okumalarını (vin, timestamp, odometer) toplu alır; okumalar tamponlanıp toplu yazılır.
+    Okuma gönderme yetkisi olmayan VIN'ler `rejected` listesinde döner."""
+    result = telemetry.ingest(db, batch.readings, current_user.id)
+    if result is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Telemetri tamponu dolu, lütfen biraz sonra tekrar deneyin.",
+            headers={"Retry-After": "1"},
+        )
+    return result
+
+@router.get("/{vin}/odometer", response_model=List[schemas.OdometerBucketOut])
+def odometer_history(
+    vin: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    bucket: Optional[int] = Query(None, ge=1, description="Kova süresi (saniye); verilmezse aralığa göre seçilir"),
+    db: Session = Depends(get_read_db),
+    access: tuple = Depends(require_vehicle_access("viewer", "driver", "editor"))
+):
+    """[start, end) aralığında (varsayılan son 7 gün) kova başına min / max kilometre."""
+    start, end = telemetry.default_range(start, end)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start, end'den önce olmalıdır")
+    return telemetry.odometer_series(db, vin, start, end, telemetry.bucket_seconds(start, end, bucket))
@@ -1,14 +1,47 @@
-from fastapi import APIRouter, Depends
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
-from app import models, schemas
+from app import crud, models, schemas
+from app.cache import response_cache
 from app.database import get_db
-from app.dependencies import get_current_user
+from app.dependencies import get_current_user, require_admin
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
 @router.get("/me", response_model=schemas.UserOut)
 def get_current_user_profile(
+    request: Request,
     current_user: models.User = Depends(get_current_user)
 ):
     """Giriş yapmış kullanıcının profil bilgilerini döner."""
-    return current_user
\ No newline at end of file
+    return response_cache.respond(request, current_user.id, lambda: (current_user, {}), schemas.UserOut)
+
+# --- YÖNETİCİ ---
+# Ban / rol değişimi crud yardımcılarından geçer: token_version artar, bu worker'ın cache'leri düşer.
+# Diğer worker'lar değişikliği en geç AUTH_CACHE_TTL içinde görür.
+
+def _target_user(db: Session, user_id: UUID, admin) -> models.User:
+    if user_id == admin.id:
+        raise HTTPException(status_code=400, detail="Kendi hesabınızın ban / rol durumunu değiştiremezsiniz.")
+    user = crud.get_user(db, user_id)
+    if user is None:
+        raise HTTPException(status_code=404, detail="Kullanıcı bulunamadı.")
+    return user
+
+@router.put("/{user_id}/ban", response_model=schemas.UserOut)
+def set_user_banned(
+    user_id: UUID,
+    data: schemas.UserBanUpdate,
+    db: Session = Depends(get_db),
+    admin=Depends(require_admin)
+):
+    return crud.set_user_banned(db, _target_user(db, user_id, admin), data.is_banned)
+
+@router.put("/{user_id}/role", response_model=schemas.UserOut)
+def set_user_role(
+    user_id: UUID,
+    data: schemas.UserRoleUpdate,
+    db: Session = Depends(get_db),
+    admin=Depends(require_admin)
+):
+    return crud.set_user_role(db, _target_user(db, user_id, admin), data.role)
\ No newline at end of file
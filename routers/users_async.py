@@ -0,0 +1,14 @@
+from fastapi import APIRouter, Depends, Request
+from app import models, schemas
+from app.cache import response_cache
+from app.dependencies import get_current_user_async
+
+router = APIRouter(prefix="/users", tags=["Users"], include_in_schema=False)
+
+@router.get("/me", response_model=schemas.UserOut)
+async def get_current_user_profile(
+    request: Request,
+    current_user: models.User = Depends(get_current_user_async)
+):
+    """Giriş yapmış kullanıcının profil bilgilerini döner."""
+    return response_cache.respond(request, current_user.id, lambda: (current_user, {}), schemas.UserOut)
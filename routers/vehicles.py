@@ -1,10 +1,14 @@
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List
-from app import models, schemas, crud
+from app import models, schemas, crud, archive, bulk, events, export, maintenance, search, stats
 from app.database import get_db
-from app.dependencies import get_current_user
+from app.cache import response_cache
+from app.serialization import FastJSONResponse
+from app.pagination import MAX_PAGE_SIZE, next_cursor_headers, set_next_cursor
+from app.dependencies import get_current_user, get_read_db, require_vehicle_access
 from uuid import UUID
 
 router = APIRouter(
@@ -20,30 +24,115 @@ def create_vehicle(
 ):
     return crud.create_vehicle(db=db, vehicle=vehicle, user_id=current_user.id)
 
+@router.post("/bulk", response_model=schemas.BulkImportResult)
+async def bulk_import_vehicles(
+    request: Request,
+    format: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """CSV (başlık satırlı) veya NDJSON gövdeyi akış halinde içe aktarır; hatalı satırları raporlar."""
+    fmt = bulk.detect_format(request.headers.get("content-type"), format)
+    return await bulk.import_vehicles(request.stream(), fmt, db, current_user.id)
+
 @router.get("/my-vehicles", response_model=List[schemas.VehicleOut])
 def read_my_vehicles(
-    skip: int = 0,
-    limit: int = 20,
+    request: Request,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
     brand: Optional[str] = None,
     sort: str = "-year",
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    def load():
+        vehicles = crud.get_user_vehicle_rows(
+            db=db, 
+            user_id=current_user.id,
+            skip=skip,
+            limit=limit,
+            brand=brand,
+            sort=sort,
+            cursor=cursor
+        )
+        # Keyset sayfalama: sonraki sayfa için X-Next-Cursor (skip/limit geriye uyumlu)
+        if sort in ("year", "-year"):
+            return vehicles, next_cursor_headers(vehicles, limit, lambda v: (v["year"], v["vin"]))
+        return vehicles, {}
+    # Değişmeyen liste cache'ten (veya If-None-Match ile 304 olarak) döner; satırlar
+    # VehicleOut'a tekrar doğrulanmadan JSON'a yazılır
+    return response_cache.respond(request, current_user.id, load)
+
+@router.get("/export")
+def export_garage(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
-    return crud.get_user_vehicles(
-        db=db, 
-        user_id=current_user.id,
-        skip=skip,
-        limit=limit,
-        brand=brand,
-        sort=sort
+    """Tüm araçları servis geçmişiyle birlikte tek sorgudan akış halinde döner."""
+    rows = export.iter_ndjson(db, current_user.id) if format == "ndjson" else export.iter_csv(db, current_user.id)
+    return StreamingResponse(
+        rows,
+        media_type=export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="garage.{format}"'},
+    )
+
+@router.get("/stats", response_model=schemas.GarageStatsOut)
+def garage_stats(
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Garajdaki tüm araçlar için bakım maliyeti / kilometre özeti."""
+    return stats.get_garage_stats(db, current_user.id)
+
+@router.get("/search", response_model=List[schemas.VehicleSearchResult])
+def search_garage(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Marka / model / renk (bulanık), VIN öneki ve servis açıklamalarında puan sıralı arama."""
+    hits = search.search_vehicles(db, current_user.id, q, limit=limit, cursor=cursor)
+    return FastJSONResponse(hits, headers=next_cursor_headers(hits, limit, lambda h: (h["rank"], h["vin"])))
+
+@router.get("/events")
+async def vehicle_events(current_user: models.User = Depends(get_current_user)):
+    """Sahip olunan ve paylaşılan araçlardaki değişiklikler (Server-Sent Events); polling yerine."""
+    events.ensure_listener()
+    return StreamingResponse(
+        events.stream(current_user.id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 @router.get("/shared-with-me")
 def shared_with_me(
+    request: Request,
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    return response_cache.respond(
+        request, current_user.id, lambda: (crud.get_shared_vehicles(db=db, user_id=current_user.id), {})
+    )
+
+@router.get("/deleted", response_model=List[schemas.DeletedVehicleOut])
+def deleted_vehicles(
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
-    return crud.get_shared_vehicles(db=db, user_id=current_user.id)
+    """Geri yüklenebilir araçlar: silinmiş (archived=false) ve arşive taşınmış (archived=true)."""
+    return archive.get_deleted_vehicles(db, current_user.id)
+
+@router.get("/maintenance/due-soon", response_model=List[schemas.MaintenanceEstimateOut])
+def maintenance_due_soon(
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Garajdaki tüm araçların yaklaşan ve gecikmiş bakımları, en acilden başlayarak."""
+    return FastJSONResponse(maintenance.get_due_soon(db, current_user.id))
 
 @router.put("/{vin}", response_model=schemas.VehicleOut)
 def update_vehicle(
@@ -69,21 +158,28 @@ def delete_vehicle(
         raise HTTPException(status_code=404, detail="Araç bulunamadı veya silme yetkiniz yok")
     return {"message": "Araç başarıyla garajdan çıkarıldı"}
 
+@router.post("/{vin}/restore", response_model=schemas.VehicleOut)
+def restore_vehicle(
+    vin: str,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    try:
+        vehicle = archive.restore_vehicle(db, vehicle_vin=vin, user_id=current_user.id)
+    except archive.VinInUse:
+        raise HTTPException(status_code=409, detail="Bu VIN şu an başka bir araçta kayıtlı; araç geri yüklenemez.")
+    if not vehicle:
+        raise HTTPException(status_code=404, detail="Geri yüklenecek silinmiş araç bulunamadı.")
+    return vehicle
+
 @router.post("/{vin}/share")
 def share_vehicle(
     vin: str, 
     share_data: schemas.ShareVehicleCreate, 
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: models.User = Depends(get_current_user),
+    access: tuple = Depends(require_vehicle_access(detail="Araç bulunamadı veya bu aracı paylaşma yetkiniz yok."))
 ):
-    vehicle = db.query(models.Vehicle).filter(
-        models.Vehicle.vin == vin, 
-        models.Vehicle.owner_id == current_user.id
-    ).first()
-
-    if not vehicle:
-        raise HTTPException(status_code=404, detail="Araç bulunamadı veya bu aracı paylaşma yetkiniz yok.")
-    
     target_user = crud.get_user_by_email(db, email=share_data.email)
     if not target_user:
         raise HTTPException(status_code=404, detail="Bu email adresiyle kayıtlı bir kullanıcı bulunamadı.")
@@ -91,7 +187,7 @@ def share_vehicle(
     if target_user.id == current_user.id:
          raise HTTPException(status_code=400, detail="Kendi aracınızı kendinize paylaşamazsınız.")
     
-    access = crud.share_vehicle(
+    crud.share_vehicle(
         db=db, 
         vehicle_vin=vin, 
         target_user_id=target_user.id, 
@@ -102,28 +198,18 @@ def share_vehicle(
 @router.get("/{vin}/access", response_model=List[schemas.VehicleAccessOutWithEmail])
 def get_vehicle_access_list(
     vin: str, 
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    db: Session = Depends(get_read_db),
+    access: tuple = Depends(require_vehicle_access())
 ):
-    
-    vehicle = db.query(models.Vehicle).filter(models.Vehicle.vin == vin, models.Vehicle.owner_id == current_user.id).first()
-    if not vehicle:
-        raise HTTPException(status_code=404, detail="Araç bulunamadı veya yetkiniz yok.")
-        
-    return crud.get_vehicle_accesses(db=db, vehicle_vin=vin)
+    return FastJSONResponse(crud.get_vehicle_accesses(db=db, vehicle_vin=vin))
 
 @router.delete("/{vin}/access/{target_user_id}")
 def remove_vehicle_access(
     vin: str, 
     target_user_id: UUID,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    access: tuple = Depends(require_vehicle_access())
 ):
-
-    vehicle = db.query(models.Vehicle).filter(models.Vehicle.vin == vin, models.Vehicle.owner_id == current_user.id).first()
-    if not vehicle:
-         raise HTTPException(status_code=404, detail="Araç bulunamadı veya yetkiniz yok.")
-
     success = crud.revoke_vehicle_access(db=db, vehicle_vin=vin, target_user_id=target_user_id)
     if not success:
         raise HTTPException(status_code=404, detail="Bu kullanıcının bu araçta zaten bir yetkisi yok.")
@@ -132,73 +218,67 @@ def remove_vehicle_access(
 
 # --- SERVİS GEÇMİŞİ ENDPOINT'LERİ ---
 
-def _can_access_vehicle(db: Session, vin: str, user_id, required_permissions: list = None):
-    """Aracın sahibi mi yoksa yetkili kullanıcı mı kontrol et."""
-    # Önce owner mı kontrol et
-    vehicle = db.query(models.Vehicle).filter(
-        models.Vehicle.vin == vin,
-        models.Vehicle.owner_id == user_id,
-        models.Vehicle.is_deleted == False
-    ).first()
-    if vehicle:
-        return vehicle, "owner"
-    
-    # Değilse, VehicleAccess tablosunu kontrol et
-    if required_permissions:
-        access = db.query(models.VehicleAccess).filter(
-            models.VehicleAccess.vehicle_vin == vin,
-            models.VehicleAccess.user_id == user_id,
-            models.VehicleAccess.permission.in_(required_permissions)
-        ).first()
-        if access:
-            vehicle = db.query(models.Vehicle).filter(
-                models.Vehicle.vin == vin,
-                models.Vehicle.is_deleted == False
-            ).first()
-            if vehicle:
-                return vehicle, access.permission
-    
-    return None, None
+@router.post("/service-records/batch", response_model=schemas.ServiceRecordBatchResult)
+def create_service_records_batch(
+    batch: schemas.ServiceRecordBatch,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Atölye entegrasyonları: birden çok araca ait servis kayıtlarını tek istekte ekler."""
+    return bulk.add_service_records_batch(db, batch.records, current_user.id)
 
 @router.post("/{vin}/service-records", response_model=schemas.ServiceRecordOut)
 def create_service_record(
     vin: str,
     record: schemas.ServiceRecordCreate,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    access: tuple = Depends(require_vehicle_access(
+        "editor", "driver", detail="Araç bulunamadı veya bu araca servis kaydı ekleme yetkiniz yok."
+    ))
 ):
-    vehicle, role = _can_access_vehicle(db, vin, current_user.id, ["editor", "driver"])
-    
-    if not vehicle:
-        raise HTTPException(status_code=404, detail="Araç bulunamadı veya bu araca servis kaydı ekleme yetkiniz yok.")
-        
     return crud.add_service_record(db=db, vehicle_vin=vin, record=record)
 
 @router.get("/{vin}/service-records", response_model=List[schemas.ServiceRecordOut])
 def get_service_records(
+    vin: str,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    response: Response = None,
+    db: Session = Depends(get_read_db),
+    access: tuple = Depends(require_vehicle_access("viewer", "editor", "driver"))
+):
+    # limit yoksa tüm geçmiş (geriye uyumlu); cursor ile devam eden sayfalar sınırlı
+    if cursor and limit is None:
+        limit = MAX_PAGE_SIZE
+    records = crud.get_service_records(db=db, vehicle_vin=vin, limit=limit, cursor=cursor)
+    set_next_cursor(response, records, limit, lambda r: (r.date, r.id))
+    return records
+
+@router.get("/{vin}/stats", response_model=schemas.VehicleStatsOut)
+def vehicle_stats(
     vin: str,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    access: tuple = Depends(require_vehicle_access("viewer", "editor", "driver"))
 ):
-    vehicle, role = _can_access_vehicle(db, vin, current_user.id, ["viewer", "editor", "driver"])
-    
-    if not vehicle:
-        raise HTTPException(status_code=404, detail="Araç bulunamadı veya yetkiniz yok.")
-        
-    return crud.get_service_records(db=db, vehicle_vin=vin)
+    return stats.get_vehicle_stats(db, vin)
+
+@router.get("/{vin}/upcoming-maintenance", response_model=List[schemas.MaintenanceEstimateOut])
+def upcoming_maintenance(
+    vin: str,
+    db: Session = Depends(get_read_db),
+    access: tuple = Depends(require_vehicle_access("viewer", "editor", "driver"))
+):
+    """Servis geçmişinden tahmin edilen sonraki bakımlar (kilometre ve tarih)."""
+    vehicle, _ = access
+    return FastJSONResponse(maintenance.upcoming_maintenance(db, [(vehicle.vin, vehicle.mileage)]))
 
 @router.delete("/{vin}/service-records/{record_id}")
 def delete_service_record(
     vin: str,
     record_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    access: tuple = Depends(require_vehicle_access("editor", detail="Araç bulunamadı veya silme yetkiniz yok."))
 ):
-    vehicle, role = _can_access_vehicle(db, vin, current_user.id, ["editor"])
-    
-    if not vehicle:
-        raise HTTPException(status_code=404, detail="Araç bulunamadı veya silme yetkiniz yok.")
-    
     success = crud.delete_service_record(db=db, record_id=record_id, vehicle_vin=vin)
     if not success:
         raise HTTPException(status_code=404, detail="Servis kaydı bulunamadı.")
@@ -0,0 +1,174 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+from app import models, schemas, async_crud
+from app.database import get_async_db
+from app.cache import response_cache
+from app.serialization import FastJSONResponse
+from app.pagination import MAX_PAGE_SIZE, next_cursor_headers, set_next_cursor
+from app.dependencies import get_current_user_async, get_read_db_async, require_vehicle_access_async
+from uuid import UUID
+
+# DB_ASYNC modunda routers/vehicles.py'nin önüne eklenir; aynı path'ler burada eşleşir,
+# burada olmayan endpoint'ler senkron router'a düşer.
+router = APIRouter(
+    prefix="/vehicles",
+    tags=["Vehicles"],
+    include_in_schema=False
+)
+
+@router.post("/", response_model=schemas.VehicleOut)
+async def create_vehicle(
+    vehicle: schemas.VehicleCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user_async)
+):
+    return await async_crud.create_vehicle(db=db, vehicle=vehicle, user_id=current_user.id)
+
+@router.get("/my-vehicles", response_model=List[schemas.VehicleOut])
+async def read_my_vehicles(
+    request: Request,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    brand: Optional[str] = None,
+    sort: str = "-year",
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db_async),
+    current_user: models.User = Depends(get_current_user_async)
+):
+    async def load():
+        vehicles = await async_crud.get_user_vehicle_rows(
+            db=db,
+            user_id=current_user.id,
+            skip=skip,
+            limit=limit,
+            brand=brand,
+            sort=sort,
+            cursor=cursor
+        )
+        # Keyset sayfalama: sonraki sayfa için X-Next-Cursor (skip/limit geriye uyumlu)
+        if sort in ("year", "-year"):
+            return vehicles, next_cursor_headers(vehicles, limit, lambda v: (v["year"], v["vin"]))
+        return vehicles, {}
+    return await response_cache.respond_async(request, current_user.id, load)
+
+@router.get("/shared-with-me")
+async def shared_with_me(
+    request: Request,
+    db: AsyncSession = Depends(get_read_db_async),
+    current_user: models.User = Depends(get_current_user_async)
+):
+    async def load():
+        return await async_crud.get_shared_vehicles(db=db, user_id=current_user.id), {}
+    return await response_cache.respond_async(request, current_user.id, load)
+
+@router.put("/{vin}", response_model=schemas.VehicleOut)
+async def update_vehicle(
+    vin: str,
+    update_data: schemas.VehicleUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user_async)
+):
+    vehicle = await async_crud.update_vehicle(db=db, vehicle_vin=vin, user_id=current_user.id, update_data=update_data)
+    if not vehicle:
+        raise HTTPException(status_code=404, detail="Araç bulunamadı veya güncelleme yetkiniz yok.")
+    return vehicle
+
+@router.delete("/{vin}")
+async def delete_vehicle(
+    vin: str,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user_async)
+):
+    success = await async_crud.delete_vehicle(db, vehicle_vin=vin, user_id=current_user.id)
+
+    if not success:
+        raise HTTPException(status_code=404, detail="Araç bulunamadı veya silme yetkiniz yok")
+    return {"message": "Araç başarıyla garajdan çıkarıldı"}
+
+@router.post("/{vin}/share")
+async def share_vehicle(
+    vin: str,
+    share_data: schemas.ShareVehicleCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user_async),
+    access: tuple = Depends(require_vehicle_access_async(detail="Araç bulunamadı veya bu aracı paylaşma yetkiniz yok."))
+):
+    target_user = await async_crud.get_user_by_email(db, email=share_data.email)
+    if not target_user:
+        raise HTTPException(status_code=404, detail="Bu email adresiyle kayıtlı bir kullanıcı bulunamadı.")
+
+    if target_user.id == current_user.id:
+        raise HTTPException(status_code=400, detail="Kendi aracınızı kendinize paylaşamazsınız.")
+
+    await async_crud.share_vehicle(
+        db=db,
+        vehicle_vin=vin,
+        target_user_id=target_user.id,
+        permission=share_data.permission
+    )
+    return {"message": f"Araç başarıyla {share_data.email} kullanıcısına '{share_data.permission}' yetkisiyle paylaşıldı."}
+
+@router.get("/{vin}/access", response_model=List[schemas.VehicleAccessOutWithEmail])
+async def get_vehicle_access_list(
+    vin: str,
+    db: AsyncSession = Depends(get_read_db_async),
+    access: tuple = Depends(require_vehicle_access_async())
+):
+    return FastJSONResponse(await async_crud.get_vehicle_accesses(db=db, vehicle_vin=vin))
+
+@router.delete("/{vin}/access/{target_user_id}")
+async def remove_vehicle_access(
+    vin: str,
+    target_user_id: UUID,
+    db: AsyncSession = Depends(get_async_db),
+    access: tuple = Depends(require_vehicle_access_async())
+):
+    success = await async_crud.revoke_vehicle_access(db=db, vehicle_vin=vin, target_user_id=target_user_id)
+    if not success:
+        raise HTTPException(status_code=404, detail="Bu kullanıcının bu araçta zaten bir yetkisi yok.")
+
+    return {"message": "Kullanıcının araç üzerindeki yetkisi tamamen kaldırıldı."}
+
+# --- SERVİS GEÇMİŞİ ENDPOINT'LERİ ---
+
+@router.post("/{vin}/service-records", response_model=schemas.ServiceRecordOut)
+async def create_service_record(
+    vin: str,
+    record: schemas.ServiceRecordCreate,
+    db: AsyncSession = Depends(get_async_db),
+    access: tuple = Depends(require_vehicle_access_async(
+        "editor", "driver", detail="Araç bulunamadı veya bu araca servis kaydı ekleme yetkiniz yok."
+    ))
+):
+    return await async_crud.add_service_record(db=db, vehicle_vin=vin, record=record)
+
+@router.get("/{vin}/service-records", response_model=List[schemas.ServiceRecordOut])
+async def get_service_records(
+    vin: str,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    response: Response = None,
+    db: AsyncSession = Depends(get_read_db_async),
+    access: tuple = Depends(require_vehicle_access_async("viewer", "editor", "driver"))
+):
+    # limit yoksa tüm geçmiş (geriye uyumlu); cursor ile devam eden sayfalar sınırlı
+    if cursor and limit is None:
+        limit = MAX_PAGE_SIZE
+    records = await async_crud.get_service_records(db=db, vehicle_vin=vin, limit=limit, cursor=cursor)
+    set_next_cursor(response, records, limit, lambda r: (r.date, r.id))
+    return records
+
+@router.delete("/{vin}/service-records/{record_id}")
+async def delete_service_record(
+    vin: str,
+    record_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    access: tuple = Depends(require_vehicle_access_async("editor", detail="Araç bulunamadı veya silme yetkiniz yok."))
+):
+    success = await async_crud.delete_service_record(db=db, record_id=record_id, vehicle_vin=vin)
+    if not success:
+        raise HTTPException(status_code=404, detail="Servis kaydı bulunamadı.")
+
+    return {"message": "Servis kaydı silindi."}
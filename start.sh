@@ -18,5 +18,9 @@ done
 echo "Running Alembic migrations..."
 alembic upgrade head
 
-echo "Starting Vastarion Garage API..."
-exec uvicorn main:app --host 0.0.0.0 --port 8000
+# Her worker kendi bağlantı havuzunu açar; DB_MAX_CONNECTIONS verilirse
+# app/database.py bütçeyi WEB_CONCURRENCY'ye böler
+export WEB_CONCURRENCY="${WEB_CONCURRENCY:-1}"
+
+echo "Starting Vastarion Garage API with $WEB_CONCURRENCY worker(s)..."
+exec uvicorn main:app --host 0.0.0.0 --port 8000 --workers "$WEB_CONCURRENCY"
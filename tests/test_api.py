@@ -3,13 +3,30 @@ Vastarion Garage — API Test Suite
 Tests: Auth, Vehicles, Service Records, Users
 Uses SQLite in-memory DB (no PostgreSQL needed)
 """
+import os
+os.environ.setdefault("BCRYPT_ROUNDS", "4")  # testlerde hızlı bcrypt
+os.environ.setdefault("QUERY_DEBUG", "true")  # N+1 / sorgu bütçesi ihlalleri testi düşürür
+
+import asyncio
+import csv
+import io
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from uuid import UUID, uuid4
 import pytest
+from fastapi import HTTPException
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.orm import sessionmaker
 
-from app.database import Base, get_db
-from main import app
+from app import archive, crud, database, events, maintenance, models, outbox, querylog, ratelimit, search, serialization, telemetry, utils
+from app.auth_cache import user_cache
+from app.cache import response_cache
+from app.database import Base, RoutingSession, get_db, get_async_db, recent_writers
+from app.hashing import PasswordHasher
+from main import app, create_app
 
 # --- In-memory SQLite setup ---
 SQLALCHEMY_TEST_URL = "sqlite:///./test.db"
@@ -32,10 +49,49 @@ client = TestClient(app)
 def reset_db():
     """Her testten önce veritabanını sıfırla."""
     Base.metadata.create_all(bind=engine)
+    user_cache.clear()
+    response_cache.clear()
+    recent_writers.clear()
+    search.index_cache.clear()
+    ratelimit.store.clear()
+    events.broker.clear()
+    telemetry.buffer.clear()
+    maintenance.estimate_cache.clear()
     yield
     Base.metadata.drop_all(bind=engine)
 
 
+@pytest.fixture(autouse=True)
+def query_budget():
+    """Test sırasında bir route bütçesini aşarsa ya da N+1 üretirse testi düşürür."""
+    querylog.violations.clear()
+    yield
+    if querylog.violations:
+        details = "\n".join(f"{method} {route}: {'; '.join(problems)}" for method, route, problems in querylog.violations)
+        querylog.violations.clear()
+        pytest.fail(f"Sorgu bütçesi ihlali:\n{details}")
+
+
+@pytest.fixture
+def max_queries():
+    """`with max_queries(2): ...` — blok içindeki SQL sayısı ve N+1 kontrolü (route dışı kod için)."""
+    from contextlib import contextmanager
+
+    @contextmanager
+    def check(budget: int):
+        querylog.install_recorder_hooks()
+        recorder = querylog.QueryRecorder()
+        token = querylog.current_recorder.set(recorder)
+        try:
+            yield recorder
+        finally:
+            querylog.current_recorder.reset(token)
+        problems = recorder.problems(budget)
+        assert not problems, "; ".join(problems)
+
+    return check
+
+
 def signup_user(email="test@vastarion.com", password="Test123"):
     return client.post("/auth/signup", json={"email": email, "password": password})
 
@@ -92,6 +148,174 @@ class TestAuth:
         assert resp.status_code == 400
 
 
+class TestPasswordHashing:
+    def test_rehash_on_login_when_cost_changes(self, monkeypatch):
+        signup_user()
+        monkeypatch.setattr(utils, "BCRYPT_ROUNDS", 5)
+        assert login_user().status_code == 200
+
+        db = TestSessionLocal()
+        try:
+            user = db.query(models.User).filter(models.User.email == "test@vastarion.com").first()
+            assert utils.hash_rounds(user.hashed_password) == 5
+        finally:
+            db.close()
+        assert login_user().status_code == 200
+
+    def test_banned_login_skips_rehash(self, monkeypatch):
+        signup_user()
+        with TestSessionLocal() as db:
+            user = crud.get_user_by_email(db, "test@vastarion.com")
+            rounds = utils.hash_rounds(user.hashed_password)
+            crud.set_user_banned(db, user, True)
+        monkeypatch.setattr(utils, "BCRYPT_ROUNDS", rounds - 1)
+        assert login_user().status_code == 403
+        with TestSessionLocal() as db:
+            assert utils.hash_rounds(crud.get_user_by_email(db, "test@vastarion.com").hashed_password) == rounds
+
+    def test_hasher_rejects_when_queue_full(self):
+        hasher = PasswordHasher(workers=1, queue_limit=0)
+        release = threading.Event()
+
+        async def scenario():
+            blocked = asyncio.ensure_future(hasher._run(release.wait))
+            await asyncio.sleep(0.05)
+            with pytest.raises(HTTPException) as exc:
+                await hasher.hash("Test123")
+            release.set()
+            await blocked
+            return exc.value
+
+        try:
+            error = asyncio.run(scenario())
+        finally:
+            hasher.shutdown()
+        assert error.status_code == 503
+        assert error.headers["Retry-After"] == "1"
+
+
+class TestRateLimit:
+    def test_account_bucket_rejects_before_bcrypt(self, monkeypatch):
+        signup_user()
+        from app.hashing import hasher
+        calls = []
+        original = hasher.verify
+
+        async def counting_verify(password, hashed):
+            calls.append(password)
+            return await original(password, hashed)
+
+        monkeypatch.setattr(hasher, "verify", counting_verify)
+        limit = int(ratelimit.RULES[("POST", "/auth/login")].account.capacity)
+        for i in range(limit):
+            # Büyük / küçük harf aynı hesap bucket'ı
+            email = "TEST@vastarion.com" if i % 2 else "test@vastarion.com"
+            assert client.post("/auth/login", data={"username": email, "password": "Yanlis123"}).status_code == 400
+
+        verified = len(calls)
+        res = login_user()
+        assert res.status_code == 429
+        assert int(res.headers["Retry-After"]) >= 1
+        assert len(calls) == verified
+        # Başka bir hesap aynı IP'den hâlâ deneyebilir
+        assert client.post("/auth/login", data={"username": "diger@vastarion.com", "password": "x"}).status_code == 400
+
+    def test_ip_bucket(self, monkeypatch):
+        monkeypatch.setitem(
+            ratelimit.RULES, ("POST", "/auth/signup"), ratelimit.Rule("signup", ratelimit.Rate(2, 60), None, "email")
+        )
+        statuses = [
+            client.post("/auth/signup", json={"email": f"ip{i}@vastarion.com", "password": "Test123"}).status_code
+            for i in range(3)
+        ]
+        assert statuses == [200, 200, 429]
+        assert client.get("/").status_code == 200
+
+    def test_unparseable_body_falls_back_to_ip_limit(self):
+        assert ratelimit.account_key("application/json", b"[" * 100000, "email") is None
+        resp = client.post("/auth/signup", content=b"[" * 100000, headers={"Content-Type": "application/json"})
+        assert resp.status_code in (400, 422)
+
+    def test_memory_store_refills(self):
+        store = ratelimit.MemoryStore(shards=2, max_keys=10)
+        rate = ratelimit.Rate(1, 0.05)
+        assert store.take("k", rate) == 0
+        assert 0 < store.take("k", rate) <= 0.05
+        time.sleep(0.06)
+        assert store.take("k", rate) == 0
+        assert ratelimit.Rate.parse("0") is None and ratelimit.Rate.parse("5/60").refill == 5 / 60
+
+
+class TestAuthCache:
+    @pytest.fixture
+    def query_count(self):
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(engine, "before_cursor_execute", listener)
+        yield statements
+        event.remove(engine, "before_cursor_execute", listener)
+
+    def _set_banned(self, email, banned):
+        db = TestSessionLocal()
+        try:
+            crud.set_user_banned(db, crud.get_user_by_email(db, email), banned)
+        finally:
+            db.close()
+
+    def test_warm_cache_skips_db(self, query_count):
+        headers = auth_header()
+        assert client.get("/users/me", headers=headers).status_code == 200
+        query_count.clear()
+        resp = client.get("/users/me", headers=headers)
+        assert resp.status_code == 200
+        assert resp.json()["email"] == "test@vastarion.com"
+        assert query_count == []
+
+    def test_ban_invalidates_token(self):
+        headers = auth_header()
+        client.get("/users/me", headers=headers)
+        self._set_banned("test@vastarion.com", True)
+        assert client.get("/users/me", headers=headers).status_code == 401
+        assert login_user().status_code == 403
+
+    def test_unban_requires_new_token(self):
+        headers = auth_header()
+        self._set_banned("test@vastarion.com", True)
+        self._set_banned("test@vastarion.com", False)
+        assert client.get("/users/me", headers=headers).status_code == 401
+        assert client.get("/users/me", headers=auth_header()).status_code == 200
+
+    def test_admin_endpoints_and_cli_revoke_tokens(self, monkeypatch, capsys):
+        from app import admin
+        user = auth_header()
+        user_id = client.get("/users/me", headers=user).json()["id"]
+        assert client.put(f"/users/{user_id}/ban", json={"is_banned": True}, headers=auth_header("other@vastarion.com")).status_code == 403
+
+        monkeypatch.setattr(admin, "SessionLocal", TestSessionLocal)
+        monkeypatch.setattr("sys.argv", ["app.admin", "role", "admin@vastarion.com", "admin"])
+        signup_user("admin@vastarion.com")
+        admin.main()
+        assert "role=admin" in capsys.readouterr().out
+        boss = auth_header("admin@vastarion.com")
+        assert client.get("/users/me", headers=boss).json()["role"] == "admin"
+
+        resp = client.put(f"/users/{user_id}/role", json={"role": "admin"}, headers=boss)
+        assert resp.status_code == 200 and resp.json()["role"] == "admin"
+        # Rol değişimi eski token'ı geçersiz kılar
+        assert client.get("/users/me", headers=user).status_code == 401
+        assert client.put(f"/users/{user_id}/ban", json={"is_banned": True}, headers=boss).json()["is_banned"] is True
+        assert login_user().status_code == 403
+        assert client.put(f"/users/{user_id}/role", json={"role": "root"}, headers=boss).status_code == 422
+        boss_id = client.get("/users/me", headers=boss).json()["id"]
+        assert client.put(f"/users/{boss_id}/ban", json={"is_banned": True}, headers=boss).status_code == 400
+
+    def test_legacy_email_token(self):
+        signup_user()
+        token = utils.create_access_token(data={"sub": "test@vastarion.com"})
+        resp = client.get("/users/me", headers={"Authorization": f"Bearer {token}"})
+        assert resp.status_code == 200
+
+
 # ==================== VEHICLE TESTS ====================
 
 class TestVehicles:
@@ -144,11 +368,1092 @@ class TestVehicles:
         resp = client.get("/vehicles/my-vehicles", headers=headers)
         assert len(resp.json()) == 0
 
+    def _create_many(self, headers, count):
+        for i in range(count):
+            vehicle = dict(self.VEHICLE, vin=f"WBAPH5C55BA{i:06d}", year=2015 + i % 3)
+            assert client.post("/vehicles/", json=vehicle, headers=headers).status_code == 200
+
+    def test_cursor_pagination(self):
+        headers = auth_header()
+        self._create_many(headers, 7)
+
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+            resp = client.get("/vehicles/my-vehicles", params=params, headers=headers)
+            assert resp.status_code == 200
+            seen += [(v["year"], v["vin"]) for v in resp.json()]
+            cursor = resp.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+
+        assert len(seen) == 7
+        assert seen == sorted(seen, reverse=True)
+        offset_page = client.get("/vehicles/my-vehicles", params={"skip": 3, "limit": 3}, headers=headers).json()
+        assert [(v["year"], v["vin"]) for v in offset_page] == seen[3:6]
+
+    def test_cursor_pagination_ascending(self):
+        headers = auth_header()
+        self._create_many(headers, 5)
+        first = client.get("/vehicles/my-vehicles", params={"limit": 2, "sort": "year"}, headers=headers)
+        second = client.get(
+            "/vehicles/my-vehicles",
+            params={"limit": 10, "sort": "year", "cursor": first.headers["X-Next-Cursor"]},
+            headers=headers,
+        )
+        years = [v["year"] for v in first.json() + second.json()]
+        assert len(years) == 5 and years == sorted(years)
+        assert "X-Next-Cursor" not in second.headers
+
+    def test_invalid_cursor(self):
+        headers = auth_header()
+        resp = client.get("/vehicles/my-vehicles", params={"cursor": "bozuk"}, headers=headers)
+        assert resp.status_code == 400
+
+    def test_service_record_pagination(self):
+        headers = auth_header()
+        client.post("/vehicles/", json=self.VEHICLE, headers=headers)
+        url = f"/vehicles/{self.VEHICLE['vin']}/service-records"
+        for i in range(5):
+            client.post(url, json={"description": f"Bakım {i}", "mileage": 1000 * (i + 1)}, headers=headers)
+
+        assert len(client.get(url, headers=headers).json()) == 5
+        first = client.get(url, params={"limit": 2}, headers=headers)
+        rest = client.get(url, params={"limit": 10, "cursor": first.headers["X-Next-Cursor"]}, headers=headers)
+        ids = [r["id"] for r in first.json() + rest.json()]
+        assert sorted(ids) == [1, 2, 3, 4, 5] and len(set(ids)) == 5
+
+    def test_page_size_is_validated(self, monkeypatch):
+        from app import pagination
+        headers = auth_header()
+        client.post("/vehicles/", json=self.VEHICLE, headers=headers)
+        url = f"/vehicles/{self.VEHICLE['vin']}/service-records"
+        for i in range(3):
+            client.post(url, json={"description": f"Bakım {i}", "mileage": 1000 * (i + 1)}, headers=headers)
+        for limit in (-1, 0, pagination.MAX_PAGE_SIZE + 1):
+            assert client.get(url, params={"limit": limit}, headers=headers).status_code == 422
+            assert client.get("/vehicles/my-vehicles", params={"limit": limit}, headers=headers).status_code == 422
+        assert client.get("/vehicles/my-vehicles", params={"skip": -1}, headers=headers).status_code == 422
+        # Cursor ile limitsiz istek: sayfa MAX_PAGE_SIZE ile sınırlı
+        monkeypatch.setattr("routers.vehicles.MAX_PAGE_SIZE", 1)
+        cursor = client.get(url, params={"limit": 1}, headers=headers).headers["X-Next-Cursor"]
+        assert len(client.get(url, params={"cursor": cursor}, headers=headers).json()) == 1
+
     def test_create_vehicle_unauthorized(self):
         resp = client.post("/vehicles/", json=self.VEHICLE)
         assert resp.status_code == 401
 
 
+class TestVehicleAccess:
+    VIN = TestVehicles.VEHICLE["vin"]
+    RECORD = {"description": "Yağ Değişimi", "mileage": 2000}
+
+    def _share(self, owner, email, permission):
+        auth_header(email)
+        resp = client.post(f"/vehicles/{self.VIN}/share", json={"email": email, "permission": permission}, headers=owner)
+        assert resp.status_code == 200
+        return auth_header(email)
+
+    @pytest.fixture
+    def owner(self):
+        headers = auth_header("owner@vastarion.com")
+        client.post("/vehicles/", json=TestVehicles.VEHICLE, headers=headers)
+        return headers
+
+    def test_role_permissions(self, owner):
+        viewer = self._share(owner, "viewer@vastarion.com", "viewer")
+        driver = self._share(owner, "driver@vastarion.com", "driver")
+        url = f"/vehicles/{self.VIN}/service-records"
+
+        assert client.post(url, json=self.RECORD, headers=viewer).status_code == 404
+        record = client.post(url, json=self.RECORD, headers=driver).json()
+        assert client.get(url, headers=viewer).status_code == 200
+        assert client.delete(f"{url}/{record['id']}", headers=driver).status_code == 404
+        assert client.delete(f"{url}/{record['id']}", headers=owner).status_code == 200
+
+    def test_owner_only_endpoints(self, owner):
+        editor = self._share(owner, "editor@vastarion.com", "editor")
+        assert client.get(f"/vehicles/{self.VIN}/access", headers=editor).status_code == 404
+        accesses = client.get(f"/vehicles/{self.VIN}/access", headers=owner).json()
+        assert [a["email"] for a in accesses] == ["editor@vastarion.com"]
+
+        resp = client.delete(f"/vehicles/{self.VIN}/access/{accesses[0]['user_id']}", headers=owner)
+        assert resp.status_code == 200
+        assert client.get(f"/vehicles/{self.VIN}/service-records", headers=editor).status_code == 404
+
+    def test_service_record_batch(self, owner):
+        driver = self._share(owner, "driver@vastarion.com", "driver")
+        other_vin = "WBAPH5C55BA999999"
+        client.post("/vehicles/", json=dict(TestVehicles.VEHICLE, vin=other_vin), headers=driver)
+
+        records = [
+            {"vin": self.VIN, "description": "Fren Balatası", "mileage": 3000, "cost": 1500},
+            {"vin": other_vin, "description": "Lastik", "mileage": 100},
+            {"vin": "YOK00000000000000", "description": "Bakım", "mileage": 100},
+            {"vin": self.VIN, "description": "x", "mileage": -1},
+        ]
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            resp = client.post("/vehicles/service-records/batch", json={"records": records}, headers=driver)
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+
+        assert resp.status_code == 200
+        result = resp.json()
+        assert result["inserted"] == 2 and result["failed"] == 2
+        assert [c["row"] for c in result["created"]] == [1, 2]
+        assert sorted(e["row"] for e in result["errors"]) == [3, 4]
+        # Tüm VIN'lerin yetkisi tek SELECT'te
+        assert sum(s.lstrip().startswith("SELECT") and "vehicle_access" in s for s in statements) == 1
+
+        owner_records = client.get(f"/vehicles/{self.VIN}/service-records", headers=owner).json()
+        assert [r["description"] for r in owner_records] == ["Fren Balatası"]
+
+        resp = client.post("/vehicles/service-records/batch", headers=driver,
+                           json={"records": [{"vin": 12345, "description": "x", "mileage": 1}]})
+        assert resp.status_code == 200
+        assert resp.json()["errors"][0]["vin"] is None
+
+    def test_stranger_and_deleted_vehicle(self, owner):
+        stranger = auth_header("stranger@vastarion.com")
+        assert client.get(f"/vehicles/{self.VIN}/service-records", headers=stranger).status_code == 404
+        client.delete(f"/vehicles/{self.VIN}", headers=owner)
+        assert client.get(f"/vehicles/{self.VIN}/service-records", headers=owner).status_code == 404
+
+    def test_single_authorization_query(self, owner):
+        viewer = self._share(owner, "viewer@vastarion.com", "viewer")
+        url = f"/vehicles/{self.VIN}/service-records"
+        client.get(url, headers=viewer)  # auth cache'i ısıt
+
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            assert client.get(url, headers=viewer).status_code == 200
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+        # Bir yetki sorgusu + bir servis kaydı sorgusu
+        assert len(statements) == 2
+
+
+class TestFleets:
+    VINS = [f"FLEET{i:012d}" for i in range(3)]
+
+    @pytest.fixture
+    def fleet(self):
+        """Filo sahibi, 3 araçlık filo ve iki üyeli bir organizasyon."""
+        owner = auth_header("fleet-owner@vastarion.com")
+        for vin in self.VINS:
+            client.post("/vehicles/", json=dict(TestVehicles.VEHICLE, vin=vin), headers=owner)
+        fleet_id = client.post("/fleets/", json={"name": "Dağıtım"}, headers=owner).json()["id"]
+        resp = client.post(f"/fleets/{fleet_id}/vehicles", json={"vins": [*self.VINS, "YOK00000000000000"]}, headers=owner)
+        assert resp.json() == {"added": 3, "not_found": ["YOK00000000000000"]}
+
+        admin = auth_header("team-admin@vastarion.com")
+        org_id = client.post("/organizations/", json={"name": "Saha Ekibi"}, headers=admin).json()["id"]
+        auth_header("team-member@vastarion.com")
+        resp = client.post(f"/organizations/{org_id}/members", json={"email": "team-member@vastarion.com"}, headers=admin)
+        assert resp.status_code == 200
+        # Filo sahibi sadece üyesi olduğu organizasyona yetki verebilir
+        client.post(f"/organizations/{org_id}/members", json={"email": "fleet-owner@vastarion.com"}, headers=admin)
+        return {"owner": owner, "fleet_id": fleet_id, "org_id": org_id, "admin": admin,
+                "member": auth_header("team-member@vastarion.com")}
+
+    def _grant(self, fleet, permission):
+        resp = client.post(f"/fleets/{fleet['fleet_id']}/grants",
+                           json={"organization_id": fleet["org_id"], "permission": permission}, headers=fleet["owner"])
+        assert resp.status_code == 200
+
+    def test_grant_gives_every_member_access_to_the_fleet(self, fleet):
+        member, url = fleet["member"], f"/vehicles/{self.VINS[0]}/service-records"
+        assert client.get("/vehicles/shared-with-me", headers=member).json() == []
+        assert client.get(url, headers=member).status_code == 404
+
+        self._grant(fleet, "driver")
+        shared = client.get("/vehicles/shared-with-me", headers=member).json()
+        assert sorted(v["vin"] for v in shared) == self.VINS
+        assert {v["permission"] for v in shared} == {"driver"}
+        assert {v["owner_email"] for v in shared} == {"fleet-owner@vastarion.com"}
+        record = client.post(url, json=TestVehicleAccess.RECORD, headers=fleet["admin"]).json()
+        assert client.delete(f"{url}/{record['id']}", headers=member).status_code == 404
+        assert client.get(f"/fleets/{fleet['fleet_id']}/grants", headers=fleet["owner"]).json() == [
+            {"organization_id": fleet["org_id"], "organization_name": "Saha Ekibi", "permission": "driver"}
+        ]
+
+        # Filodan çıkan araç ve ekipten çıkan üye erişimini kaybeder
+        client.delete(f"/fleets/{fleet['fleet_id']}/vehicles/{self.VINS[0]}", headers=fleet["owner"])
+        assert client.get(url, headers=member).status_code == 404
+        member_id = next(m["user_id"] for m in client.get(
+            f"/organizations/{fleet['org_id']}/members", headers=fleet["admin"]).json()
+            if m["email"] == "team-member@vastarion.com")
+        client.delete(f"/organizations/{fleet['org_id']}/members/{member_id}", headers=fleet["admin"])
+        assert client.get("/vehicles/shared-with-me", headers=member).json() == []
+
+    def test_direct_share_and_fleet_grant_merge_to_the_highest_permission(self, fleet):
+        self._grant(fleet, "viewer")
+        client.post(f"/vehicles/{self.VINS[1]}/share",
+                    json={"email": "team-member@vastarion.com", "permission": "editor"}, headers=fleet["owner"])
+        shared = client.get("/vehicles/shared-with-me", headers=fleet["member"]).json()
+        assert len(shared) == 3
+        assert {v["vin"]: v["permission"] for v in shared}[self.VINS[1]] == "editor"
+        url = f"/vehicles/{self.VINS[1]}/service-records"
+        record = client.post(url, json=TestVehicleAccess.RECORD, headers=fleet["member"]).json()
+        assert client.delete(f"{url}/{record['id']}", headers=fleet["member"]).status_code == 200
+
+        client.delete(f"/fleets/{fleet['fleet_id']}/grants/{fleet['org_id']}", headers=fleet["owner"])
+        assert [v["vin"] for v in client.get("/vehicles/shared-with-me", headers=fleet["member"]).json()] == [self.VINS[1]]
+
+    def test_fleet_members_get_change_events(self, fleet):
+        self._grant(fleet, "viewer")
+        with TestSessionLocal() as db:
+            audience = events.audiences(db, [self.VINS[0]])[self.VINS[0]]
+            assert len(audience) == 3  # sahip + yönetici + üye
+            assert len(list(db.scalars(crud.vehicle_audience_query(self.VINS[0])))) == 3
+
+    def test_grant_and_revoke_notify_members(self, fleet):
+        member_id = UUID(client.get("/users/me", headers=fleet["member"]).json()["id"])
+
+        async def scenario():
+            subscription = events.broker.subscribe(member_id)
+            await asyncio.to_thread(self._grant, fleet, "driver")
+            await asyncio.to_thread(client.delete, f"/fleets/{fleet['fleet_id']}/grants/{fleet['org_id']}",
+                                    headers=fleet["owner"])
+            await asyncio.sleep(0)
+            return TestChangeFeed._drain(subscription)
+
+        received = asyncio.run(scenario())
+        assert [(e["type"], e["vin"]) for e in received] == [("access.granted", None), ("access.revoked", None)]
+        assert received[0]["data"] == {"fleet_id": fleet["fleet_id"], "organization_id": fleet["org_id"],
+                                       "permission": "driver"}
+
+    def test_member_changes_notify_the_member(self, fleet):
+        self._grant(fleet, "viewer")
+        newcomer = auth_header("newcomer@vastarion.com")
+        newcomer_id = UUID(client.get("/users/me", headers=newcomer).json()["id"])
+        url = f"/organizations/{fleet['org_id']}/members"
+
+        async def scenario():
+            subscription = events.broker.subscribe(newcomer_id)
+            await asyncio.to_thread(client.post, url, json={"email": "newcomer@vastarion.com"}, headers=fleet["admin"])
+            await asyncio.to_thread(client.delete, f"{url}/{newcomer_id}", headers=fleet["admin"])
+            await asyncio.sleep(0)
+            return TestChangeFeed._drain(subscription)
+
+        received = asyncio.run(scenario())
+        assert [e["type"] for e in received] == ["access.granted", "access.revoked"]
+        assert received[0]["data"] == {"fleet_id": fleet["fleet_id"], "organization_id": fleet["org_id"],
+                                       "permission": "viewer"}
+
+    def test_grant_requires_membership_of_the_organization(self, fleet):
+        outsider = auth_header("outsider-admin@vastarion.com")
+        other_org = client.post("/organizations/", json={"name": "Başka Ekip"}, headers=outsider).json()["id"]
+        resp = client.post(f"/fleets/{fleet['fleet_id']}/grants",
+                           json={"organization_id": other_org, "permission": "editor"}, headers=fleet["owner"])
+        assert resp.status_code == 404
+        assert client.get(f"/fleets/{fleet['fleet_id']}/grants", headers=fleet["owner"]).json() == []
+
+    def test_last_admin_cannot_leave_or_be_demoted(self, fleet):
+        admin, url = fleet["admin"], f"/organizations/{fleet['org_id']}/members"
+        admin_id = client.get("/users/me", headers=admin).json()["id"]
+        assert client.delete(f"{url}/{admin_id}", headers=admin).status_code == 400
+        resp = client.post(url, json={"email": "team-admin@vastarion.com", "role": "member"}, headers=admin)
+        assert resp.status_code == 400
+        # Başka bir yönetici varken ayrılabilir
+        client.post(url, json={"email": "team-member@vastarion.com", "role": "admin"}, headers=admin)
+        assert client.delete(f"{url}/{admin_id}", headers=admin).status_code == 200
+        assert [m["role"] for m in client.get(url, headers=fleet["member"]).json()
+                if m["email"] == "team-member@vastarion.com"] == ["admin"]
+
+    def test_only_owners_and_admins_manage(self, fleet):
+        member, stranger = fleet["member"], auth_header("stranger@vastarion.com")
+        assert client.post(f"/fleets/{fleet['fleet_id']}/vehicles", json={"vins": self.VINS}, headers=member).status_code == 404
+        resp = client.post(f"/organizations/{fleet['org_id']}/members", json={"email": "stranger@vastarion.com"}, headers=member)
+        assert resp.status_code == 403
+        assert client.get(f"/organizations/{fleet['org_id']}/members", headers=stranger).status_code == 404
+        assert client.get("/organizations/", headers=member).json()[0]["role"] == "member"
+        # Başkasının aracı filoya eklenemez
+        client.post("/vehicles/", json=dict(TestVehicles.VEHICLE, vin="STRANGER000000001"), headers=stranger)
+        resp = client.post(f"/fleets/{fleet['fleet_id']}/vehicles", json={"vins": ["STRANGER000000001"]}, headers=fleet["owner"])
+        assert resp.json()["added"] == 0
+
+
+class TestArchive:
+    VIN = TestVehicles.VEHICLE["vin"]
+
+    @pytest.fixture
+    def deleted(self):
+        """Servis kaydı ve paylaşımı olan, silinmiş ve bekleme süresi dolmuş bir araç."""
+        owner = auth_header()
+        client.post("/vehicles/", json=TestVehicles.VEHICLE, headers=owner)
+        record = client.post(f"/vehicles/{self.VIN}/service-records", json=TestVehicleAccess.RECORD, headers=owner).json()
+        auth_header("viewer@vastarion.com")
+        client.post(f"/vehicles/{self.VIN}/share", json={"email": "viewer@vastarion.com", "permission": "editor"}, headers=owner)
+        assert client.delete(f"/vehicles/{self.VIN}", headers=owner).status_code == 200
+        with TestSessionLocal() as db:
+            vehicle = db.get(models.Vehicle, self.VIN)
+            assert vehicle.deleted_at is not None
+            vehicle.deleted_at -= timedelta(days=archive.ARCHIVE_RETENTION_DAYS + 1)
+            db.commit()
+        return owner, record
+
+    def _count(self, model) -> int:
+        with TestSessionLocal() as db:
+            return db.query(model).count()
+
+    def test_expired_vehicles_move_to_archive_and_restore(self, deleted):
+        owner, record = deleted
+        viewer = auth_header("viewer@vastarion.com")
+        assert archive.archive_deleted(TestSessionLocal) == 1
+        assert self._count(models.Vehicle) == self._count(models.ServiceRecord) == self._count(models.VehicleAccess) == 0
+        assert self._count(models.ServiceRecordArchive) == self._count(models.VehicleAccessArchive) == 1
+        listed = client.get("/vehicles/deleted", headers=owner).json()
+        assert [(v["vin"], v["archived"]) for v in listed] == [(self.VIN, True)]
+
+        resp = client.post(f"/vehicles/{self.VIN}/restore", headers=owner)
+        assert resp.status_code == 200
+        assert resp.json()["vin"] == self.VIN
+        records = client.get(f"/vehicles/{self.VIN}/service-records", headers=owner).json()
+        assert [r["id"] for r in records] == [record["id"]]
+        assert [v["permission"] for v in client.get("/vehicles/shared-with-me", headers=viewer).json()] == ["editor"]
+        assert self._count(models.VehicleArchive) == self._count(models.ServiceRecordArchive) == 0
+        assert client.get("/vehicles/deleted", headers=owner).json() == []
+
+    def test_recently_deleted_vehicles_stay_until_the_window_ends(self, deleted):
+        owner, _ = deleted
+        client.post(f"/vehicles/{self.VIN}/restore", headers=owner)
+        client.delete(f"/vehicles/{self.VIN}", headers=owner)
+        assert archive.archive_deleted(TestSessionLocal) == 0
+        assert client.get("/vehicles/deleted", headers=owner).json()[0]["archived"] is False
+
+        # Bekleme süresindeki silme doğrudan geri alınır
+        assert client.post(f"/vehicles/{self.VIN}/restore", headers=owner).status_code == 200
+        assert [v["vin"] for v in client.get("/vehicles/my-vehicles", headers=owner).json()] == [self.VIN]
+
+    def test_restore_is_owner_only_and_refuses_a_reused_vin(self, deleted):
+        owner, _ = deleted
+        archive.archive_deleted(TestSessionLocal, batch_size=1)
+        stranger = auth_header("stranger@vastarion.com")
+        assert client.post(f"/vehicles/{self.VIN}/restore", headers=stranger).status_code == 404
+        client.post("/vehicles/", json=TestVehicles.VEHICLE, headers=stranger)
+        assert client.post(f"/vehicles/{self.VIN}/restore", headers=owner).status_code == 409
+        assert self._count(models.VehicleArchive) == 1
+
+
+class TestTelemetry:
+    VIN = TestVehicles.VEHICLE["vin"]
+
+    def _readings(self, *points, vin=VIN):
+        return {"readings": [{"vin": vin, "timestamp": ts, "odometer": km} for ts, km in points]}
+
+    def test_readings_are_buffered_coalesced_and_flushed_in_bulk(self):
+        owner = auth_header()
+        client.post("/vehicles/", json=TestVehicles.VEHICLE, headers=owner)
+        batch = self._readings(
+            ("2026-10-01T10:00:00Z", 1600), ("2026-10-01T10:00:00.500Z", 1601),  # aynı saniye: tek satır
+            ("2026-10-01T10:05:00Z", 1650), ("2026-10-01T10:01:00Z", 1610),
+        )
+        batch["readings"].append({"vin": "YOK00000000000000", "timestamp": "2026-10-01T10:00:00Z", "odometer": 1})
+        resp = client.post("/telemetry/odometer", json=batch, headers=owner)
+        assert resp.status_code == 202
+        assert resp.json() == {"accepted": 4, "rejected": ["YOK00000000000000"]}
+        assert client.get("/vehicles/my-vehicles", headers=owner).json()[0]["mileage"] == 1500
+
+        assert telemetry.flush(TestSessionLocal) == 3
+        assert client.get("/vehicles/my-vehicles", headers=owner).json()[0]["mileage"] == 1650
+        # Geç gelen eski okuma kilometreyi düşürmez; tekrar gönderim yeni satır üretmez
+        client.post("/telemetry/odometer", json=self._readings(("2026-10-01T09:00:00Z", 1550), ("2026-10-01T10:05:00Z", 1650)), headers=owner)
+        telemetry.flush(TestSessionLocal)
+        assert client.get("/vehicles/my-vehicles", headers=owner).json()[0]["mileage"] == 1650
+        with TestSessionLocal() as db:
+            assert db.query(models.OdometerReading).count() == 4
+
+    def test_downsampled_history_and_permissions(self):
+        owner = auth_header()
+        client.post("/vehicles/", json=TestVehicles.VEHICLE, headers=owner)
+        points = [(f"2026-10-01T{hour:02d}:{minute:02d}:00Z", 2000 + hour * 60 + minute) for hour in range(3) for minute in range(0, 60, 10)]
+        client.post("/telemetry/odometer", json=self._readings(*points), headers=owner)
+        telemetry.flush(TestSessionLocal)
+
+        viewer = auth_header("viewer@vastarion.com")
+        client.post(f"/vehicles/{self.VIN}/share", json={"email": "viewer@vastarion.com", "permission": "viewer"}, headers=owner)
+        assert client.post("/telemetry/odometer", json=self._readings(("2026-10-02T00:00:00Z", 9999)), headers=viewer).json() == {
+            "accepted": 0, "rejected": [self.VIN]
+        }
+        resp = client.get(f"/telemetry/{self.VIN}/odometer",
+                          params={"start": "2026-10-01T00:00:00Z", "end": "2026-10-01T02:00:00Z", "bucket": 3600}, headers=viewer)
+        assert resp.status_code == 200
+        assert [(b["min_odometer"], b["max_odometer"], b["readings"]) for b in resp.json()] == [(2000, 2050, 6), (2060, 2110, 6)]
+        assert resp.json()[1]["bucket_start"].startswith("2026-10-01T01:00:00")
+        # Saatsiz zaman damgası UTC kabul edilir; tek başına ya da saatli bir değerle birlikte
+        naive = {"start": "2026-10-01T00:00:00", "end": "2026-10-01T02:00:00Z", "bucket": 3600}
+        assert client.get(f"/telemetry/{self.VIN}/odometer", params=naive, headers=viewer).json() == resp.json()
+        assert client.get(f"/telemetry/{self.VIN}/odometer", params={"start": "2026-10-01T00:00:00"},
+                          headers=viewer).status_code == 200
+        stranger = auth_header("stranger@vastarion.com")
+        assert client.get(f"/telemetry/{self.VIN}/odometer", headers=stranger).status_code == 404
+
+    def test_full_buffer_pushes_back(self, monkeypatch):
+        owner = auth_header()
+        client.post("/vehicles/", json=TestVehicles.VEHICLE, headers=owner)
+        monkeypatch.setattr(telemetry.buffer, "max_readings", 1)
+        resp = client.post("/telemetry/odometer", json=self._readings(("2026-10-01T10:00:00Z", 1), ("2026-10-01T10:00:01Z", 2)), headers=owner)
+        assert resp.status_code == 503
+        assert resp.headers["Retry-After"] == "1"
+
+
+class TestMaintenance:
+    VIN = TestVehicles.VEHICLE["vin"]
+
+    def _seed(self, vin, mileage, *records):
+        """records: (servis, kaç gün önce, kilometre)."""
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        with TestSessionLocal() as db:
+            db.query(models.Vehicle).filter_by(vin=vin).update({"mileage": mileage})
+            db.add_all([
+                models.ServiceRecord(vehicle_vin=vin, description=name, service_name=name, mileage=km,
+                                     date=now - timedelta(days=days))
+                for name, days, km in records
+            ])
+            db.commit()
+
+    def test_intervals_and_due_dates(self):
+        owner = auth_header()
+        client.post("/vehicles/", json=TestVehicles.VEHICLE, headers=owner)
+        self._seed(self.VIN, 15500,
+                   ("Yağ Değişimi", 400, 1000), ("Yağ Değişimi", 220, 6000), ("Yağ Değişimi", 40, 11000),
+                   ("Fren Balatası", 300, 4000))  # tek kayıt: tahmin yok
+        resp = client.get(f"/vehicles/{self.VIN}/upcoming-maintenance", headers=owner)
+        assert resp.status_code == 200
+        [oil] = resp.json()
+        assert (oil["service"], oil["service_count"], oil["km_interval"], oil["days_interval"]) == ("Yağ Değişimi", 3, 5000.0, 180.0)
+        assert (oil["next_mileage"], oil["km_remaining"], oil["status"]) == (16000, 500, "due_soon")
+        # 500 km, 5000 km / 180 gün hızıyla ~18 gün: takvim tarihinden (140 gün) önce
+        due = datetime.fromisoformat(oil["due_date"].replace("Z", "+00:00"))
+        assert timedelta(days=17) < due - datetime.now(timezone.utc) < timedelta(days=19)
+
+        viewer = auth_header("viewer@vastarion.com")
+        client.post(f"/vehicles/{self.VIN}/share", json={"email": "viewer@vastarion.com", "permission": "viewer"}, headers=owner)
+        assert client.get(f"/vehicles/{self.VIN}/upcoming-maintenance", headers=viewer).status_code == 200
+        assert client.get(f"/vehicles/{self.VIN}/upcoming-maintenance", headers=auth_header("stranger@vastarion.com")).status_code == 404
+
+    def test_estimates_are_cached_and_dropped_on_record_changes(self):
+        owner = auth_header()
+        client.post("/vehicles/", json=TestVehicles.VEHICLE, headers=owner)
+        self._seed(self.VIN, 12000, ("Yağ Değişimi", 200, 1000), ("Yağ Değişimi", 100, 6000))
+        url = f"/vehicles/{self.VIN}/upcoming-maintenance"
+        assert client.get(url, headers=owner).json()[0]["next_mileage"] == 11000
+        assert self.VIN in maintenance.estimate_cache.get_many([self.VIN])[0]
+
+        client.post(f"/vehicles/{self.VIN}/service-records",
+                    json={"description": "Yağ Değişimi", "service_name": "Yağ Değişimi", "mileage": 11500}, headers=owner)
+        assert maintenance.estimate_cache.get_many([self.VIN])[1] == [self.VIN]
+        [oil] = client.get(url, headers=owner).json()
+        assert (oil["service_count"], oil["next_mileage"]) == (3, 16750)
+
+        record_id = client.get(f"/vehicles/{self.VIN}/service-records", headers=owner).json()[0]["id"]
+        client.delete(f"/vehicles/{self.VIN}/service-records/{record_id}", headers=owner)
+        assert client.get(url, headers=owner).json()[0]["service_count"] == 2
+
+    def test_garage_due_soon_lists_only_urgent_items(self):
+        owner = auth_header()
+        vins = [self.VIN, "JTDKB20U793456789"]
+        for vin in vins:
+            client.post("/vehicles/", json={**TestVehicles.VEHICLE, "vin": vin}, headers=owner)
+        self._seed(vins[0], 6100, ("Yağ Değişimi", 90, 1000), ("Yağ Değişimi", 10, 6000))
+        self._seed(vins[1], 12000, ("Yağ Değişimi", 400, 1000), ("Yağ Değişimi", 200, 6000),
+                   ("Triger Kayışı", 700, 1000), ("Triger Kayışı", 10, 90000))
+        resp = client.get("/vehicles/maintenance/due-soon", headers=owner)
+        assert resp.status_code == 200
+        assert [(item["vin"], item["service"], item["status"]) for item in resp.json()] == [
+            (vins[1], "Yağ Değişimi", "overdue"),
+        ]
+        assert client.get("/vehicles/maintenance/due-soon", headers=auth_header("stranger@vastarion.com")).json() == []
+
+    def test_out_of_range_due_date_is_skipped(self):
+        owner = auth_header()
+        client.post("/vehicles/", json=TestVehicles.VEHICLE, headers=owner)
+        # 1 km / 30 gün aralığı ve 30.000 km gecikme: km hızıyla tarih ~900.000 gün önce
+        self._seed(self.VIN, 80000, ("Klima Bakımı", 60, 50000), ("Klima Bakımı", 30, 50001))
+        resp = client.get(f"/vehicles/{self.VIN}/upcoming-maintenance", headers=owner)
+        assert resp.status_code == 200
+        [item] = resp.json()
+        assert (item["km_remaining"], item["status"]) == (-29998, "overdue")
+        due = datetime.fromisoformat(item["due_date"].replace("Z", "+00:00"))
+        assert abs(due - datetime.now(timezone.utc)) < timedelta(days=1)  # son servis + 30 gün
+        assert [i["service"] for i in client.get("/vehicles/maintenance/due-soon", headers=owner).json()] == ["Klima Bakımı"]
+
+
+class TestResponseCache:
+    def _count_queries(self, fn):
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            result = fn()
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+        return result, len(statements)
+
+    def test_etag_and_not_modified(self):
+        headers = auth_header()
+        client.post("/vehicles/", json=TestVehicles.VEHICLE, headers=headers)
+        first = client.get("/vehicles/my-vehicles", headers=headers)
+        etag = first.headers["etag"]
+        assert etag.startswith('"') and first.headers["cache-control"] == "private, no-cache"
+
+        # Cache'teki yanıt: ne sorgu ne serileştirme
+        resp, queries = self._count_queries(
+            lambda: client.get("/vehicles/my-vehicles", headers={**headers, "If-None-Match": etag})
+        )
+        assert resp.status_code == 304 and resp.content == b"" and queries == 0
+        resp = client.get("/vehicles/my-vehicles", headers=headers)
+        assert resp.json() == first.json() and resp.headers["etag"] == etag
+
+        me = client.get("/users/me", headers=headers)
+        assert client.get("/users/me", headers={**headers, "If-None-Match": me.headers["etag"]}).status_code == 304
+
+    def test_writes_bump_generation(self):
+        owner = auth_header()
+        viewer = auth_header("viewer@vastarion.com")
+        vin = TestVehicles.VEHICLE["vin"]
+        client.post("/vehicles/", json=TestVehicles.VEHICLE, headers=owner)
+        etag = client.get("/vehicles/my-vehicles", headers=owner).headers["etag"]
+        shared_etag = client.get("/vehicles/shared-with-me", headers=viewer).headers["etag"]
+
+        client.post(f"/vehicles/{vin}/share", json={"email": "viewer@vastarion.com", "permission": "viewer"}, headers=owner)
+        resp = client.get("/vehicles/shared-with-me", headers={**viewer, "If-None-Match": shared_etag})
+        assert resp.status_code == 200 and [v["vin"] for v in resp.json()] == [vin]
+        shared_etag = resp.headers["etag"]
+
+        # Güncelleme hem sahibin hem paylaşılan kullanıcının cache'ini düşürür
+        client.put(f"/vehicles/{vin}", json={"mileage": 99999}, headers=owner)
+        resp = client.get("/vehicles/my-vehicles", headers={**owner, "If-None-Match": etag})
+        assert resp.status_code == 200 and resp.json()[0]["mileage"] == 99999
+        resp = client.get("/vehicles/shared-with-me", headers={**viewer, "If-None-Match": shared_etag})
+        assert resp.status_code == 200 and resp.json()[0]["mileage"] == 99999
+
+        client.delete(f"/vehicles/{vin}/access/{client.get('/users/me', headers=viewer).json()['id']}", headers=owner)
+        assert client.get("/vehicles/shared-with-me", headers=viewer).json() == []
+        client.delete(f"/vehicles/{vin}", headers=owner)
+        assert client.get("/vehicles/my-vehicles", headers=owner).json() == []
+
+    def test_bumps_do_not_evict_responses_and_generations_are_bounded(self):
+        from app.cache import CachedResponse, MemoryBackend, ResponseCache
+        cache = ResponseCache(MemoryBackend(maxsize=2, max_users=3))
+        entry = CachedResponse(body=b"[]", etag='"x"')
+        cache.backend.set("resp:a", entry)
+        cache.backend.set("resp:b", entry)
+        users = [uuid4() for _ in range(10)]
+        cache.bump(*users)
+        assert cache.backend.get("resp:a") == entry and cache.backend.get("resp:b") == entry
+        assert len(cache.backend._generations) == 3
+
+        # LRU'dan düşen kullanıcının nesli eski bir değere dönmez
+        first = cache.generation(users[0])
+        cache.bump(users[0])
+        bumped = cache.generation(users[0])
+        cache.bump(*users[1:4])
+        assert cache.generation(users[0]) not in (first, bumped)
+        assert cache._bumped_recently(users[1]) and not cache._bumped_recently(users[0])
+
+    def test_cursor_header_is_cached(self):
+        headers = auth_header()
+        for i in range(3):
+            client.post("/vehicles/", json=dict(TestVehicles.VEHICLE, vin=f"CACHE00000000{i:04d}"), headers=headers)
+        first = client.get("/vehicles/my-vehicles", params={"limit": 2}, headers=headers)
+        again = client.get("/vehicles/my-vehicles", params={"limit": 2}, headers=headers)
+        assert again.headers["x-next-cursor"] == first.headers["x-next-cursor"]
+        other_page = client.get("/vehicles/my-vehicles", params={"limit": 1}, headers=headers)
+        assert len(other_page.json()) == 1
+
+
+class TestFastSerialization:
+    def test_rows_match_response_models(self):
+        from typing import List
+        from pydantic import TypeAdapter
+        from app import schemas
+        from app.serialization import dumps
+        owner = auth_header()
+        viewer = auth_header("viewer@vastarion.com")
+        vin = TestVehicles.VEHICLE["vin"]
+        client.post("/vehicles/", json=TestVehicles.VEHICLE, headers=owner)
+        client.post(f"/vehicles/{vin}/share", json={"email": "viewer@vastarion.com", "permission": "editor"}, headers=owner)
+
+        db = TestSessionLocal()
+        try:
+            owner_id = crud.get_user_by_email(db, "test@vastarion.com").id
+            vehicles = TypeAdapter(List[schemas.VehicleOut])
+            expected = vehicles.dump_json(vehicles.validate_python(crud.get_user_vehicles(db, owner_id), from_attributes=True))
+            assert dumps(crud.get_user_vehicle_rows(db, owner_id)) == expected
+        finally:
+            db.close()
+
+        assert client.get("/vehicles/my-vehicles", headers=owner).content == expected
+        shared = client.get("/vehicles/shared-with-me", headers=viewer).json()
+        assert shared[0]["permission"] == "editor" and shared[0]["owner_email"] == "test@vastarion.com"
+        accesses = client.get(f"/vehicles/{vin}/access", headers=owner).json()
+        assert [schemas.VehicleAccessOutWithEmail(**a).email for a in accesses] == ["viewer@vastarion.com"]
+
+
+class TestExport:
+    def _seed(self, headers):
+        for i, year in enumerate([2018, 2022]):
+            vehicle = dict(TestVehicles.VEHICLE, vin=f"EXPORT00000000{i:03d}", year=year)
+            client.post("/vehicles/", json=vehicle, headers=headers)
+        for mileage in (1000, 2000):
+            client.post("/vehicles/EXPORT00000000001/service-records",
+                        json={"description": "Bakım", "mileage": mileage, "cost": 500}, headers=headers)
+
+    def test_ndjson_export(self):
+        headers = auth_header()
+        self._seed(headers)
+        resp = client.get("/vehicles/export", headers=headers)
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("application/x-ndjson")
+        vehicles = [json.loads(line) for line in resp.text.splitlines()]
+        assert [v["vin"] for v in vehicles] == ["EXPORT00000000001", "EXPORT00000000000"]
+        assert len(vehicles[0]["service_records"]) == 2
+        assert vehicles[1]["service_records"] == []
+        # Liste endpoint'leriyle aynı kodlayıcı
+        assert [line.encode() for line in resp.text.splitlines()] == [serialization.dumps(v) for v in vehicles]
+
+    def test_csv_export(self):
+        headers = auth_header()
+        self._seed(headers)
+        resp = client.get("/vehicles/export", params={"format": "csv"}, headers=headers)
+        rows = list(csv.DictReader(io.StringIO(resp.text)))
+        assert len(rows) == 3
+        assert {r["record_mileage"] for r in rows if r["vin"] == "EXPORT00000000001"} == {"1000", "2000"}
+        assert client.get("/vehicles/export", params={"format": "xml"}, headers=headers).status_code == 422
+
+    def test_export_is_single_query(self):
+        headers = auth_header()
+        self._seed(headers)
+        client.get("/users/me", headers=headers)
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            client.get("/vehicles/export", headers=headers)
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+        assert len(statements) == 1
+
+
+class TestStats:
+    VIN = "STATS000000000001"
+
+    def _seed(self, headers):
+        client.post("/vehicles/", json=dict(TestVehicles.VEHICLE, vin=self.VIN, mileage=9000), headers=headers)
+        client.post("/vehicles/", json=dict(TestVehicles.VEHICLE, vin="STATS000000000002"), headers=headers)
+        for mileage, cost in ((1000, 400), (4000, None), (7000, 800)):
+            client.post(f"/vehicles/{self.VIN}/service-records",
+                        json={"description": "Bakım", "mileage": mileage, "cost": cost}, headers=headers)
+
+    def _check(self, headers):
+        stats = client.get(f"/vehicles/{self.VIN}/stats", headers=headers).json()
+        assert stats["service_count"] == 3 and stats["total_cost"] == 1200
+        assert stats["avg_cost"] == 600
+        assert stats["cost_per_km"] == round(1200 / 8000, 4)
+        assert stats["avg_km_between_services"] == 3000
+
+        garage = client.get("/vehicles/stats", headers=headers).json()
+        assert garage["vehicle_count"] == 2 and garage["service_count"] == 3
+        empty = next(v for v in garage["vehicles"] if v["vin"] != self.VIN)
+        assert empty["service_count"] == 0 and empty["avg_cost"] is None
+
+    def test_live_aggregates(self):
+        headers = auth_header()
+        self._seed(headers)
+        self._check(headers)
+        stranger = auth_header("stranger@vastarion.com")
+        assert client.get(f"/vehicles/{self.VIN}/stats", headers=stranger).status_code == 404
+        assert client.get("/vehicles/stats", headers=stranger).json()["vehicle_count"] == 0
+
+    def test_summary_table_stays_in_sync(self, monkeypatch):
+        from app import stats
+        monkeypatch.setattr(stats, "STATS_SUMMARY", True)
+        headers = auth_header()
+        self._seed(headers)
+        # İlk kayıtta özet satırı yok: VIN'in hesabı outbox worker'ına bırakılır
+        assert outbox.drain(TestSessionLocal) >= 1
+        self._check(headers)
+
+        # Silme sonrası özet worker tarafından yeniden hesaplanır
+        records = client.get(f"/vehicles/{self.VIN}/service-records", headers=headers).json()
+        last = next(r for r in records if r["mileage"] == 7000)
+        client.delete(f"/vehicles/{self.VIN}/service-records/{last['id']}", headers=headers)
+        assert outbox.drain(TestSessionLocal) == 1
+        summary = client.get(f"/vehicles/{self.VIN}/stats", headers=headers).json()
+        assert summary["service_count"] == 2 and summary["total_cost"] == 400
+
+        monkeypatch.setattr(stats, "STATS_SUMMARY", False)
+        assert client.get(f"/vehicles/{self.VIN}/stats", headers=headers).json() == summary
+
+
+class TestOutbox:
+    TOPIC = "test.topic"
+
+    @staticmethod
+    def _messages():
+        with TestSessionLocal() as db:
+            return db.query(models.OutboxMessage).order_by(models.OutboxMessage.id).all()
+
+    @staticmethod
+    def _enqueue(*payloads, key=None):
+        with TestSessionLocal() as db:
+            for payload in payloads:
+                outbox.enqueue(db, TestOutbox.TOPIC, payload, key=key)
+            db.commit()
+
+    def test_message_is_part_of_the_transaction(self):
+        with TestSessionLocal() as db:
+            outbox.enqueue(db, self.TOPIC, {"n": 1})
+            db.rollback()
+        assert self._messages() == []
+
+        self._enqueue({"n": 1})
+        self._enqueue({"n": 2}, key="same")
+        self._enqueue({"n": 3}, key="same")
+        messages = self._messages()
+        assert [m.payload for m in messages] == [{"n": 1}, {"n": 2}]
+        assert {m.status for m in messages} == {"pending"}
+
+    def test_drain_hands_a_topic_batch_to_one_handler_call(self, monkeypatch):
+        calls = []
+        monkeypatch.setitem(outbox.HANDLERS, self.TOPIC, lambda db, messages: calls.append(messages))
+        self._enqueue({"n": 1}, {"n": 2}, {"n": 3})
+
+        assert outbox.drain(TestSessionLocal) == 3
+        assert len(calls) == 1 and [m.payload["n"] for m in calls[0]] == [1, 2, 3]
+        assert {m.status for m in self._messages()} == {"done"}
+        assert outbox.drain(TestSessionLocal) == 0
+
+    def test_failed_message_is_retried_then_parked(self, monkeypatch):
+        handled = []
+
+        def handle(db, messages):
+            if any(m.payload.get("bad") for m in messages):
+                raise ValueError("kötü mesaj")
+            handled.extend(m.payload["n"] for m in messages)
+
+        monkeypatch.setitem(outbox.HANDLERS, self.TOPIC, handle)
+        monkeypatch.setattr(outbox, "OUTBOX_MAX_ATTEMPTS", 2)
+        self._enqueue({"n": 1}, {"n": 2, "bad": True}, {"n": 3})
+
+        # Batch hatası diğer mesajları bekletmez; hatalı mesaj ertelenir
+        assert outbox.drain(TestSessionLocal) == 3
+        assert handled == [1, 3]
+        bad = next(m for m in self._messages() if m.payload.get("bad"))
+        assert bad.status == "pending" and bad.attempts == 1 and "kötü mesaj" in bad.last_error
+        assert outbox.drain(TestSessionLocal) == 0
+
+        with TestSessionLocal() as db:
+            db.query(models.OutboxMessage).filter_by(id=bad.id).update({"available_at": outbox.utcnow() - timedelta(seconds=1)})
+            db.commit()
+        assert outbox.drain(TestSessionLocal) == 1
+        assert next(m for m in self._messages() if m.id == bad.id).status == "failed"
+
+    def test_lost_lease_rolls_back_handler_writes(self, monkeypatch):
+        def handle(db, messages):
+            db.add(models.User(email="side-effect@vastarion.com", hashed_password="x"))
+            db.flush()
+            # Kira dolmuş, mesajı başka bir worker claim etmiş gibi
+            with TestSessionLocal() as other:
+                other.query(models.OutboxMessage).update({"attempts": models.OutboxMessage.attempts + 1})
+                other.commit()
+
+        monkeypatch.setitem(outbox.HANDLERS, self.TOPIC, handle)
+        self._enqueue({"n": 1})
+        outbox.drain(TestSessionLocal)
+        assert self._messages()[0].status == "pending"
+        with TestSessionLocal() as db:
+            assert crud.get_user_by_email(db, "side-effect@vastarion.com") is None
+
+    def test_worker_wakes_up_on_commit(self, monkeypatch):
+        calls = []
+        monkeypatch.setitem(outbox.HANDLERS, self.TOPIC, lambda db, messages: calls.extend(messages))
+        monkeypatch.setattr(outbox, "OUTBOX_POLL_INTERVAL", 60)
+        worker = outbox.Worker(TestSessionLocal)
+        monkeypatch.setattr(outbox, "worker", worker)
+
+        async def scenario():
+            worker.start()
+            await asyncio.sleep(0.05)  # ilk tur boş kuyrukla biter, worker beklemeye geçer
+            self._enqueue({"n": 1})
+            for _ in range(200):
+                if calls:
+                    break
+                await asyncio.sleep(0.01)
+            await worker.stop()
+
+        asyncio.run(scenario())
+        assert [m.payload for m in calls] == [{"n": 1}]
+
+
+class TestSearch:
+    VEHICLES = [
+        {"vin": "JTDBR32E720054321", "brand": "Toyota", "model": "Corolla", "year": 2019, "color": "Silver"},
+        {"vin": "WBAPH5C55BA123456", "brand": "BMW", "model": "M5 CS", "year": 2024, "color": "Obsidian Black"},
+        {"vin": "JHMCM56557C404453", "brand": "Honda", "model": "Accord", "year": 2007, "color": "Black"},
+    ]
+
+    def _seed(self, headers):
+        for vehicle in self.VEHICLES:
+            client.post("/vehicles/", json=vehicle, headers=headers)
+
+    def _search(self, headers, q, **params):
+        res = client.get("/vehicles/search", params={"q": q, **params}, headers=headers)
+        assert res.status_code == 200
+        return res
+
+    def test_trigram_similarity_matches_pg_trgm(self):
+        # pg_trgm: similarity('cor', 'Corolla') = 3 / 9
+        assert search.similarity(search.trigrams("cor"), search.trigrams("Corolla")) == pytest.approx(1 / 3)
+        assert search.trigrams("a-b") == search.trigrams("A b")
+
+    def test_fuzzy_prefix_and_description_ranking(self):
+        headers = auth_header()
+        self._seed(headers)
+        client.post("/vehicles/JHMCM56557C404453/service-records",
+                    json={"description": "Triger kayışı değişimi", "mileage": 90000}, headers=headers)
+
+        # Yazım hatası trigram benzerliğiyle bulunur
+        assert [v["vin"] for v in self._search(headers, "Toyta").json()] == ["JTDBR32E720054321"]
+        # VIN öneki en üstte (puan 1.0), renk eşleşmesi arkasından
+        hits = self._search(headers, "wbaph").json()
+        assert hits[0]["vin"] == "WBAPH5C55BA123456" and hits[0]["rank"] == 1.0
+        hits = self._search(headers, "black").json()
+        assert {v["vin"] for v in hits} == {"WBAPH5C55BA123456", "JHMCM56557C404453"}
+        assert hits[0]["vin"] == "JHMCM56557C404453" and hits[0]["rank"] > hits[1]["rank"]
+        # Servis açıklamasında tüm kelimeler
+        hits = self._search(headers, "kayışı triger").json()
+        assert [(v["vin"], v["rank"]) for v in hits] == [("JHMCM56557C404453", search.DESCRIPTION_RANK)]
+        assert self._search(headers, "kayışı fren").json() == []
+
+    def test_only_accessible_vehicles(self):
+        owner = auth_header()
+        self._seed(owner)
+        stranger = auth_header("stranger@vastarion.com")
+        assert self._search(stranger, "Toyota").json() == []
+        client.post("/vehicles/JTDBR32E720054321/share",
+                    json={"email": "stranger@vastarion.com", "permission": "viewer"}, headers=owner)
+        assert [v["vin"] for v in self._search(stranger, "Toyota").json()] == ["JTDBR32E720054321"]
+        client.delete("/vehicles/JTDBR32E720054321", headers=owner)
+        assert self._search(stranger, "Toyota").json() == []
+
+    def test_cursor_pagination(self):
+        headers = auth_header()
+        for i in range(5):
+            client.post("/vehicles/", json=dict(self.VEHICLES[0], vin=f"JTDBR32E72000000{i}"), headers=headers)
+        seen, cursor = [], None
+        while True:
+            res = self._search(headers, "corolla", limit=2, **({"cursor": cursor} if cursor else {}))
+            seen += [v["vin"] for v in res.json()]
+            cursor = res.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+        assert seen == sorted(seen) and len(seen) == 5
+
+    def test_new_service_record_is_searchable(self):
+        headers = auth_header()
+        self._seed(headers)
+        assert self._search(headers, "balata").json() == []
+        client.post("/vehicles/JTDBR32E720054321/service-records",
+                    json={"description": "Ön balata", "mileage": 30000}, headers=headers)
+        assert [v["vin"] for v in self._search(headers, "balata").json()] == ["JTDBR32E720054321"]
+
+
+class TestChangeFeed:
+    VIN = TestVehicles.VEHICLE["vin"]
+
+    @staticmethod
+    def _drain(subscription) -> list:
+        received = []
+        while not subscription.queue.empty():
+            received.append(subscription.queue.get_nowait())
+        return received
+
+    def test_writes_reach_everyone_with_access(self):
+        owner = auth_header()
+        client.post("/vehicles/", json=TestVehicles.VEHICLE, headers=owner)
+        viewer = auth_header("viewer@vastarion.com")
+        viewer_id = UUID(client.get("/users/me", headers=viewer).json()["id"])
+        share = {"email": "viewer@vastarion.com", "permission": "editor"}
+        record = {"description": "Yağ değişimi", "mileage": 20000}
+
+        async def scenario():
+            subscription = events.broker.subscribe(viewer_id)
+            await asyncio.to_thread(client.post, f"/vehicles/{self.VIN}/share", json=share, headers=owner)
+            await asyncio.to_thread(client.post, f"/vehicles/{self.VIN}/service-records", json=record, headers=viewer)
+            await asyncio.to_thread(client.put, f"/vehicles/{self.VIN}", json={"mileage": 21000}, headers=owner)
+            await asyncio.to_thread(client.delete, f"/vehicles/{self.VIN}/access/{viewer_id}", headers=owner)
+            # Yetki gittikten sonraki yazmalar gelmez
+            await asyncio.to_thread(client.post, f"/vehicles/{self.VIN}/service-records", json=record, headers=owner)
+            await asyncio.sleep(0)
+            return self._drain(subscription)
+
+        received = asyncio.run(scenario())
+        assert [e["type"] for e in received] == [
+            "access.granted", "service_record.added", "vehicle.updated", "access.revoked"
+        ]
+        assert received[1]["vin"] == self.VIN and received[1]["data"]["mileage"] == 20000
+        assert received[2]["data"]["changes"] == {"mileage": 21000}
+
+    def test_rolled_back_events_are_dropped(self):
+        user_id = uuid4()
+
+        async def scenario():
+            subscription = events.broker.subscribe(user_id)
+            db = TestSessionLocal()
+            try:
+                db.execute(text("SELECT 1"))  # açık bir transaction içinde
+                events.publish(db, self.VIN, "vehicle.updated", recipients=[user_id])
+                db.rollback()
+                events.publish(db, self.VIN, "vehicle.deleted", recipients=[user_id])
+                db.commit()
+            finally:
+                db.close()
+            await asyncio.sleep(0)
+            return self._drain(subscription)
+
+        assert [e["type"] for e in asyncio.run(scenario())] == ["vehicle.deleted"]
+
+    def test_slow_subscriber_gets_resync(self):
+        user_id = uuid4()
+
+        async def scenario():
+            chunks = []
+            feed = events.stream(user_id, heartbeat=0.01)
+            chunks.append(await feed.__anext__())
+            for i in range(events.EVENTS_QUEUE_SIZE + 1):
+                events.broker.publish([user_id], {"id": str(i), "type": "vehicle.updated"})
+            await asyncio.sleep(0)
+            async for chunk in feed:
+                chunks.append(chunk)
+            return chunks
+
+        chunks = asyncio.run(scenario())
+        assert chunks[0].startswith("retry:")
+        assert chunks[-1].startswith("event: resync")
+        assert not events.broker.has_subscribers()
+
+    def test_postgres_notify_payload_is_small_for_large_audiences(self, monkeypatch):
+        monkeypatch.setattr(events, "EVENTS_BACKEND", "postgres")
+        notified = []
+        monkeypatch.setattr(events, "_notify", lambda db, payload: notified.append(payload))
+        recipients = [uuid4() for _ in range(300)]
+
+        async def scenario():
+            subscription = events.broker.subscribe(recipients[-1])
+            db = TestSessionLocal()
+            try:
+                events.publish(db, self.VIN, "service_records.imported", {"ids": list(range(2000))}, recipients=recipients)
+                db.commit()
+            finally:
+                db.close()
+            # Dinleyici: NOTIFY'dan gelen kimlikle satır okunur
+            events.deliver_stored(engine, [json.loads(payload)["id"] for payload in notified])
+            await asyncio.sleep(0)
+            return self._drain(subscription)
+
+        received = asyncio.run(scenario())
+        assert len(notified) == 1 and len(notified[0].encode("utf-8")) < 200
+        assert set(json.loads(notified[0])) == {"id", "type", "vin"}
+        assert [e["type"] for e in received] == ["service_records.imported"]
+        assert len(received[0]["data"]["ids"]) == 2000
+        assert events.prune(engine, retention=-60) == 1
+
+    def test_requires_auth(self):
+        assert client.get("/vehicles/events").status_code == 401
+
+
+class TestBulkImport:
+    CSV = (
+        "vin,brand,model,year,mileage,color\n"
+        "BULK0000000000001,BMW,M3,2020,1000,Mavi\n"
+        "BULK0000000000002,Audi,RS6,2021,,\n"
+        "BULK0000000000003,Audi,RS6,1700,0,\n"
+        "BULK0000000000001,BMW,M3,2020,1000,Mavi\n"
+    )
+
+    def test_csv_import_with_row_errors(self):
+        headers = auth_header()
+        resp = client.post("/vehicles/bulk", content=self.CSV, headers={**headers, "Content-Type": "text/csv"})
+        assert resp.status_code == 200
+        report = resp.json()
+        assert report["total"] == 4 and report["inserted"] == 2 and report["failed"] == 2
+        assert [e["row"] for e in report["errors"]] == [3, 4]
+
+        vehicles = client.get("/vehicles/my-vehicles", headers=headers).json()
+        assert {v["vin"] for v in vehicles} == {"BULK0000000000001", "BULK0000000000002"}
+        assert next(v for v in vehicles if v["brand"] == "Audi")["mileage"] == 0
+
+    def test_invalid_utf8_and_multiline_fields(self):
+        headers = auth_header()
+        body = (
+            "vin,brand,model,year,mileage,color\n"
+            'BULK0000000000001,BMW,M3,2020,1000,"Mavi\n""metalik"""\n'
+        ).encode() + b"BULK0000000000002,\xff\xfe,M3,2020,1000,\n" + b"BULK0000000000003,Audi,RS6,2021,0,\n"
+        resp = client.post("/vehicles/bulk", content=body, headers={**headers, "Content-Type": "text/csv"})
+        assert resp.status_code == 200
+        report = resp.json()
+        assert (report["total"], report["inserted"]) == (3, 2)
+        assert report["errors"][0]["row"] == 2 and report["errors"][0]["errors"][0].startswith("Geçersiz UTF-8")
+        colors = {v["vin"]: v["color"] for v in client.get("/vehicles/my-vehicles", headers=headers).json()}
+        assert colors["BULK0000000000001"] == 'Mavi\n"metalik"'
+
+        resp = client.post("/vehicles/bulk?format=ndjson", content=b'{"vin": "\xff"}\n', headers=headers)
+        assert resp.json()["errors"][0]["errors"][0].startswith("Geçersiz UTF-8")
+        unclosed = 'vin,brand,model,year\nBULK0000000000004,"BMW,M3,2020\n'
+        resp = client.post("/vehicles/bulk", content=unclosed, headers={**headers, "Content-Type": "text/csv"})
+        assert resp.json()["errors"] == [{"row": 1, "vin": None, "errors": ["Kapanmamış tırnak"]}]
+
+    def test_csv_cell_count_mismatch_is_a_row_error(self):
+        headers = auth_header()
+        body = "vin,brand,model,year\nBULK0000000000001,a,b,2020,extra\nBULK0000000000002,a,b\nBULK0000000000003,a,b,2020\n"
+        resp = client.post("/vehicles/bulk", content=body, headers={**headers, "Content-Type": "text/csv"})
+        report = resp.json()
+        assert (report["total"], report["inserted"]) == (3, 1)
+        assert [(e["row"], e["errors"]) for e in report["errors"]] == [
+            (1, ["4 hücre bekleniyordu, 5 bulundu"]), (2, ["4 hücre bekleniyordu, 3 bulundu"])
+        ]
+
+    def test_non_string_vin_is_reported_without_vin(self):
+        headers = auth_header()
+        resp = client.post("/vehicles/bulk?format=ndjson", headers=headers,
+                           content='{"vin": 12345, "brand": "BMW", "model": "M3", "year": 2020}\n')
+        assert resp.status_code == 200
+        assert resp.json()["failed"] == 1 and resp.json()["errors"][0]["vin"] is None
+
+    def test_ndjson_import_skips_existing_vins(self, monkeypatch):
+        from app import bulk
+        monkeypatch.setattr(bulk, "BULK_CHUNK_SIZE", 2)
+        headers = auth_header()
+        client.post("/vehicles/", json=TestVehicles.VEHICLE, headers=headers)
+
+        lines = [
+            {"vin": TestVehicles.VEHICLE["vin"], "brand": "BMW", "model": "M5", "year": 2024},
+            "{bozuk json",
+            *({"vin": f"NDJSON00000000{i:03d}", "brand": "Fiat", "model": "Egea", "year": 2019} for i in range(5)),
+        ]
+        body = "\n".join(line if isinstance(line, str) else json.dumps(line) for line in lines)
+        resp = client.post("/vehicles/bulk?format=ndjson", content=body, headers=headers)
+        report = resp.json()
+        assert report["inserted"] == 5 and report["failed"] == 2
+        errors = {e["row"]: e["errors"] for e in report["errors"]}
+        assert errors[1] == ["Bu VIN zaten kayıtlı"]
+        assert errors[2][0].startswith("Geçersiz JSON")
+        assert len(client.get("/vehicles/my-vehicles", params={"limit": 50}, headers=headers).json()) == 6
+
+    def test_unsupported_content_type(self):
+        headers = auth_header()
+        resp = client.post("/vehicles/bulk", content="{}", headers={**headers, "Content-Type": "application/json"})
+        assert resp.status_code == 415
+
+
 # ==================== USERS TESTS ====================
 
 class TestUsers:
@@ -165,6 +1470,418 @@ class TestUsers:
         assert resp.status_code == 401
 
 
+# ==================== QUERY PLAN TESTS ====================
+
+class TestQueryPlans:
+    """Sık çalışan crud sorgularının EXPLAIN QUERY PLAN'da index kullandığını doğrular."""
+    VIN = "PLAN0000000000001"
+
+    @pytest.fixture
+    def seeded(self):
+        db = TestSessionLocal()
+        try:
+            owner = models.User(email="owner@vastarion.com", hashed_password="x")
+            viewer = models.User(email="viewer@vastarion.com", hashed_password="x")
+            db.add_all([owner, viewer])
+            db.flush()
+            for i in range(50):
+                vin = f"PLAN{i + 1:013d}"
+                db.add(models.Vehicle(vin=vin, brand="BMW", model="M3", year=2000 + i % 20, owner_id=owner.id, is_deleted=i % 10 == 0))
+                db.add(models.ServiceRecord(vehicle_vin=vin, description="Bakım", mileage=1000 + i))
+                if i % 2:
+                    db.add(models.VehicleAccess(vehicle_vin=vin, user_id=viewer.id, permission="viewer"))
+            # Araçların yarısı, viewer'ın üyesi olduğu organizasyona verilmiş bir filoda
+            organization = models.Organization(name="Ekip")
+            fleet = models.Fleet(name="Filo", owner_id=owner.id)
+            db.add_all([organization, fleet])
+            db.flush()
+            db.add(models.OrganizationMember(organization_id=organization.id, user_id=viewer.id))
+            db.add(models.FleetGrant(fleet_id=fleet.id, organization_id=organization.id, permission="editor"))
+            db.flush()
+            db.query(models.Vehicle).filter(models.Vehicle.vin < "PLAN0000000000026").update({"fleet_id": fleet.id})
+            db.commit()
+            return owner.id, viewer.id
+        finally:
+            db.close()
+
+    def _plans(self, call):
+        captured = []
+
+        def listener(conn, cursor, statement, parameters, context, executemany):
+            captured.append((statement, parameters))
+
+        db = TestSessionLocal()
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            call(db)
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+            db.close()
+
+        selects = [(sql, params) for sql, params in captured if sql.lstrip().upper().startswith("SELECT")]
+        assert selects, "sorgu yakalanmadı"
+        with engine.connect() as conn:
+            return [
+                [row[3] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + sql, tuple(params)).all()]
+                for sql, params in selects
+            ]
+
+    def _assert_indexed(self, call):
+        for plan in self._plans(call):
+            for step in plan:
+                assert not (step.startswith("SCAN") and "USING" not in step), plan
+                assert "TEMP B-TREE" not in step, plan
+
+    def test_get_user_vehicles(self, seeded):
+        owner_id, _ = seeded
+        self._assert_indexed(lambda db: crud.get_user_vehicles(db, owner_id))
+        self._assert_indexed(lambda db: crud.get_user_vehicles(db, owner_id, sort="year"))
+
+    def test_get_shared_vehicles(self, seeded):
+        _, viewer_id = seeded
+        self._assert_indexed(lambda db: crud.get_shared_vehicles(db, viewer_id))
+
+    def test_get_service_records(self, seeded):
+        self._assert_indexed(lambda db: crud.get_service_records(db, self.VIN))
+
+    def test_vehicle_access_lookups(self, seeded):
+        owner_id, viewer_id = seeded
+        self._assert_indexed(lambda db: crud.get_vehicle_role(db, "PLAN0000000000002", viewer_id))
+        self._assert_indexed(lambda db: crud.get_vehicle_role(db, "PLAN0000000000002", owner_id))
+        self._assert_indexed(lambda db: crud.share_vehicle(db, "PLAN0000000000002", viewer_id, "editor"))
+        self._assert_indexed(lambda db: crud.get_vehicle_accesses(db, "PLAN0000000000002"))
+
+    def test_fleet_access_lookups(self, seeded):
+        owner_id, viewer_id = seeded
+        # Filo yetkisi: araç başına PK aramaları, filo / ekip büyüklüğünden bağımsız
+        assert crud.get_vehicle_role(TestSessionLocal(), "PLAN0000000000004", viewer_id)[1] == "editor"
+        self._assert_indexed(lambda db: crud.get_vehicle_role(db, "PLAN0000000000004", viewer_id))
+        self._assert_indexed(lambda db: crud.get_vehicle_roles(db, ["PLAN0000000000004", "PLAN0000000000040"], viewer_id))
+
+    def test_archive_candidates(self, seeded):
+        self._assert_indexed(lambda db: db.execute(archive.archive_candidates_query(archive._now(), 10)).all())
+
+    def test_odometer_series(self, seeded):
+        start = datetime(2026, 10, 1, tzinfo=timezone.utc)
+        # PK aralık taraması; kova gruplaması az sayıda kova için geçici sıralama kullanabilir
+        for plan in self._plans(lambda db: telemetry.odometer_series(db, self.VIN, start, start + timedelta(days=1), 3600)):
+            assert any("USING PRIMARY KEY" in step for step in plan), plan
+
+    def test_maintenance_estimates(self, seeded):
+        owner_id, _ = seeded
+        # Servis kayıtları VIN indeksinden okunur; window için (vin, servis) sıralaması geçici olabilir
+        plans = self._plans(lambda db: maintenance.get_due_soon(db, owner_id))
+        steps = [step for plan in plans for step in plan if "service_records" in step]
+        assert steps and all(step.startswith("SEARCH service_records USING") for step in steps), plans
+
+    def test_get_user_by_email(self, seeded):
+        self._assert_indexed(lambda db: crud.get_user_by_email(db, "owner@vastarion.com"))
+
+
+# ==================== ASYNC MODE TESTS ====================
+
+class TestReadReplica:
+    VIN = TestVehicles.VEHICLE["vin"]
+
+    @pytest.fixture
+    def replica(self):
+        """Primary test.db, replica ayrı bir SQLite dosyası (replikasyon yok: gecikme sonsuz)."""
+        replica_engine = create_engine("sqlite:///./test_replica.db", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=replica_engine)
+        RoutingTestSession = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False,
+                                          bind=engine, info={"replica": replica_engine})
+
+        def routing_db():
+            db = RoutingTestSession()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = routing_db
+        try:
+            yield replica_engine
+        finally:
+            app.dependency_overrides[get_db] = override_get_db
+            Base.metadata.drop_all(bind=replica_engine)
+            replica_engine.dispose()
+
+    def test_reads_go_to_replica_after_sticky_window(self, replica):
+        headers = auth_header()
+        client.post("/vehicles/", json=TestVehicles.VEHICLE, headers=headers)
+        client.post(f"/vehicles/{self.VIN}/service-records",
+                    json={"description": "Bakım", "mileage": 1000}, headers=headers)
+
+        # Yazan kullanıcı kısa süre primary'den okur (read-your-writes)
+        assert len(client.get("/vehicles/my-vehicles", headers=headers).json()) == 1
+        assert len(client.get(f"/vehicles/{self.VIN}/service-records", headers=headers).json()) == 1
+
+        recent_writers.clear()
+        client.cookies.clear()
+        response_cache.clear()
+        assert client.get("/vehicles/my-vehicles", headers=headers).json() == []
+        # Yetki primary'den okunur, kayıtlar replica'dan
+        resp = client.get(f"/vehicles/{self.VIN}/service-records", headers=headers)
+        assert resp.status_code == 200 and resp.json() == []
+
+    def test_last_write_token_sticks_reads_on_other_workers(self, replica):
+        headers = auth_header()
+        resp = client.post("/vehicles/", json=TestVehicles.VEHICLE, headers=headers)
+        token = resp.headers[database.LAST_WRITE_HEADER]
+        assert client.cookies[database.LAST_WRITE_COOKIE] == token
+        # Başka worker: süreç içi kayıt yok, çerez / header yeterli
+        recent_writers.clear()
+        assert len(client.get("/vehicles/my-vehicles", headers=headers).json()) == 1
+        client.cookies.clear()
+        response_cache.clear()
+        assert len(client.get("/vehicles/my-vehicles", headers={**headers, database.LAST_WRITE_HEADER: token}).json()) == 1
+
+        user_id = client.get("/users/me", headers=headers).json()["id"]
+        assert database.last_write_at(token, user_id) is not None
+        assert database.last_write_at(token, uuid4()) is None
+        assert database.last_write_at(token[:-1] + ("0" if token[-1] != "0" else "1"), user_id) is None
+        assert not database.wrote_recently(database.sign_last_write(user_id, time.time() - 60), user_id)
+
+    def test_replica_reads_are_not_cached_right_after_a_bump(self, replica):
+        headers = auth_header()
+        client.post("/vehicles/", json=TestVehicles.VEHICLE, headers=headers)
+        # Başka worker, yazmadan hemen sonra ve çerezsiz: replica henüz yetişmemiş
+        recent_writers.clear()
+        client.cookies.clear()
+        assert client.get("/vehicles/my-vehicles", headers=headers).json() == []
+        with TestSessionLocal() as db, replica.begin() as conn:
+            conn.execute(models.Vehicle.__table__.insert(), [
+                {c.name: getattr(v, c.name) for c in models.Vehicle.__table__.columns} for v in db.query(models.Vehicle)
+            ])
+        # Replica yetişti: eski (boş) yanıt cache'ten dönmez
+        assert len(client.get("/vehicles/my-vehicles", headers=headers).json()) == 1
+
+    def test_writes_always_use_primary(self, replica):
+        headers = auth_header()
+        client.post("/vehicles/", json=TestVehicles.VEHICLE, headers=headers)
+        with replica.connect() as conn:
+            assert conn.exec_driver_sql("SELECT count(*) FROM vehicles").scalar() == 0
+        db = TestSessionLocal()
+        try:
+            assert db.get(models.Vehicle, self.VIN) is not None
+        finally:
+            db.close()
+
+    def test_sticky_window_expires(self, monkeypatch):
+        monkeypatch.setattr(recent_writers, "window", 0.05)
+        recent_writers.mark("user")
+        assert recent_writers.is_recent("user")
+        import time
+        time.sleep(0.06)
+        assert not recent_writers.is_recent("user")
+
+
+class TestConnectionPool:
+    def test_pool_sizes_split_connection_budget(self, monkeypatch):
+        from app import database
+        monkeypatch.delenv("DB_POOL_SIZE", raising=False)
+        monkeypatch.setattr(database, "DB_MAX_CONNECTIONS", "90")
+        monkeypatch.setattr(database, "WEB_CONCURRENCY", 4)
+        assert database.pool_sizes() == (14, 8)
+        monkeypatch.setenv("DB_POOL_SIZE", "3")
+        assert database.pool_sizes()[0] == 3
+
+    def test_pgbouncer_mode(self, monkeypatch):
+        from sqlalchemy.pool import NullPool
+        from app import database
+        url = "postgresql://u:p@pgbouncer:6432/vehicle_db"
+        assert database.engine_options(url)["poolclass"] is not NullPool
+        monkeypatch.setattr(database, "DB_PGBOUNCER", True)
+        assert database.engine_options(url)["poolclass"] is NullPool
+        assert database.engine_options(url, is_async=True)["connect_args"]["statement_cache_size"] == 0
+
+    def test_pool_metrics(self):
+        from sqlalchemy.exc import TimeoutError as PoolTimeout
+        from app import metrics
+        pool_engine = create_engine(SQLALCHEMY_TEST_URL, poolclass=metrics.TimedQueuePool,
+                                    pool_size=1, max_overflow=0, pool_timeout=0.01)
+        try:
+            with pool_engine.connect():
+                with pytest.raises(PoolTimeout):
+                    pool_engine.connect()
+                text = metrics.render({"primary": pool_engine.pool})
+            assert 'db_pool_checked_out{pool="primary"' in text
+            lines = dict(line.rsplit(" ", 1) for line in text.splitlines() if not line.startswith("#"))
+            key = next(k for k in lines if k.startswith("db_pool_timeouts_total"))
+            assert lines[key] == "1"
+            assert lines[next(k for k in lines if k.startswith("db_pool_wait_seconds_count"))] == "2"
+        finally:
+            pool_engine.dispose()
+        assert client.get("/metrics").status_code == 200
+
+
+class TestMetrics:
+    @staticmethod
+    def _samples() -> dict:
+        text = client.get("/metrics").text
+        return dict(line.rsplit(" ", 1) for line in text.splitlines() if line and not line.startswith("#"))
+
+    @staticmethod
+    def _value(samples: dict, prefix: str, *fragments) -> float:
+        return sum(float(v) for k, v in samples.items() if k.startswith(prefix) and all(f in k for f in fragments))
+
+    def test_route_templates_queries_and_bcrypt(self):
+        from app.metrics import http_metrics, registry
+        http_metrics.clear()
+        registry.clear()
+        headers = auth_header()
+        vin = TestVehicles.VEHICLE["vin"]
+        client.post("/vehicles/", json=TestVehicles.VEHICLE, headers=headers)
+        for _ in range(2):
+            client.get(f"/vehicles/{vin}/service-records", headers=headers)
+        client.get("/vehicles/YOK/service-records", headers=headers)
+        client.get("/hic-yok")
+
+        samples = self._samples()
+        route = 'route="/vehicles/{vin}/service-records"'
+        assert self._value(samples, "http_requests_total", route, 'status="200"') == 2
+        assert self._value(samples, "http_requests_total", route, 'status="404"') == 1
+        assert self._value(samples, "http_request_duration_seconds_count", route) == 3
+        assert self._value(samples, "http_requests_total", 'route="unmatched"') == 1
+        assert not any(vin in k for k in samples)
+        # İstek başına 2 sorgu (yetki + kayıtlar), 404'te 1
+        assert self._value(samples, "db_queries_total", route) == 5
+        assert self._value(samples, "bcrypt_duration_seconds_count", 'op="hash"') == 1
+        assert self._value(samples, "bcrypt_duration_seconds_count", 'op="verify"') == 1
+
+
+    def test_each_family_is_one_contiguous_block(self):
+        from app import metrics
+        headers = auth_header()
+        client.get("/vehicles/my-vehicles", headers=headers)
+        client.get("/users/me", headers=headers)
+        pools = {
+            name: metrics.TimedQueuePool(lambda: None, pool_size=1 + index, max_overflow=0)
+            for index, name in enumerate(("primary", "replica"))
+        }
+        text = metrics.http_metrics.lines() + metrics.registry.lines() + metrics.pool_metrics(pools)
+        families, current = [], None
+        for index, line in enumerate(text):
+            if line.startswith("# HELP "):
+                assert text[index + 1].startswith(f"# TYPE {line.split(' ')[2]} "), line
+            elif line.startswith("# TYPE "):
+                _, _, name, kind = line.split(" ")
+                families.append(name)
+                current = (name, kind)
+            else:
+                name, kind = current
+                sample = line.split("{", 1)[0]
+                allowed = {name} | ({f"{name}_bucket", f"{name}_sum", f"{name}_count"} if kind == "histogram" else set())
+                assert sample in allowed, (sample, current)
+        assert len(families) == len(set(families))
+        assert {"db_queries_total", "db_query_seconds_total", "db_pool_size"} <= set(families)
+
+
+class TestQueryBudget:
+    """QUERY_DEBUG: istek başına sorgu sayısı, N+1 tespiti ve route bütçeleri."""
+
+    def test_statement_shape_collapses_literals_and_in_lists(self):
+        a = querylog.statement_shape("SELECT * FROM vehicles WHERE id IN (?, ?, ?) AND year > 2000")
+        b = querylog.statement_shape("SELECT *  FROM vehicles\n WHERE id IN (?) AND year > 1990")
+        assert a == b == "SELECT * FROM vehicles WHERE id IN (?) AND year > ?"
+
+    def test_detects_n_plus_one(self, max_queries):
+        headers = auth_header()
+        client.post("/vehicles/", json=TestVehicles.VEHICLE, headers=headers)
+        db = TestSessionLocal()
+        try:
+            with pytest.raises(AssertionError, match="N\\+1"):
+                with max_queries(10):
+                    for _ in range(3):
+                        db.query(models.Vehicle).filter(models.Vehicle.vin == TestVehicles.VEHICLE["vin"]).first()
+            with max_queries(1) as recorder:
+                db.query(models.Vehicle).all()
+            assert len(recorder) == 1
+        finally:
+            db.close()
+
+    def test_route_budget_violation_and_header(self, monkeypatch):
+        headers = auth_header()
+        vin = TestVehicles.VEHICLE["vin"]
+        client.post("/vehicles/", json=TestVehicles.VEHICLE, headers=headers)
+        res = client.get(f"/vehicles/{vin}/service-records", headers=headers)
+        assert res.status_code == 200
+        assert int(res.headers[querylog.QUERY_COUNT_HEADER]) <= querylog.route_budget("GET", "/vehicles/{vin}/service-records")
+        assert not querylog.violations
+
+        monkeypatch.setitem(querylog.ROUTE_QUERY_BUDGETS, "GET /vehicles/{vin}/service-records", 0)
+        client.get(f"/vehicles/{vin}/service-records", headers=headers)
+        assert [(m, r) for m, r, _ in querylog.violations] == [("GET", "/vehicles/{vin}/service-records")]
+        assert "bütçe 0" in querylog.violations[0][2][0]
+        querylog.violations.clear()
+
+
+class TestAsyncMode:
+    """DB_ASYNC modu: aynı endpoint'ler AsyncSession (aiosqlite) üzerinden."""
+    VEHICLE = TestVehicles.VEHICLE
+
+    @pytest.fixture
+    def async_client(self):
+        pytest.importorskip("aiosqlite")
+        from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+        from sqlalchemy.pool import NullPool
+
+        async_engine = create_async_engine("sqlite+aiosqlite:///./test.db", poolclass=NullPool)
+        AsyncTestSession = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+        async def override_get_async_db():
+            async with AsyncTestSession() as db:
+                yield db
+
+        async_app = create_app(db_async=True)
+        async_app.dependency_overrides[get_db] = override_get_db
+        async_app.dependency_overrides[get_async_db] = override_get_async_db
+        with TestClient(async_app) as c:
+            yield c
+
+    def _auth(self, c, email="async@vastarion.com"):
+        c.post("/auth/signup", json={"email": email, "password": "Test123"})
+        token = c.post("/auth/login", data={"username": email, "password": "Test123"}).json()["access_token"]
+        return {"Authorization": f"Bearer {token}"}
+
+    def test_async_routes_take_precedence(self):
+        async_app = create_app(db_async=True)
+        route = next(r for r in async_app.routes if getattr(r, "path", None) == "/vehicles/my-vehicles")
+        assert route.endpoint.__module__ == "routers.vehicles_async"
+
+    def test_vehicle_lifecycle(self, async_client):
+        headers = self._auth(async_client)
+        resp = async_client.post("/vehicles/", json=self.VEHICLE, headers=headers)
+        assert resp.status_code == 200
+
+        resp = async_client.get("/vehicles/my-vehicles", headers=headers)
+        assert [v["vin"] for v in resp.json()] == [self.VEHICLE["vin"]]
+
+        resp = async_client.put(f"/vehicles/{self.VEHICLE['vin']}", json={"mileage": 9000}, headers=headers)
+        assert resp.json()["mileage"] == 9000
+
+        resp = async_client.delete(f"/vehicles/{self.VEHICLE['vin']}", headers=headers)
+        assert resp.status_code == 200
+        assert async_client.get("/vehicles/my-vehicles", headers=headers).json() == []
+
+    def test_shared_service_records(self, async_client):
+        owner = self._auth(async_client, "owner@vastarion.com")
+        editor = self._auth(async_client, "editor@vastarion.com")
+        vin = self.VEHICLE["vin"]
+        async_client.post("/vehicles/", json=self.VEHICLE, headers=owner)
+        resp = async_client.post(f"/vehicles/{vin}/share", json={"email": "editor@vastarion.com", "permission": "editor"}, headers=owner)
+        assert resp.status_code == 200
+
+        resp = async_client.post(f"/vehicles/{vin}/service-records", json={"description": "Yağ Değişimi", "mileage": 2000}, headers=editor)
+        assert resp.status_code == 200
+        records = async_client.get(f"/vehicles/{vin}/service-records", headers=owner).json()
+        assert len(records) == 1
+
+        shared = async_client.get("/vehicles/shared-with-me", headers=editor).json()
+        assert shared[0]["permission"] == "editor"
+        assert shared[0]["owner_email"] == "owner@vastarion.com"
+
+
 # ==================== HEALTHCHECK ====================
 
 class TestHealthcheck: